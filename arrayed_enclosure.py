@@ -1,92 +1,176 @@
-import numpy
 from py2scad import *
+from plate_2d import Plate_2D, ref_square
+from param_deps import depends_on
+from interference import Solid_Box
+from lazy_part import Lazy_Part, ensure_made
+from hole import Hole
 from capillary_enclosure import Capillary_Enclosure
 
 
 class Arrayed_Enclosure(Capillary_Enclosure):
 
+    array_bottom = Lazy_Part('array_bottom', 'make_array_parts')
+    array_bottom_size = Lazy_Part('array_bottom_size', 'make_array_parts')
+    array_bottom_hole_arrays = Lazy_Part('array_bottom_hole_arrays', 'make_array_parts')
+    array_bottom_mount_hole_list = Lazy_Part('array_bottom_mount_hole_list', 'make_array_parts')
+
     def __init__(self,params):
         self.params = params
         super(Arrayed_Enclosure,self).__init__(self.params)
 
+    @depends_on(parts=(
+            'make_box', 'make_sensor', 'make_capillary', 'make_guide_plates', 'make_led_pcb',
+            'make_diffuser', 'make_led_standoffs', 'make_capillary_clamp', 'make_array_parts',
+            ))
     def make(self):
         super(Arrayed_Enclosure,self).make()
+        self.make_array_parts()
+
+    @depends_on(parts=('make_array_bottom', 'make_bottom_mount_holes'))
+    def make_array_parts(self):
+        """
+        Make the arrayed bottom plate with its mount holes.
+        """
         self.make_array_bottom()
         self.make_bottom_mount_holes()
 
+    @depends_on('wall_thickness', 'lid_radius', parts=('make_box', 'get_array_bottom_size', 'get_array_positions'))
     def make_array_bottom(self):
-        number_of_sensors = self.params['number_of_sensors']
-        sensor_spacing = self.params['sensor_spacing']
         thickness = self.params['wall_thickness']
         lid_radius = self.params['lid_radius']
-        overhang = self.params['array_bottom_overhang']
-        bottom_x_overhang = self.params['bottom_x_overhang']
-        bottom_y_overhang = self.params['bottom_y_overhang']
 
         # Create larger bottom plate for arrayed sensor
-        plate_x = self.bottom_x
-        plate_y = self.bottom_y + sensor_spacing*number_of_sensors + 2*overhang
+        plate_x, plate_y = self.get_array_bottom_size()
         self.array_bottom_size = plate_x, plate_y
         self.array_bottom =  rounded_box(plate_x,plate_y,thickness,radius=lid_radius,round_z=False)
 
         # Get list of holes in single capillary sensor
-        hole_list = self.params['hole_list'] + self.tab_hole_list + self.standoff_hole_list
-        bottom_holes = [hole for hole in hole_list if hole['panel'] == 'bottom']
-
-        # Create list of bottom holes for arrayed sensor
-        array_bottom_holes = []
-        array_y_values = self.get_array_y_values()
-        for hole in bottom_holes:
-            for pos_y in array_y_values:
-                hole_new = dict(hole)
-                hole_x, hole_y = hole['location']
-                hole_new['location'] = hole_x, hole_y + pos_y
-                hole_new['panel'] = 'array_bottom'
-                array_bottom_holes.append(hole_new)
-
-        self.add_holes(array_bottom_holes)
-
-    def make_bottom_mount_holes(self):
+        bottom_holes = self.get_panel_holes('bottom')
+
+        # Replicate bottom holes for arrayed sensor and cut them from the plate
+        from hole_array import get_hole_arrays, replicate_hole_arrays, cut_hole_arrays
+        hole_arrays = get_hole_arrays(bottom_holes)
+        self.array_bottom_hole_arrays = replicate_hole_arrays(hole_arrays, self.get_array_positions())
+        self.array_bottom = cut_hole_arrays(self.array_bottom, self.array_bottom_hole_arrays, 2*thickness)
+
+    @depends_on('bottom_mount_hole_diam', 'bottom_mount_hole_spacing', 'bottom_mount_hole_inset',
+            parts=('get_array_bottom_size',))
+    def get_bottom_mount_holes(self):
+        """
+        Get list of the mount holes of the arrayed bottom plate.
+        """
         hole_diam = self.params['bottom_mount_hole_diam'] 
         hole_spacing = self.params['bottom_mount_hole_spacing'] 
         hole_inset = self.params['bottom_mount_hole_inset'] 
-        bottom_x, bottom_y = self.array_bottom_size
+        bottom_x, bottom_y = self.get_array_bottom_size()
 
         hole_list = []
         for i in (-1,1):
             for j in (-1,1):
                 x_pos = i*0.5*hole_spacing
                 y_pos = j*(0.5*bottom_y - hole_inset)
-                hole = {
-                        'panel'     : 'array_bottom',
-                        'type'      : 'round',
-                        'location'  : (x_pos,y_pos),
-                        'size'      : hole_diam,
-                        }
+                hole = Hole(
+                        panel='array_bottom',
+                        type='round',
+                        location=(x_pos,y_pos),
+                        size=hole_diam,
+                        )
                 hole_list.append(hole)
+        return hole_list
+
+    @depends_on(parts=('make_array_bottom', 'get_bottom_mount_holes'))
+    def make_bottom_mount_holes(self):
+        hole_list = self.get_bottom_mount_holes()
         self.add_holes(hole_list)
+        self.array_bottom_mount_hole_list = hole_list
 
+    @depends_on('inner_dimensions', 'wall_thickness', 'sensor_dimensions', 'capillary_hole_offset',
+            'capillary_diam', 'guide_plate_dimensions', 'led_pcb_dimensions', 'diffuser_dimensions',
+            'diffuser_standoff_height', 'bottom_x_overhang', parts=('make', 'get_placements', 'get_array_positions'))
     def get_assembly(self,**kwargs):
         show_bottom = kwargs['show_bottom']
         kwargs['show_bottom'] = False
-        top_parts = super(Arrayed_Enclosure,self).get_assembly(**kwargs)
-        parts_list = []
+        from transforms import Placement_List, translation_matrices
+
+        # The box panels come placed by Basic_Enclosure, the other parts of a
+        # sensor are placed by matrix. Each part is defined once as a module
+        # and placed in a sensor_part_unit module, which is called once per
+        # sensor with a single multmatrix.
+        ensure_made(self, 'bottom')
+        placements = Placement_List()
+        for i, part in enumerate(super(Capillary_Enclosure,self).get_assembly(**kwargs)):
+            placements.add('panel_{0}'.format(i), part)
+        placements.extend(self.get_placements(**kwargs))
+        offsets = [(x_pos,y_pos,0) for x_pos, y_pos in self.get_array_positions().tolist()]
+        parts_list = placements.get_instanced_nodes(translation_matrices(offsets), 'sensor_part')
 
-        # Array top parts
-        pos_values = self.get_array_y_values()
-        for pos in pos_values:
-            parts_list.append(Translate(top_parts,v=(0,pos,0)))
-
-        x,y,z = self.params['inner_dimensions']
-        thickness = self.params['wall_thickness']
-        z_shift = -0.5*z - 0.5*thickness
-        array_bottom = Translate(self.array_bottom,v=(0,0,z_shift))
         if show_bottom:
-            parts_list.append(array_bottom)
+            x,y,z = self.params['inner_dimensions']
+            thickness = self.params['wall_thickness']
+            z_shift = -0.5*z - 0.5*thickness
+            bottom_placements = Placement_List()
+            bottom_placements.add('array_bottom', self.array_bottom, v=(0,0,z_shift))
+            parts_list.extend(bottom_placements.get_nodes())
 
         return parts_list
 
-    def get_box_projection(self,show_ref_cube=True,spacing_factor=4,project=True):
+    @depends_on('inner_dimensions', 'wall_thickness', parts=('get_array_bottom_size', 'get_array_positions'))
+    def get_solids(self):
+        """
+        Get boxes and cylinders approximating the parts of all sensors, as
+        placed in the assembly, and the arrayed bottom plate.
+        """
+        x,y,z = self.params['inner_dimensions']
+        thickness = self.params['wall_thickness']
+        unit_solids = super(Arrayed_Enclosure,self).get_solids()
+        unit_solids = [solid for solid in unit_solids if solid.name != 'bottom']
+        solid_list = []
+        for i, (x_pos, y_pos) in enumerate(self.get_array_positions().tolist()):
+            group = 'sensor_{0}'.format(i)
+            solid_list.extend(solid.translate((x_pos,y_pos,0), group) for solid in unit_solids)
+        plate_x, plate_y = self.get_array_bottom_size()
+        solid_list.append(Solid_Box('bottom', (0,0,-0.5*z-0.5*thickness), (plate_x,plate_y,thickness)))
+        return solid_list
+
+    @depends_on(parts=('get_array_bottom_size',))
+    def get_panel_sizes(self):
+        panel_sizes = super(Arrayed_Enclosure,self).get_panel_sizes()
+        panel_sizes['array_bottom'] = self.get_array_bottom_size()
+        return panel_sizes
+
+    @depends_on('hole_list', parts=(
+            'add_sensor_cutout', 'add_capillary_holes', 'add_guide_tap_holes', 'add_led_tap_holes',
+            'add_led_cable_hole', 'get_capillary_clamp_thru_holes', 'get_array_positions', 'get_bottom_mount_holes',
+            ))
+    def get_added_hole_list(self):
+        """
+        Get list of the holes the enclosure adds, including the arrayed
+        bottom plate holes replicated from the added bottom panel holes.
+        Doesn't make the box or the arrayed bottom plate.
+        """
+        from hole_array import get_hole_arrays, replicate_hole_arrays, hole_arrays_to_list
+        hole_list = super(Arrayed_Enclosure,self).get_added_hole_list()
+        bottom_holes = [hole for hole in hole_list if hole['panel'] == 'bottom']
+        hole_arrays = replicate_hole_arrays(get_hole_arrays(bottom_holes), self.get_array_positions())
+        return hole_list + hole_arrays_to_list(hole_arrays, 'array_bottom') + self.get_bottom_mount_holes()
+
+    @depends_on(parts=('make_box', 'make_bottom_mount_holes'))
+    def get_hole_list(self):
+        """
+        Get list of all holes, including those of the arrayed bottom plate.
+        """
+        return super(Arrayed_Enclosure,self).get_hole_list() + self.get_array_bottom_holes()
+
+    @depends_on('lid_radius', 'wall_thickness', parts=('get_panel_sizes', 'get_panel_tabs', 'get_panel_holes'))
+    def get_box_projection_2d(self,show_ref_cube=True,spacing_factor=4,show_bottom=False):
+        """
+        Get 2D outlines of the tabbed box panels of one sensor. The bottom is
+        left out as the sensors share the arrayed bottom plate.
+        """
+        return super(Arrayed_Enclosure,self).get_box_projection_2d(show_ref_cube, spacing_factor, show_bottom)
+
+    @depends_on('inner_dimensions', 'wall_thickness', parts=('make_box', 'make_capillary_clamp'))
+    def get_box_projection(self,show_ref_cube=True,spacing_factor=4,project=True,show_clamp=True):
         inner_x, inner_y, inner_z = self.params['inner_dimensions']
         wall_thickness = self.params['wall_thickness']
         top_x_overhang = self.params['top_x_overhang']
@@ -121,15 +205,17 @@ class Arrayed_Enclosure(Capillary_Enclosure):
         y_shift = 0.5*self.bottom_y + 0.5*INCH2MM + inner_z + 2*wall_thickness + 2*spacing
         ref_cube = Translate(ref_cube,v=(0,y_shift,0))
 
-        # Add capillary clamp
-        thickness = self.params['wall_thickness']
-        clamp_x, clamp_y, clamp_z = self.clamp_size
-        x_shift = 0.5*self.top_x + 0.5*clamp_x + spacing_factor*thickness
-        y_shift = 0.5*self.top_y + 0.5*clamp_y + spacing_factor*thickness
-        clamp = Translate(self.capillary_clamp,v=(x_shift,y_shift,0))
-
         # Create part list
-        part_list = [self.top, front, back, left, right, clamp]
+        part_list = [self.top, front, back, left, right]
+
+        # Add capillary clamp
+        if show_clamp:
+            thickness = self.params['wall_thickness']
+            clamp_x, clamp_y, clamp_z = self.clamp_size
+            x_shift = 0.5*self.top_x + 0.5*clamp_x + spacing_factor*thickness
+            y_shift = 0.5*self.top_y + 0.5*clamp_y + spacing_factor*thickness
+            clamp = Translate(self.capillary_clamp,v=(x_shift,y_shift,0))
+            part_list.append(clamp)
         if show_ref_cube == True:
             part_list.append(ref_cube)
 
@@ -143,10 +229,12 @@ class Arrayed_Enclosure(Capillary_Enclosure):
 
         return part_list_proj
 
+    @depends_on('wall_thickness', parts=('make_bottom_mount_holes',))
     def get_bottom_projection(self,show_ref_cube=True,spacing_factor=4):
         thickness = self.params['wall_thickness']
+        plate_x, plate_y = self.array_bottom_size
         ref_cube = Cube(size=(INCH2MM,INCH2MM,INCH2MM))
-        x_shift = 0.5*self.bottom_x + 0.5*INCH2MM + spacing_factor*thickness
+        x_shift = 0.5*plate_x + 0.5*INCH2MM + spacing_factor*thickness
         ref_cube = Translate(ref_cube,v=(x_shift,0,0))
 
         bottom = Projection(self.array_bottom)
@@ -156,13 +244,100 @@ class Arrayed_Enclosure(Capillary_Enclosure):
 
         return parts_list
 
-
-    def get_array_y_values(self):
-        number_of_sensors = self.params['number_of_sensors']
-        sensor_spacing = self.params['sensor_spacing']
-        array_length = sensor_spacing*number_of_sensors
-        pos_values = numpy.linspace(-0.5*array_length, 0.5*array_length, number_of_sensors)
-        return pos_values
+    @depends_on('wall_thickness', 'lid_radius', parts=('make_bottom_mount_holes',))
+    def get_bottom_projection_2d(self,show_ref_cube=True,spacing_factor=4):
+        """
+        Get 2D outline of the arrayed bottom plate for the native dxf writer.
+        """
+        thickness = self.params['wall_thickness']
+        lid_radius = self.params['lid_radius']
+        plate_x, plate_y = self.array_bottom_size
+        plate = Plate_2D(
+                plate_x,
+                plate_y,
+                self.get_array_bottom_holes(),
+                radius=lid_radius,
+                name='array_bottom',
+                )
+        plate_list = [plate]
+        if show_ref_cube:
+            x_shift = 0.5*plate_x + 0.5*INCH2MM + spacing_factor*thickness
+            plate_list.append(ref_square((x_shift,0)))
+        return plate_list
+
+    @depends_on(parts=('make_bottom_mount_holes',))
+    def get_array_bottom_holes(self):
+        """
+        Get list of all holes in the arrayed bottom plate.
+        """
+        from hole_array import hole_arrays_to_list
+        hole_list = hole_arrays_to_list(self.array_bottom_hole_arrays, 'array_bottom')
+        return hole_list + self.array_bottom_mount_hole_list
+
+    @depends_on('inner_dimensions', 'wall_thickness', 'bottom_x_overhang', 'bottom_y_overhang',
+            'array_bottom_overhang', parts=('get_array_shape', 'get_array_length'))
+    def get_array_bottom_size(self):
+        """
+        Returns (x,y) size of the arrayed bottom plate.
+        """
+        x,y,z = self.params['inner_dimensions']
+        thickness = self.params['wall_thickness']
+        overhang = self.params['array_bottom_overhang']
+        rows, cols = self.get_array_shape()
+        length_x, length_y = self.get_array_length()
+        plate_x = x + 2*thickness + 2*self.params['bottom_x_overhang']
+        plate_y = y + 2*thickness + 2*self.params['bottom_y_overhang'] + length_y + 2*overhang
+        if cols > 1:
+            plate_x += length_x + 2*overhang
+        return plate_x, plate_y
+
+    @depends_on('number_of_sensors', 'array_rows', 'array_cols')
+    def get_array_shape(self):
+        """
+        Returns (rows, cols) of the sensor array. Rows are along y and columns
+        along x. If neither array_rows nor array_cols is given the sensors
+        form a single column of number_of_sensors.
+        """
+        if 'array_rows' in self.params or 'array_cols' in self.params:
+            rows = self.params.get('array_rows', 1)
+            cols = self.params.get('array_cols', 1)
+        else:
+            rows = self.params['number_of_sensors']
+            cols = 1
+        if rows < 1 or cols < 1:
+            raise ValueError, 'array must have at least one row and column'
+        return rows, cols
+
+    @depends_on('sensor_spacing', 'sensor_spacing_x', parts=('get_array_shape',))
+    def get_array_length(self):
+        """
+        Returns (x,y) length of the sensor array. sensor_spacing gives the
+        spacing along y and sensor_spacing_x, which is only needed when there
+        is more than one column, the spacing along x.
+        """
+        rows, cols = self.get_array_shape()
+        length_y = self.params['sensor_spacing']*rows
+        if cols > 1:
+            length_x = self.params['sensor_spacing_x']*cols
+        else:
+            length_x = 0.0
+        return length_x, length_y
+
+    @depends_on(parts=('get_array_shape', 'get_array_length'))
+    def get_array_positions(self):
+        """
+        Returns (n,2) array of the (x,y) positions of the sensors, row by row.
+        """
+        import numpy
+        rows, cols = self.get_array_shape()
+        length_x, length_y = self.get_array_length()
+        y_values = numpy.linspace(-0.5*length_y, 0.5*length_y, rows)
+        if cols > 1:
+            x_values = numpy.linspace(-0.5*length_x, 0.5*length_x, cols)
+        else:
+            x_values = numpy.zeros((1,))
+        x_grid, y_grid = numpy.meshgrid(x_values, y_values)
+        return numpy.column_stack((x_grid.ravel(), y_grid.ravel()))
 
 
 
@@ -0,0 +1,226 @@
+"""
+Benchmarks the enclosure generation stages for a range of sensor counts.
+
+For each number of sensors an Arrayed_Enclosure is built in a fresh worker
+process and the wall time of each stage (the Capillary_Enclosure make,
+make_array_bottom, make_bottom_mount_holes, get_assembly and writing the
+assembly with write_scad) is measured together with the growth of the peak
+memory of the process during the stage, the final peak memory and the number
+of scad bytes written. Results are saved as json and can be compared against
+a stored baseline, in which case the script exits with a non zero status if
+the time or memory growth of any stage, or the final peak memory, has
+regressed.
+"""
+import os
+import json
+import time
+import tempfile
+import argparse
+import resource
+import platform
+import multiprocessing
+from py2scad import *
+from scad_writer import write_scad
+from capillary_enclosure import Capillary_Enclosure
+from arrayed_enclosure import Arrayed_Enclosure
+from make_arrayed_enclosure import params
+
+DEFAULT_SENSOR_COUNTS = [1, 2, 5, 10, 20, 50, 100]
+DEFAULT_TOLERANCE = 0.25
+MIN_TIME_DIFF = 0.005
+MIN_MEMORY_DIFF = 1024
+
+STAGE_LIST = [
+        'make',
+        'make_array_bottom',
+        'make_bottom_mount_holes',
+        'get_assembly',
+        'scad_write',
+        ]
+
+ASSEMBLY_KWARGS = dict(
+        show_top=True,
+        show_bottom=True,
+        show_front=True,
+        show_back=True,
+        show_left=True,
+        show_right=True,
+        show_standoffs=True,
+        show_capillary=True,
+        show_sensor=True,
+        show_diffuser=True,
+        show_diffuser_standoffs=True,
+        show_led_pcb=True,
+        show_guide_plates=True,
+        show_guide_top=True,
+        show_clamp=True,
+        explode=(0,0,0),
+        )
+
+
+def get_peak_memory():
+    """
+    Peak resident memory of the current process in kB (ru_maxrss is in bytes
+    on OS X).
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if platform.system() == 'Darwin':
+        peak = peak/1024
+    return peak
+
+
+def run_stages(number_of_sensors):
+    """
+    Time each stage of building and writing an arrayed enclosure with the
+    given number of sensors. Meant to be run in a fresh process so that the
+    peak memory belongs to this run only. The memory of a stage is how much
+    it raised the peak, as ru_maxrss only ever grows.
+    """
+    bench_params = dict(params)
+    bench_params['number_of_sensors'] = number_of_sensors
+    stage_time = {}
+    stage_memory = {}
+
+    def run_stage(name, func, *args):
+        peak_start = get_peak_memory()
+        t_start = time.time()
+        rtn_value = func(*args)
+        stage_time[name] = time.time() - t_start
+        stage_memory[name] = get_peak_memory() - peak_start
+        return rtn_value
+
+    enclosure = Arrayed_Enclosure(bench_params)
+    run_stage('make', Capillary_Enclosure.make, enclosure)
+    run_stage('make_array_bottom', enclosure.make_array_bottom)
+    run_stage('make_bottom_mount_holes', enclosure.make_bottom_mount_holes)
+    part_assembly = run_stage('get_assembly', lambda: enclosure.get_assembly(**ASSEMBLY_KWARGS))
+
+    fd, filename = tempfile.mkstemp(suffix='.scad')
+    os.close(fd)
+    try:
+        run_stage('scad_write', write_scad, filename, part_assembly, 50)
+        scad_bytes = os.path.getsize(filename)
+    finally:
+        os.remove(filename)
+
+    result = {
+            'number_of_sensors' : number_of_sensors,
+            'time'              : stage_time,
+            'memory_growth_kb'  : stage_memory,
+            'peak_memory_kb'    : get_peak_memory(),
+            'scad_bytes'        : scad_bytes,
+            }
+    return result
+
+
+def run_benchmark(sensor_counts=DEFAULT_SENSOR_COUNTS, repeat=3, verbose=True):
+    """
+    Run the stages repeat times for each sensor count, each run in a new
+    process, and keep the fastest time of each stage.
+    """
+    result_list = []
+    for number_of_sensors in sensor_counts:
+        best = None
+        for i in range(repeat):
+            pool = multiprocessing.Pool(1)
+            try:
+                result = pool.apply(run_stages, (number_of_sensors,))
+            finally:
+                pool.close()
+                pool.join()
+            if best is None:
+                best = result
+            else:
+                for stage in STAGE_LIST:
+                    best['time'][stage] = min(best['time'][stage], result['time'][stage])
+                    best['memory_growth_kb'][stage] = max(best['memory_growth_kb'][stage], result['memory_growth_kb'][stage])
+                best['peak_memory_kb'] = max(best['peak_memory_kb'], result['peak_memory_kb'])
+        if verbose:
+            time_str = '  '.join('{0}={1:1.4f}s'.format(stage, best['time'][stage]) for stage in STAGE_LIST)
+            print 'sensors={0:<4d} {1}  peak={2}kB  scad={3}B'.format(
+                    number_of_sensors,
+                    time_str,
+                    best['peak_memory_kb'],
+                    best['scad_bytes'],
+                    )
+        result_list.append(best)
+    return result_list
+
+
+def find_regressions(result_list, baseline_list, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare results against a baseline. A stage has regressed if its time
+    exceeds the baseline time by more than the relative tolerance (and by
+    more than MIN_TIME_DIFF seconds) or if its memory growth exceeds the
+    baseline growth likewise (by more than MIN_MEMORY_DIFF kB). The final
+    peak memory is compared in the same way, and a run has regressed if more
+    scad bytes are written. Returns a list of messages describing the
+    regressions.
+    """
+    baseline_dict = dict((item['number_of_sensors'], item) for item in baseline_list)
+    msg_list = []
+    for result in result_list:
+        number_of_sensors = result['number_of_sensors']
+        try:
+            baseline = baseline_dict[number_of_sensors]
+        except KeyError:
+            continue
+        for stage in STAGE_LIST:
+            t_new = result['time'][stage]
+            t_old = baseline['time'].get(stage)
+            if t_old is None:
+                continue
+            if t_new > (1.0 + tolerance)*t_old and t_new - t_old > MIN_TIME_DIFF:
+                msg = 'sensors={0} {1}: {2:1.4f}s -> {3:1.4f}s'.format(number_of_sensors, stage, t_old, t_new)
+                msg_list.append(msg)
+        for stage in STAGE_LIST:
+            m_new = result['memory_growth_kb'][stage]
+            m_old = baseline.get('memory_growth_kb', {}).get(stage)
+            if m_old is None:
+                continue
+            if m_new > (1.0 + tolerance)*m_old and m_new - m_old > MIN_MEMORY_DIFF:
+                msg = 'sensors={0} {1}: {2}kB -> {3}kB memory growth'.format(number_of_sensors, stage, m_old, m_new)
+                msg_list.append(msg)
+        m_new = result['peak_memory_kb']
+        m_old = baseline.get('peak_memory_kb')
+        if isinstance(m_old, dict):
+            # Older baselines have the peak after each stage, the last of
+            # which is the largest
+            m_old = max(m_old.values())
+        if m_old is not None and m_new > (1.0 + tolerance)*m_old and m_new - m_old > MIN_MEMORY_DIFF:
+            msg = 'sensors={0}: {1}kB -> {2}kB peak memory'.format(number_of_sensors, m_old, m_new)
+            msg_list.append(msg)
+        if result['scad_bytes'] > baseline['scad_bytes']:
+            msg = 'sensors={0} scad_bytes: {1} -> {2}'.format(
+                    number_of_sensors,
+                    baseline['scad_bytes'],
+                    result['scad_bytes'],
+                    )
+            msg_list.append(msg)
+    return msg_list
+
+# -----------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='benchmark enclosure generation stages')
+    parser.add_argument('-s', '--sensors', type=int, nargs='+', default=DEFAULT_SENSOR_COUNTS, help='sensor counts to benchmark')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='runs per sensor count, the fastest is kept')
+    parser.add_argument('-o', '--output', default='benchmark.json', help='file to save results to')
+    parser.add_argument('-b', '--baseline', default=None, help='baseline results to compare against')
+    parser.add_argument('-t', '--tolerance', type=float, default=DEFAULT_TOLERANCE, help='allowed relative increase of time and memory')
+    args = parser.parse_args()
+
+    result_list = run_benchmark(args.sensors, repeat=args.repeat)
+    with open(args.output,'w') as f:
+        json.dump(result_list, f, indent=4, sort_keys=True)
+
+    if args.baseline is not None:
+        with open(args.baseline,'r') as f:
+            baseline_list = json.load(f)
+        msg_list = find_regressions(result_list, baseline_list, args.tolerance)
+        if msg_list:
+            print 'regressions against {0}:'.format(args.baseline)
+            for msg in msg_list:
+                print '  {0}'.format(msg)
+            raise SystemExit(1)
+        print 'no regressions against {0}'.format(args.baseline)
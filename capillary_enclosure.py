@@ -1,11 +1,47 @@
-import scipy
 from py2scad import *
+from plate_2d import Plate_2D, round_holes, ref_square
+from hole import Hole, Hole_Registry
+from param_deps import depends_on, BASE_KEYS
+from interference import Solid_Box, Solid_Cylinder
+from lazy_part import Lazy_Part, ensure_made
 
 
 class Capillary_Enclosure(Basic_Enclosure):
 
+    # Parts are made on first use so that only the parts needed for the
+    # requested outputs are made. make() makes all of them.
+    top = Lazy_Part('top', 'make_box')
+    bottom = Lazy_Part('bottom', 'make_box')
+    front = Lazy_Part('front', 'make_box')
+    back = Lazy_Part('back', 'make_box')
+    left = Lazy_Part('left', 'make_box')
+    right = Lazy_Part('right', 'make_box')
+    top_x = Lazy_Part('top_x', 'make_box')
+    top_y = Lazy_Part('top_y', 'make_box')
+    bottom_x = Lazy_Part('bottom_x', 'make_box')
+    bottom_y = Lazy_Part('bottom_y', 'make_box')
+    tab_hole_list = Lazy_Part('tab_hole_list', 'make_box')
+    standoff_hole_list = Lazy_Part('standoff_hole_list', 'make_box')
+    clamp_hole_list = Lazy_Part('clamp_hole_list', 'make_box')
+    box_hole_registry = Lazy_Part('box_hole_registry', 'make_box')
+    sensor = Lazy_Part('sensor', 'make_sensor')
+    capillary = Lazy_Part('capillary', 'make_capillary')
+    guide_plate_pos = Lazy_Part('guide_plate_pos', 'make_guide_plates')
+    guide_plate_neg = Lazy_Part('guide_plate_neg', 'make_guide_plates')
+    guide_plate_top = Lazy_Part('guide_plate_top', 'make_guide_plates')
+    led_pcb = Lazy_Part('led_pcb', 'make_led_pcb')
+    diffuser = Lazy_Part('diffuser', 'make_diffuser')
+    diffuser_standoff_pos = Lazy_Part('diffuser_standoff_pos', 'make_led_standoffs')
+    diffuser_standoff_neg = Lazy_Part('diffuser_standoff_neg', 'make_led_standoffs')
+    capillary_clamp = Lazy_Part('capillary_clamp', 'make_capillary_clamp')
+    clamp_size = Lazy_Part('clamp_size', 'make_capillary_clamp')
+
     def __init__(self,params):
-        self.params = params
+        # Holes are added to a copy of the hole list so that the caller's params
+        # are left unchanged and enclosures can be created repeatedly.
+        self.params = dict(params)
+        self.params['hole_list'] = list(params['hole_list'])
+        self.hole_registry = Hole_Registry(self.params['hole_list'])
         self.add_sensor_cutout()
         self.add_capillary_holes()
         self.add_guide_tap_holes()
@@ -13,21 +49,55 @@ class Capillary_Enclosure(Basic_Enclosure):
         self.add_led_cable_hole()
         super(Capillary_Enclosure,self).__init__(self.params)
 
+    @depends_on(parts=(
+            'make_box', 'make_sensor', 'make_capillary', 'make_guide_plates', 'make_led_pcb',
+            'make_diffuser', 'make_led_standoffs', 'make_capillary_clamp',
+            ))
     def make(self):
-        super(Capillary_Enclosure,self).make()
+        self.make_box()
         self.make_sensor()
         self.make_capillary()
         self.make_guide_plates()
         self.make_led_pcb()
         self.make_diffuser()
         self.make_led_standoffs()
-        self.make_capillary_clamp_thru_holes()
         self.make_capillary_clamp()
 
+    @depends_on(*BASE_KEYS, parts=(
+            'add_sensor_cutout', 'add_capillary_holes', 'add_guide_tap_holes', 'add_led_tap_holes',
+            'add_led_cable_hole', 'make_capillary_clamp_thru_holes',
+            ))
+    def make_box(self):
+        """
+        Make the box panels with all of their holes.
+        """
+        super(Capillary_Enclosure,self).make()
+        self.make_capillary_clamp_thru_holes()
+        # The made holes are indexed in a copy so that remaking the box
+        # doesn't add them twice.
+        registry = self.hole_registry.copy()
+        registry.extend(self.clamp_hole_list + self.tab_hole_list + self.standoff_hole_list)
+        self.box_hole_registry = registry
+
+    @depends_on(parts=('make', 'get_placements'))
     def get_assembly(self,**kwargs):
         """
         Get enclosure assembly
         """
+        ensure_made(self, 'bottom')
+        parts_list = super(Capillary_Enclosure,self).get_assembly(**kwargs)
+        parts_list.extend(self.get_placements(**kwargs).get_nodes())
+        return parts_list
+
+    @depends_on('inner_dimensions', 'wall_thickness', 'sensor_dimensions', 'capillary_hole_offset',
+            'capillary_diam', 'guide_plate_dimensions', 'led_pcb_dimensions', 'diffuser_dimensions',
+            'diffuser_standoff_height', 'bottom_x_overhang', parts=('make', 'get_led_holes'))
+    def get_placements(self,**kwargs):
+        """
+        Get Placement_List of the parts added to the box panels in the
+        assembly, each placed by a matrix.
+        """
+        from transforms import Placement_List
         try:
             show_sensor = kwargs['show_sensor']
         except KeyError:
@@ -65,102 +135,280 @@ class Capillary_Enclosure(Basic_Enclosure):
         except KeyError:
             show_clamp = True
 
-        explode_x, explode_y, explode_z = explode
-
-        parts_list = super(Capillary_Enclosure,self).get_assembly(**kwargs)
+        placements = Placement_List(explode)
         x,y,z = self.params['inner_dimensions']
         wall_thickness = self.params['wall_thickness']
 
         # Add sensor
-        sensor_x, sensor_y, sensor_z = self.params['sensor_dimensions']
-        sensor = self.sensor
-        z_shift = -0.5*z-0.5*sensor_z - explode_z
-        sensor = Translate(sensor,v=(0,0,z_shift))
-        sensor = Color(sensor,rgba=(0.5,0.5,0.5))
         if show_sensor:
-            parts_list.append(sensor)
+            sensor_x, sensor_y, sensor_z = self.params['sensor_dimensions']
+            z_shift = -0.5*z-0.5*sensor_z
+            placements.add('sensor', self.sensor, v=(0,0,z_shift), explode=(0,0,-1), rgba=(0.5,0.5,0.5))
 
         # Add capillary
         cap_offset_x = self.params['capillary_hole_offset']
         cap_hole_diam = self.params['capillary_diam']
-        y_shift = cap_offset_x
-        z_shift = -0.5*z + 0.5*cap_hole_diam  - explode_z
-        capillary = self.capillary
-        capillary = Translate(self.capillary,v=(0,y_shift,z_shift))
         if show_capillary:
-            parts_list.append(capillary)
-        
+            y_shift = cap_offset_x
+            z_shift = -0.5*z + 0.5*cap_hole_diam
+            placements.add('capillary', self.capillary, v=(0,y_shift,z_shift), explode=(0,0,-1))
+
         # Add guide plate
         guide_x, guide_y, guide_z = self.params['guide_plate_dimensions']
-        y_shift = 0.5*guide_y + 0.5*self.params['capillary_diam'] + cap_offset_x
-        z_shift = -0.5*z + 0.5*guide_z
-        guide_plate_pos = Translate(self.guide_plate_pos,v=[0,y_shift,z_shift])
-        y_shift = -0.5*guide_y - 0.5*self.params['capillary_diam'] + cap_offset_x
-        guide_plate_neg = Translate(self.guide_plate_neg,v=[0,y_shift,z_shift])
-        y_shift = cap_offset_x
-        z_shift = -0.5*z + 1.5*guide_z 
-        guide_plate_top = Translate(self.guide_plate_top,v=[0,y_shift,z_shift])
         if show_guide_plates:
-           parts_list.extend([guide_plate_pos,guide_plate_neg])
+            y_shift = 0.5*guide_y + 0.5*self.params['capillary_diam'] + cap_offset_x
+            z_shift = -0.5*z + 0.5*guide_z
+            placements.add('guide_plate_pos', self.guide_plate_pos, v=(0,y_shift,z_shift))
+            y_shift = -0.5*guide_y - 0.5*self.params['capillary_diam'] + cap_offset_x
+            placements.add('guide_plate_neg', self.guide_plate_neg, v=(0,y_shift,z_shift))
         if show_guide_top:
-           parts_list.extend([guide_plate_top])
-
+            y_shift = cap_offset_x
+            z_shift = -0.5*z + 1.5*guide_z 
+            placements.add('guide_plate_top', self.guide_plate_top, v=(0,y_shift,z_shift))
 
         # Add led pcb
         pcb_x, pcb_y, pcb_z = self.params['led_pcb_dimensions']
-        z_shift = 0.5*z - 0.5*pcb_z
-        led_pcb = Translate(self.led_pcb,v=(0,0,z_shift))
         if show_led_pcb:
-            parts_list.append(led_pcb)
+            z_shift = 0.5*z - 0.5*pcb_z
+            placements.add('led_pcb', self.led_pcb, v=(0,0,z_shift))
 
         # Add diffuser
-        diff_x, diff_y, diff_z = self.params['diffuser_dimensions']
-        diffuser_standoff_height = self.params['diffuser_standoff_height']
-        z_shift = 0.5*z - pcb_z - 0.5*diff_z -  diffuser_standoff_height
-        diffuser = Translate(self.diffuser,v=(0,0,z_shift))
         if show_diffuser:
-            parts_list.append(diffuser)
+            diff_x, diff_y, diff_z = self.params['diffuser_dimensions']
+            diffuser_standoff_height = self.params['diffuser_standoff_height']
+            z_shift = 0.5*z - pcb_z - 0.5*diff_z -  diffuser_standoff_height
+            placements.add('diffuser', self.diffuser, v=(0,0,z_shift))
 
         # Add diffuser standoffs
-        led_hole_tuples = self.get_led_holes()
-        z_shift = 0.5*z - pcb_z- 0.5*self.params['diffuser_standoff_height']
-        for x_shift,y_shift, dummy in led_hole_tuples:
-            if x_shift < 0:
-                standoff = self.diffuser_standoff_neg
-            else:
-                standoff = self.diffuser_standoff_pos
-            standoff = Translate(standoff,v=(x_shift,y_shift,z_shift))
-            if show_diffuser_standoffs:
-                parts_list.append(standoff)
+        if show_diffuser_standoffs:
+            led_hole_tuples = self.get_led_holes()
+            z_shift = 0.5*z - pcb_z- 0.5*self.params['diffuser_standoff_height']
+            for x_shift,y_shift, dummy in led_hole_tuples:
+                if x_shift < 0:
+                    placements.add('diffuser_standoff_neg', self.diffuser_standoff_neg, v=(x_shift,y_shift,z_shift))
+                else:
+                    placements.add('diffuser_standoff_pos', self.diffuser_standoff_pos, v=(x_shift,y_shift,z_shift))
 
         # Add capillary clamp
-        bottom_x_overhang = self.params['bottom_x_overhang']
-        clamp_x, clamp_y, clamp_z = self.clamp_size
-        x_shift = 0.5*self.bottom_x - 0.5*bottom_x_overhang
-        z_shift = -0.5*z + 0.5*wall_thickness + cap_hole_diam
-        capillary_clamp = Translate(self.capillary_clamp,v=(x_shift,0,z_shift))
         if show_clamp:
-            parts_list.append(capillary_clamp)
+            bottom_x_overhang = self.params['bottom_x_overhang']
+            x_shift = 0.5*self.bottom_x - 0.5*bottom_x_overhang
+            z_shift = -0.5*z + 0.5*wall_thickness + cap_hole_diam
+            placements.add('capillary_clamp', self.capillary_clamp, v=(x_shift,0,z_shift))
+
+        return placements
+
+    @depends_on('inner_dimensions', 'wall_thickness', 'top_x_overhang', 'top_y_overhang', 'bottom_x_overhang',
+            'bottom_y_overhang', 'sensor_dimensions', 'capillary_hole_offset', 'capillary_diam', 'capillary_length',
+            'guide_plate_dimensions', 'led_pcb_dimensions', 'diffuser_dimensions', 'diffuser_standoff_height',
+            'diffuser_standoff_diam', parts=('get_panel_sizes', 'get_guide_plate_top_dim', 'get_led_holes', 'get_capillary_clamp_size'))
+    def get_solids(self):
+        """
+        Get boxes and cylinders approximating the parts as placed in the
+        assembly, for interference checking. Holes are not modelled.
+        """
+        x,y,z = self.params['inner_dimensions']
+        thickness = self.params['wall_thickness']
+        bottom_x_overhang = self.params['bottom_x_overhang']
+        panel_sizes = self.get_panel_sizes()
+        bottom_x, bottom_y = panel_sizes['bottom']
+        top_x, top_y = panel_sizes['top']
+
+        # Box panels
+        solid_list = [
+                Solid_Box('bottom', (0,0,-0.5*z-0.5*thickness), (bottom_x,bottom_y,thickness)),
+                Solid_Box('top', (0,0,0.5*z+0.5*thickness), (top_x,top_y,thickness)),
+                Solid_Box('left', (-0.5*x-0.5*thickness,0,0), (thickness,y,z)),
+                Solid_Box('right', (0.5*x+0.5*thickness,0,0), (thickness,y,z)),
+                Solid_Box('front', (0,-0.5*y-0.5*thickness,0), (x+2*thickness,thickness,z)),
+                Solid_Box('back', (0,0.5*y+0.5*thickness,0), (x+2*thickness,thickness,z)),
+                ]
+
+        # Sensor and capillary
+        sensor_x, sensor_y, sensor_z = self.params['sensor_dimensions']
+        solid_list.append(Solid_Box('sensor', (0,0,-0.5*z-0.5*sensor_z), (sensor_x,sensor_y,sensor_z)))
+        cap_offset = self.params['capillary_hole_offset']
+        cap_diam = self.params['capillary_diam']
+        cap_center = (0, cap_offset, -0.5*z + 0.5*cap_diam)
+        solid_list.append(Solid_Cylinder('capillary', cap_center, 0.5*cap_diam, self.params['capillary_length'], axis='x'))
 
-        return parts_list
+        # Guide plates
+        guide_x, guide_y, guide_z = self.params['guide_plate_dimensions']
+        y_shift = 0.5*guide_y + 0.5*cap_diam
+        z_shift = -0.5*z + 0.5*guide_z
+        solid_list.append(Solid_Box('guide_plate_pos', (0,cap_offset+y_shift,z_shift), (guide_x,guide_y,guide_z)))
+        solid_list.append(Solid_Box('guide_plate_neg', (0,cap_offset-y_shift,z_shift), (guide_x,guide_y,guide_z)))
+        top_size = self.get_guide_plate_top_dim()
+        solid_list.append(Solid_Box('guide_plate_top', (0,cap_offset,-0.5*z+1.5*guide_z), top_size))
 
+        # Led pcb, diffuser and diffuser standoffs
+        pcb_x, pcb_y, pcb_z = self.params['led_pcb_dimensions']
+        solid_list.append(Solid_Box('led_pcb', (0,0,0.5*z-0.5*pcb_z), (pcb_x,pcb_y,pcb_z)))
+        diff_x, diff_y, diff_z = self.params['diffuser_dimensions']
+        standoff_height = self.params['diffuser_standoff_height']
+        z_shift = 0.5*z - pcb_z - 0.5*diff_z - standoff_height
+        solid_list.append(Solid_Box('diffuser', (0,0,z_shift), (diff_x,diff_y,diff_z)))
+        standoff_radius = 0.5*self.params['diffuser_standoff_diam']
+        z_shift = 0.5*z - pcb_z - 0.5*standoff_height
+        for x_shift, y_shift, dummy in self.get_led_holes():
+            if x_shift < 0:
+                name = 'diffuser_standoff_neg'
+            else:
+                name = 'diffuser_standoff_pos'
+            solid_list.append(Solid_Cylinder(name, (x_shift,y_shift,z_shift), standoff_radius, standoff_height))
+
+        # Capillary clamp
+        clamp_size = self.get_capillary_clamp_size()
+        x_shift = 0.5*bottom_x - 0.5*bottom_x_overhang
+        z_shift = -0.5*z + 0.5*thickness + cap_diam
+        solid_list.append(Solid_Box('capillary_clamp', (x_shift,0,z_shift), clamp_size))
+        return solid_list
+
+    @depends_on('inner_dimensions', 'wall_thickness', 'top_x_overhang', 'top_y_overhang', 'bottom_x_overhang',
+            'bottom_y_overhang')
+    def get_panel_sizes(self):
+        """
+        Get dictionary of the (x,y) size of each box panel, in the coordinates
+        its holes are given in. Tabs are not included.
+        """
+        x,y,z = self.params['inner_dimensions']
+        thickness = self.params['wall_thickness']
+        panel_sizes = {
+                'bottom' : (x + 2*thickness + 2*self.params['bottom_x_overhang'], y + 2*thickness + 2*self.params['bottom_y_overhang']),
+                'top'    : (x + 2*thickness + 2*self.params['top_x_overhang'], y + 2*thickness + 2*self.params['top_y_overhang']),
+                'front'  : (x + 2*thickness, z),
+                'back'   : (x + 2*thickness, z),
+                'left'   : (y, z),
+                'right'  : (y, z),
+                }
+        return panel_sizes
+
+    @depends_on(parts=('make_box',))
+    def get_hole_list(self):
+        """
+        Get list of all holes cut in the box panels, including the tab slots
+        and standoff holes added by make.
+        """
+        return self.box_hole_registry.get_holes()
+
+    @depends_on('hole_list', parts=(
+            'add_sensor_cutout', 'add_capillary_holes', 'add_guide_tap_holes', 'add_led_tap_holes',
+            'add_led_cable_hole', 'get_capillary_clamp_thru_holes',
+            ))
+    def get_added_hole_list(self):
+        """
+        Get list of the holes the enclosure adds to the box panels, i.e. all
+        holes but the tab slots and standoff holes which are made with the
+        panels. Doesn't make the box.
+        """
+        return self.hole_registry.get_holes() + self.get_capillary_clamp_thru_holes()
+
+    @depends_on(parts=('make_box',))
+    def get_panel_holes(self, panel, hole_type=None):
+        """
+        Get list of the holes cut in one box panel, optionally only those of
+        the given type.
+        """
+        return self.box_hole_registry.get_holes(panel, hole_type)
+
+    @depends_on('wall_thickness', 'lid2front_tabs', 'lid2side_tabs', 'side2side_tabs', 'lid2front_tab_width',
+            'lid2side_tab_width', 'side2side_tab_width', parts=('get_panel_sizes',))
+    def get_panel_tabs(self):
+        """
+        Get dictionary of the tabs of each box panel as (edge, offset, width,
+        depth) tuples, see Plate_2D. The tab params give the tab centers as
+        fractions of the edge length and the tabs stick out by the wall
+        thickness. The top and bottom have slots instead of tabs.
+        """
+        thickness = self.params['wall_thickness']
+        panel_sizes = self.get_panel_sizes()
+
+        def edge_tabs(edge_list, length, tab_key):
+            width = self.params['{0}_tab_width'.format(tab_key)]
+            tab_list = []
+            for edge in edge_list:
+                for frac in self.params['{0}_tabs'.format(tab_key)]:
+                    tab_list.append((edge, (frac - 0.5)*length, width, thickness))
+            return tab_list
+
+        panel_tabs = {'top': [], 'bottom': []}
+        for panel in ('front', 'back'):
+            panel_x, panel_y = panel_sizes[panel]
+            panel_tabs[panel] = edge_tabs(('top', 'bottom'), panel_x, 'lid2front')
+        for panel in ('left', 'right'):
+            panel_x, panel_y = panel_sizes[panel]
+            panel_tabs[panel] = edge_tabs(('top', 'bottom'), panel_x, 'lid2side')
+            panel_tabs[panel] += edge_tabs(('left', 'right'), panel_y, 'side2side')
+        return panel_tabs
+
+    @depends_on('lid_radius', 'wall_thickness', parts=('get_panel_sizes', 'get_panel_tabs', 'get_panel_holes'))
+    def get_box_projection_2d(self,show_ref_cube=True,spacing_factor=4,show_bottom=True):
+        """
+        Get 2D outlines of the tabbed box panels, laid out around the top
+        panel, for the native dxf writer and nesting.
+        """
+        thickness = self.params['wall_thickness']
+        lid_radius = self.params['lid_radius']
+        panel_sizes = self.get_panel_sizes()
+        panel_tabs = self.get_panel_tabs()
+        spacing = spacing_factor*thickness
+
+        def make_plate(panel, radius=0.0):
+            panel_x, panel_y = panel_sizes[panel]
+            hole_list = self.get_panel_holes(panel)
+            return Plate_2D(panel_x, panel_y, hole_list, radius=radius, name=panel, tabs=panel_tabs[panel])
+
+        top = make_plate('top', lid_radius)
+        top_x, top_y = top.get_size()
+        plate_list = [top]
+        for panel, sign in (('front', -1), ('back', 1)):
+            plate = make_plate(panel)
+            plate_x, plate_y = plate.get_size()
+            y_shift = sign*(0.5*top_y + 0.5*plate_y + spacing)
+            plate_list.append(plate.translate((0,y_shift)))
+        x_shift = 0.5*top_x + spacing
+        for panel, sign in (('left', -1), ('right', 1)):
+            plate = make_plate(panel).rotate90()
+            plate_x, plate_y = plate.get_size()
+            plate_list.append(plate.translate((sign*(x_shift + 0.5*plate_x),0)))
+        x_shift += plate_x + spacing
+        if show_bottom:
+            bottom = make_plate('bottom', lid_radius)
+            bottom_x, bottom_y = bottom.get_size()
+            plate_list.append(bottom.translate((x_shift + 0.5*bottom_x,0)))
+            x_shift += bottom_x + spacing
+        if show_ref_cube:
+            plate_list.append(ref_square((x_shift + 0.5*INCH2MM,0)))
+        return plate_list
 
-    def get_box_projection(self,show_ref_cube=True, spacing_factor=4):
+    @depends_on()
+    def get_allowed_intersections(self):
+        """
+        Pairs of parts which intersect by design, through holes or cutouts.
+        """
+        return [('capillary', 'left'), ('capillary', 'right'), ('sensor', 'bottom')]
+
+
+    @depends_on('wall_thickness', parts=('make_box', 'make_capillary_clamp'))
+    def get_box_projection(self,show_ref_cube=True, spacing_factor=4, show_clamp=True):
         """
         Get 2D projected layout of parts for laser cutting.
         """
+        ensure_made(self, 'bottom')
         parts_list = super(Capillary_Enclosure,self).get_projection(show_ref_cube,spacing_factor)
 
         # Add capillary clamp
-        thickness = self.params['wall_thickness']
-        clamp_x, clamp_y, clamp_z = self.clamp_size
-        x_shift = 0.5*self.bottom_x + 0.5*clamp_x + spacing_factor*thickness
-        y_shift = 0.5*self.bottom_y + 0.5*clamp_y + spacing_factor*thickness
-        clamp = Translate(self.capillary_clamp,v=(x_shift,y_shift,0))
-        parts_list.append(Projection(clamp))
+        if show_clamp:
+            thickness = self.params['wall_thickness']
+            clamp_x, clamp_y, clamp_z = self.clamp_size
+            x_shift = 0.5*self.bottom_x + 0.5*clamp_x + spacing_factor*thickness
+            y_shift = 0.5*self.bottom_y + 0.5*clamp_y + spacing_factor*thickness
+            clamp = Translate(self.capillary_clamp,v=(x_shift,y_shift,0))
+            parts_list.append(Projection(clamp))
         return parts_list
 
 
+    @depends_on('guide_plate_dimensions', 'wall_thickness', parts=('make_guide_plates',))
     def get_guide_side_projection(self,show_ref_cube=True,spacing_factor=2):
         """
         Get 2D projected layout of the two side guide plates for laser cutting.
@@ -190,6 +438,7 @@ class Capillary_Enclosure(Basic_Enclosure):
         return parts_list
 
 
+    @depends_on('wall_thickness', parts=('get_guide_plate_top_dim', 'make_guide_plates'))
     def get_guide_top_projection(self,show_ref_cube=True,spacing_factor=2):
         """
         Get 2D projected layout of the top guide plate for laser cutting.
@@ -213,6 +462,7 @@ class Capillary_Enclosure(Basic_Enclosure):
         return parts_list
         
 
+    @depends_on('diffuser_dimensions', 'wall_thickness', parts=('make_diffuser',))
     def get_diffuser_projection(self,show_ref_cube=True,spacing_factor=2):
         """
         Get 2D projected layout of the diffuser for laser cutting.
@@ -235,6 +485,76 @@ class Capillary_Enclosure(Basic_Enclosure):
         return parts_list
 
 
+    @depends_on('guide_plate_dimensions', 'wall_thickness', parts=('get_guide_side_holes',))
+    def get_guide_side_projection_2d(self,show_ref_cube=True,spacing_factor=2):
+        """
+        Get 2D outlines of the two side guide plates for the native dxf writer.
+        """
+        guide_x, guide_y, guide_z = self.params['guide_plate_dimensions']
+        thickness = self.params['wall_thickness']
+        hole_list_pos, hole_list_neg = self.get_guide_side_holes()
+        y_shift = 0.5*guide_y + 0.5*spacing_factor*thickness
+        plate_list = [
+                Plate_2D(guide_x, guide_y, round_holes(hole_list_pos), location=(0,y_shift), name='guide_plate_pos'),
+                Plate_2D(guide_x, guide_y, round_holes(hole_list_neg), location=(0,-y_shift), name='guide_plate_neg'),
+                ]
+        if show_ref_cube:
+            x_shift = 0.5*guide_x + 0.5*INCH2MM + spacing_factor*thickness
+            plate_list.append(ref_square((x_shift,0)))
+        return plate_list
+
+    @depends_on('wall_thickness', parts=('get_guide_plate_top_dim', 'get_guide_plate_holes'))
+    def get_guide_top_projection_2d(self,show_ref_cube=True,spacing_factor=2):
+        """
+        Get 2D outline of the top guide plate for the native dxf writer.
+        """
+        top_x, top_y, top_z = self.get_guide_plate_top_dim()
+        thickness = self.params['wall_thickness']
+        hole_list = round_holes(self.get_guide_plate_holes(hole_type='through'))
+        plate_list = [Plate_2D(top_x, top_y, hole_list, name='guide_plate_top')]
+        if show_ref_cube:
+            x_shift = 0.5*top_x + 0.5*INCH2MM + spacing_factor*thickness
+            plate_list.append(ref_square((x_shift,0)))
+        return plate_list
+
+    @depends_on('diffuser_dimensions', 'wall_thickness', parts=('get_led_holes',))
+    def get_diffuser_projection_2d(self,show_ref_cube=True,spacing_factor=2):
+        """
+        Get 2D outline of the diffuser for the native dxf writer.
+        """
+        diff_x, diff_y, diff_z = self.params['diffuser_dimensions']
+        thickness = self.params['wall_thickness']
+        hole_list = round_holes(self.get_led_holes(hole_type='through'))
+        plate_list = [Plate_2D(diff_x, diff_y, hole_list, name='diffuser')]
+        if show_ref_cube:
+            x_shift = 0.5*diff_x + 0.5*INCH2MM + spacing_factor*thickness
+            plate_list.append(ref_square((x_shift,0)))
+        return plate_list
+
+    @depends_on('capillary_clamp_radius', 'wall_thickness', parts=('get_capillary_clamp_size', 'get_capillary_clamp_holes'))
+    def get_clamp_projection_2d(self,show_ref_cube=True,spacing_factor=4):
+        """
+        Get 2D outline of the capillary clamp for the native dxf writer.
+        """
+        clamp_x, clamp_y, clamp_z = self.get_capillary_clamp_size()
+        clamp_radius = self.params['capillary_clamp_radius']
+        thickness = self.params['wall_thickness']
+        hole_list = round_holes(self.get_capillary_clamp_holes())
+        plate_list = [Plate_2D(clamp_x, clamp_y, hole_list, radius=clamp_radius, name='capillary_clamp')]
+        if show_ref_cube:
+            x_shift = 0.5*clamp_x + 0.5*INCH2MM + spacing_factor*thickness
+            plate_list.append(ref_square((x_shift,0)))
+        return plate_list
+
+    def register_holes(self, hole_list):
+        """
+        Add holes to the hole list cut by the box panels and to the hole
+        registry.
+        """
+        self.params['hole_list'].extend(hole_list)
+        self.hole_registry.extend(hole_list)
+
+    @depends_on('capillary_hole_size', 'capillary_hole_offset', 'inner_dimensions')
     def add_capillary_holes(self):
         """
         Add holes for capillary positioning
@@ -248,15 +568,16 @@ class Capillary_Enclosure(Basic_Enclosure):
         for panel in panel_list:
             pos_x = hole_offset_x
             pos_y = -0.5*z 
-            hole = {
-                    'panel'    : panel,
-                    'type'     : 'rounded_square',
-                    'location' : (pos_x, pos_y),
-                    'size'     : (hole_x, hole_y, hole_r),
-                    }
+            hole = Hole(
+                    panel=panel,
+                    type='rounded_square',
+                    location=(pos_x, pos_y),
+                    size=(hole_x, hole_y, hole_r),
+                    )
             hole_list.append(hole)
-        self.params['hole_list'].extend(hole_list)
+        self.register_holes(hole_list)
 
+    @depends_on('sensor_width', 'sensor_length', 'sensor_hole_offset')
     def add_sensor_cutout(self):
         """
         Add cutout for sensor
@@ -269,15 +590,16 @@ class Capillary_Enclosure(Basic_Enclosure):
         # WBD
         #y_pos = -hole_offset;
         y_pos = 0
-        hole = {
-                    'panel'    : 'bottom', 
-                    'type'     : 'square', 
-                    'location' : (x_pos, y_pos),
-                    'size'     : (sensor_length, sensor_width),
-                    }
+        hole = Hole(
+                    panel='bottom',
+                    type='square',
+                    location=(x_pos, y_pos),
+                    size=(sensor_length, sensor_width),
+                    )
         hole_list.append(hole)
-        self.params['hole_list'].extend(hole_list)
+        self.register_holes(hole_list)
 
+    @depends_on('sensor_cable_hole_width', 'inner_dimensions')
     def add_sensor_cable_hole(self):
         """
         Add cable hole for sensor.
@@ -288,26 +610,27 @@ class Capillary_Enclosure(Basic_Enclosure):
 
         x_pos = 0
         y_pos = -0.5*z + 0.5*hole_width 
-        hole = {
-                'panel'     : 'front',
-                'type'      : 'round',
-                'location'  : (x_pos, y_pos),
-                'size'      : hole_width,
-                }
+        hole = Hole(
+                panel='front',
+                type='round',
+                location=(x_pos, y_pos),
+                size=hole_width,
+                )
         hole_list.append(hole)
 
         x_pos = 0
         y_pos = -0.5*z
-        hole = {
-                'panel'    : 'front', 
-                'type'     : 'square', 
-                'location' : (x_pos, y_pos), 
-                'size'     : (hole_width, hole_width),
-                }
+        hole = Hole(
+                panel='front',
+                type='square',
+                location=(x_pos, y_pos),
+                size=(hole_width, hole_width),
+                )
         hole_list.append(hole)
 
-        self.params['hole_list'].extend(hole_list)
+        self.register_holes(hole_list)
 
+    @depends_on('sensor_dimensions', 'sensor_hole_offset', 'sensor_mount_hole_diam', 'sensor_mount_hole_space')
     def make_sensor(self):
         sensor_x, sensor_y, sensor_z = self.params['sensor_dimensions']
         hole_offset = self.params['sensor_hole_offset']
@@ -328,6 +651,7 @@ class Capillary_Enclosure(Basic_Enclosure):
         #self.sensor = Translate(sensor,v=(0,-hole_offset,0))
         self.sensor = Translate(sensor,v=(0,0,0))
 
+    @depends_on('capillary_diam', 'capillary_length')
     def make_capillary(self):
         diameter = self.params['capillary_diam']
         length = self.params['capillary_length']
@@ -336,12 +660,30 @@ class Capillary_Enclosure(Basic_Enclosure):
         capillary = Rotate(capillary, a=90, v=(0,1,0))
         self.capillary = capillary
 
+    @depends_on('guide_plate_dimensions', parts=('get_guide_side_holes', 'get_guide_plate_top_dim', 'get_guide_plate_holes'))
     def make_guide_plates(self):
         guide_x, guide_y, guide_z = self.params['guide_plate_dimensions']
         hole_diam = self.params['guide_thru_hole_diam']
         hole_offset = self.params['guide_hole_offset']
 
         # Create pos and neg guide plates
+        hole_list_pos, hole_list_neg = self.get_guide_side_holes()
+        self.guide_plate_pos = plate_w_holes(guide_x, guide_y, guide_z, holes=hole_list_pos)
+        self.guide_plate_neg = plate_w_holes(guide_x, guide_y, guide_z, holes=hole_list_neg)
+
+        # Create top guide plate
+        top_x, top_y, top_z = self.get_guide_plate_top_dim()
+        hole_list_top = self.get_guide_plate_holes(hole_type='through')
+        self.guide_plate_top = plate_w_holes(top_x,top_y,top_z,holes=hole_list_top)
+
+    @depends_on('guide_plate_dimensions', 'guide_thru_hole_diam', 'guide_hole_offset')
+    def get_guide_side_holes(self):
+        """
+        Get (hole_list_pos, hole_list_neg) for the pos and neg side guide plates.
+        """
+        guide_x, guide_y, guide_z = self.params['guide_plate_dimensions']
+        hole_diam = self.params['guide_thru_hole_diam']
+        hole_offset = self.params['guide_hole_offset']
         hole_list_pos = []
         hole_list_neg = []
         for i in (-1,1):
@@ -351,28 +693,24 @@ class Capillary_Enclosure(Basic_Enclosure):
             hole_neg = (x_pos, -y_pos, hole_diam)
             hole_list_pos.append(hole_pos)
             hole_list_neg.append(hole_neg)
-        self.guide_plate_pos = plate_w_holes(guide_x, guide_y, guide_z, holes=hole_list_pos)
-        self.guide_plate_neg = plate_w_holes(guide_x, guide_y, guide_z, holes=hole_list_neg)
-
-        # Create top guide plate
-        top_x, top_y, top_z = self.get_guide_plate_top_dim()
-        hole_list_top = self.get_guide_plate_holes(hole_type='through')
-        self.guide_plate_top = plate_w_holes(top_x,top_y,top_z,holes=hole_list_top)
+        return hole_list_pos, hole_list_neg
 
+    @depends_on('capillary_hole_offset', parts=('get_guide_plate_holes',))
     def add_guide_tap_holes(self):
         hole_tuples = self.get_guide_plate_holes(hole_type='tap')
         hole_offset = self.params['capillary_hole_offset']
         hole_list = []
         for x,y,diam in hole_tuples:
-            hole = {
-                    'panel'    : 'bottom',
-                    'type'     : 'round',
-                    'location' : (x,y+hole_offset),
-                    'size'     : diam,
-                    }
+            hole = Hole(
+                    panel='bottom',
+                    type='round',
+                    location=(x,y+hole_offset),
+                    size=diam,
+                    )
             hole_list.append(hole)
-        self.params['hole_list'].extend(hole_list)
+        self.register_holes(hole_list)
 
+    @depends_on('guide_plate_dimensions', 'guide_hole_offset', 'guide_thru_hole_diam', 'guide_tap_hole_diam', parts=('get_guide_plate_top_dim',))
     def get_guide_plate_holes(self,hole_type='through'):
         guide_x, guide_y, guide_z = self.params['guide_plate_dimensions']
         hole_offset = self.params['guide_hole_offset']
@@ -390,6 +728,7 @@ class Capillary_Enclosure(Basic_Enclosure):
                 hole_list.append(hole)
         return hole_list
 
+    @depends_on('guide_plate_dimensions', 'capillary_diam')
     def get_guide_plate_top_dim(self):
         guide_x, guide_y, guide_z = self.params['guide_plate_dimensions']
         top_x = guide_x
@@ -397,30 +736,34 @@ class Capillary_Enclosure(Basic_Enclosure):
         top_z = guide_z
         return top_x, top_y, top_z
 
+    @depends_on('led_pcb_dimensions', parts=('get_led_holes',))
     def make_led_pcb(self):
         led_x, led_y, led_z = self.params['led_pcb_dimensions']
         hole_list = self.get_led_holes(hole_type='through')
         #print hole_list
         self.led_pcb = plate_w_holes(led_x, led_y, led_z, holes=hole_list)
 
+    @depends_on('diffuser_dimensions', parts=('get_led_holes',))
     def make_diffuser(self):
         diff_x, diff_y, diff_z = self.params['diffuser_dimensions']
         hole_list = self.get_led_holes(hole_type='through')
         self.diffuser = plate_w_holes(diff_x, diff_y, diff_z, holes=hole_list)
 
+    @depends_on(parts=('get_led_holes',))
     def add_led_tap_holes(self):
         hole_tuples = self.get_led_holes(hole_type='tap')
         hole_list = []
         for x,y,diam in hole_tuples:
-            hole = {
-                    'panel'    : 'top',
-                    'type'     : 'round',
-                    'location' : (x,y),
-                    'size'     : diam,
-                    }
+            hole = Hole(
+                    panel='top',
+                    type='round',
+                    location=(x,y),
+                    size=diam,
+                    )
             hole_list.append(hole)
-        self.params['hole_list'].extend(hole_list)
+        self.register_holes(hole_list)
 
+    @depends_on('led_pcb_dimensions', 'led_pcb_hole_offset', 'led_pcb_thru_hole_diam', 'led_pcb_tap_hole_diam')
     def get_led_holes(self, hole_type='through'):
         led_x, led_y, led_z = self.params['led_pcb_dimensions']
         hole_offset = self.params['led_pcb_hole_offset']
@@ -436,6 +779,7 @@ class Capillary_Enclosure(Basic_Enclosure):
             hole_list.append(hole)
         return hole_list
 
+    @depends_on('diffuser_standoff_height', 'diffuser_standoff_diam')
     def make_led_standoffs(self):
         height = self.params['diffuser_standoff_height']
         diam = self.params['diffuser_standoff_diam']
@@ -443,58 +787,75 @@ class Capillary_Enclosure(Basic_Enclosure):
         self.diffuser_standoff_pos = Cylinder(h=height,r1=radius,r2=radius)
         self.diffuser_standoff_neg = Cylinder(h=height,r1=radius,r2=radius)
 
+    @depends_on('led_cable_hole_size', 'led_cable_hole_pos')
     def add_led_cable_hole(self):
         hole_size_x, hole_size_y = self.params['led_cable_hole_size']
         hole_pos_x, hole_pos_y = self.params['led_cable_hole_pos']
         #print hole_pos_x, hole_pos_y
-        hole = {
-                'panel'     : 'bottom',
-                'type'      : 'square',
-                'location'  : (hole_pos_x, hole_pos_y),
-                'size'      : (hole_size_x, hole_size_y),
-                }
-        self.params['hole_list'].append(hole)
-
-    def make_capillary_clamp_thru_holes(self):
-        inner_x, inner_y, inner_z = self.params['inner_dimensions']
-        wall_thickness = self.params['wall_thickness']
+        hole = Hole(
+                panel='bottom',
+                type='square',
+                location=(hole_pos_x, hole_pos_y),
+                size=(hole_size_x, hole_size_y),
+                )
+        self.register_holes([hole])
+
+    @depends_on('bottom_x_overhang', 'capillary_clamp_thru_hole_diam', 'capillary_clamp_hole_offset',
+            parts=('get_panel_sizes',))
+    def get_capillary_clamp_thru_holes(self):
+        """
+        Get list of the holes in the bottom panel for the capillary clamp
+        screws.
+        """
+        bottom_x, bottom_y = self.get_panel_sizes()['bottom']
         bottom_x_overhang = self.params['bottom_x_overhang']
         hole_diam = self.params['capillary_clamp_thru_hole_diam']
         hole_offset = self.params['capillary_clamp_hole_offset']
 
         hole_list = []
         for i in (-1,1):
-            x_pos = i*(0.5*self.bottom_x - 0.5*bottom_x_overhang)
+            x_pos = i*(0.5*bottom_x - 0.5*bottom_x_overhang)
             y_pos = hole_offset 
-            hole = {
-                    'panel'    : 'bottom',
-                    'type'     : 'round',
-                    'location' : (x_pos, y_pos),
-                    'size'     : hole_diam,
-                    }
+            hole = Hole(
+                    panel='bottom',
+                    type='round',
+                    location=(x_pos, y_pos),
+                    size=hole_diam,
+                    )
             hole_list.append(hole)
+        return hole_list
 
-        self.params['hole_list'].extend(hole_list)
+    @depends_on(parts=('get_capillary_clamp_thru_holes',))
+    def make_capillary_clamp_thru_holes(self):
+        hole_list = self.get_capillary_clamp_thru_holes()
+        self.clamp_hole_list = hole_list
         self.add_holes(hole_list)
 
+    @depends_on('capillary_clamp_radius', parts=('get_capillary_clamp_size', 'get_capillary_clamp_holes'))
     def make_capillary_clamp(self):
+        clamp_radius = self.params['capillary_clamp_radius']
+        clamp_x, clamp_y, clamp_z = self.get_capillary_clamp_size()
+        self.clamp_size = clamp_x, clamp_y, clamp_z
+        hole_list = self.get_capillary_clamp_holes()
+        clamp = plate_w_holes(clamp_x,clamp_y,clamp_z,hole_list,radius=clamp_radius)
+        self.capillary_clamp = clamp
+
+    @depends_on('bottom_x_overhang', 'wall_thickness', 'capillary_clamp_length', 'capillary_clamp_tolerance')
+    def get_capillary_clamp_size(self):
         bottom_x_overhang = self.params['bottom_x_overhang']
         wall_thickness = self.params['wall_thickness']
         clamp_length = self.params['capillary_clamp_length']
         clamp_tolerance = self.params['capillary_clamp_tolerance']
-        clamp_radius = self.params['capillary_clamp_radius']
-        hole_offset = self.params['capillary_clamp_hole_offset']
-        hole_diam = self.params['capillary_clamp_tap_hole_diam']
-
         clamp_x = bottom_x_overhang - 2*clamp_tolerance
         clamp_y = clamp_length
         clamp_z = wall_thickness 
-        self.clamp_size = clamp_x, clamp_y, clamp_z
-
-        hole_list = [(0,hole_offset,hole_diam)]
+        return clamp_x, clamp_y, clamp_z
 
-        clamp = plate_w_holes(clamp_x,clamp_y,clamp_z,hole_list,radius=clamp_radius)
-        self.capillary_clamp = clamp
+    @depends_on('capillary_clamp_hole_offset', 'capillary_clamp_tap_hole_diam')
+    def get_capillary_clamp_holes(self):
+        hole_offset = self.params['capillary_clamp_hole_offset']
+        hole_diam = self.params['capillary_clamp_tap_hole_diam']
+        return [(0,hole_offset,hole_diam)]
 
 
 
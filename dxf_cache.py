@@ -0,0 +1,107 @@
+"""
+Content addressed cache for dxf files created by openscad. The cache key is a
+hash of the scad program text, the $fn setting and the openscad version so a
+cached dxf is only reused when openscad would produce the same output.
+"""
+import os
+import os.path
+import shutil
+import hashlib
+import subprocess
+
+DEFAULT_CACHE_DIR = '.dxf_cache'
+DEFAULT_MAX_SIZE = 200*2**20
+
+
+class DXF_Cache(object):
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size=DEFAULT_MAX_SIZE, openscad='openscad'):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.openscad = openscad
+        self.__openscad_version = None
+
+    def get_openscad_version(self):
+        """
+        Get openscad version string. Older versions of openscad print this to
+        stderr so both streams are used.
+        """
+        if self.__openscad_version is None:
+            try:
+                proc = subprocess.Popen(
+                        [self.openscad, '--version'],
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                        )
+                stdout, stderr = proc.communicate()
+                version = (stdout + stderr).strip()
+            except OSError:
+                version = ''
+            self.__openscad_version = version
+        return self.__openscad_version
+
+    def get_key(self, scad_name, fn=None):
+        """
+        Get cache key for the given scad file.
+        """
+        with open(scad_name,'r') as f:
+            scad_text = f.read()
+        key_hash = hashlib.sha1()
+        key_hash.update(self.get_openscad_version())
+        key_hash.update('\0{0}\0'.format(fn))
+        key_hash.update(scad_text)
+        return key_hash.hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.cache_dir, '{0}.dxf'.format(key))
+
+    def fetch(self, key, dxf_name):
+        """
+        Copy cached dxf to dxf_name. Returns True on a cache hit and False
+        otherwise.
+        """
+        path = self.get_path(key)
+        if not os.path.isfile(path):
+            return False
+        shutil.copyfile(path, dxf_name)
+        os.utime(path, None) # Mark entry as recently used for eviction
+        return True
+
+    def store(self, key, dxf_name):
+        """
+        Add dxf file to the cache and evict old entries if the cache is over
+        its size limit.
+        """
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        path = self.get_path(key)
+        tmp_path = '{0}.tmp{1}'.format(path, os.getpid())
+        shutil.copyfile(dxf_name, tmp_path)
+        os.rename(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """
+        Remove least recently used entries until the total size of the cache
+        is at most max_size bytes.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        entry_list = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.dxf'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            stat = os.stat(path)
+            entry_list.append((stat.st_mtime, stat.st_size, path))
+        entry_list.sort()
+        total_size = sum(size for mtime, size, path in entry_list)
+        for mtime, size, path in entry_list:
+            if total_size <= self.max_size:
+                break
+            os.remove(path)
+            total_size -= size
+
+    def clear(self):
+        if os.path.isdir(self.cache_dir):
+            shutil.rmtree(self.cache_dir)
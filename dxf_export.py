@@ -0,0 +1,133 @@
+"""
+Conversion of projection scad files to dxf files using openscad. The
+conversions are independent of each other so they are run in a bounded pool
+of worker processes. Files whose dxf is found in the (optional) DXF_Cache are
+not passed to openscad.
+"""
+import os.path
+import subprocess
+import multiprocessing
+import time
+
+
+def get_dxf_name(scad_name):
+    """
+    Get name of dxf file created from the given scad file.
+    """
+    base_name, ext = os.path.splitext(scad_name)
+    return '{0}.dxf'.format(base_name)
+
+
+def convert_to_dxf(scad_name, openscad='openscad'):
+    """
+    Convert a single scad file to dxf. Returns a dictionary with the file names,
+    the exit status of openscad, its stderr output and the wall time in seconds.
+    """
+    dxf_name = get_dxf_name(scad_name)
+    t_start = time.time()
+    try:
+        proc = subprocess.Popen(
+                [openscad, '-x', dxf_name, scad_name],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                )
+        stdout, stderr = proc.communicate()
+        returncode = proc.returncode
+    except OSError, err:
+        stderr = str(err)
+        returncode = -1
+    result = {
+            'scad'       : scad_name,
+            'dxf'        : dxf_name,
+            'returncode' : returncode,
+            'stderr'     : stderr,
+            'time'       : time.time() - t_start,
+            'cached'     : False,
+            }
+    return result
+
+
+def _convert_worker(args):
+    return convert_to_dxf(*args)
+
+
+def export_dxf(scad_files, num_workers=None, openscad='openscad', verbose=True, cache=None, fn=None):
+    """
+    Convert scad files to dxf files using a pool of at most num_workers processes
+    (defaults to the number of cpus). If a DXF_Cache is given, files whose key
+    (scad text, fn and openscad version) is in the cache are copied from it
+    instead of being converted. Raises a RuntimeError listing the failed files
+    if any conversion fails.
+    """
+    if not scad_files:
+        return []
+    t_start = time.time()
+    results = []
+
+    # Get cached dxf files
+    key_dict = {}
+    convert_files = []
+    for scad_name in scad_files:
+        if cache is not None:
+            key = cache.get_key(scad_name, fn=fn)
+            dxf_name = get_dxf_name(scad_name)
+            if cache.fetch(key, dxf_name):
+                result = {
+                        'scad'       : scad_name,
+                        'dxf'        : dxf_name,
+                        'returncode' : 0,
+                        'stderr'     : '',
+                        'time'       : 0.0,
+                        'cached'     : True,
+                        }
+                if verbose:
+                    print '{0} -> {1}  (cached)'.format(scad_name, dxf_name)
+                results.append(result)
+                continue
+            key_dict[scad_name] = key
+        convert_files.append(scad_name)
+
+    if convert_files:
+        if num_workers is None:
+            num_workers = multiprocessing.cpu_count()
+        num_workers = max(1, min(num_workers, len(convert_files)))
+        pool = multiprocessing.Pool(num_workers)
+        try:
+            work_list = [(scad_name, openscad) for scad_name in convert_files]
+            for result in pool.imap_unordered(_convert_worker, work_list):
+                if verbose:
+                    print '{0} -> {1}  ({2:1.2f}s, exit {3})'.format(
+                            result['scad'],
+                            result['dxf'],
+                            result['time'],
+                            result['returncode'],
+                            )
+                if cache is not None and result['returncode'] == 0:
+                    cache.store(key_dict[result['scad']], result['dxf'])
+                results.append(result)
+        finally:
+            pool.close()
+            pool.join()
+
+    # Return results in the same order as the input files
+    order = dict((scad_name, i) for i, scad_name in enumerate(scad_files))
+    results.sort(key=lambda result: order[result['scad']])
+    if verbose:
+        print 'dxf export: {0} files ({1} cached) in {2:1.2f}s'.format(
+                len(results),
+                len(results) - len(convert_files),
+                time.time() - t_start,
+                )
+
+    failed = [result for result in results if result['returncode'] != 0]
+    if failed:
+        msg_list = ['dxf export failed for {0} file(s)'.format(len(failed))]
+        for result in failed:
+            msg = '  {0} (exit {1}): {2}'.format(
+                    result['scad'],
+                    result['returncode'],
+                    result['stderr'].strip(),
+                    )
+            msg_list.append(msg)
+        raise RuntimeError, '\n'.join(msg_list)
+    return results
@@ -0,0 +1,177 @@
+"""
+Minimal dxf writer for 2D laser cutting layouts. Plate outlines and holes are
+written as exact CIRCLE and ARC entities rather than the faceted LINE
+segments produced by openscad's projection. Like openscad's output the file
+only has an ENTITIES section, so only R12 entities (LINE, CIRCLE and ARC) are
+used; polylines are written as LINE entities. For software which can't handle
+curves a chord tolerance can be given, in which case circles and arcs are
+faceted with just enough segments to stay within that tolerance.
+"""
+import math
+
+
+class DXF_Writer(object):
+
+    def __init__(self, layer='0', chord_tol=None):
+        """
+        If chord_tol is given circles and rounded corners are faceted, such
+        that no point of the polygon is further than chord_tol from the true
+        curve, instead of being written as CIRCLE and ARC entities.
+        """
+        self.layer = layer
+        self.chord_tol = chord_tol
+        self.entity_list = []
+
+    def __str__(self):
+        line_list = ['0', 'SECTION', '2', 'ENTITIES']
+        for entity in self.entity_list:
+            line_list.extend(entity)
+        line_list.extend(['0', 'ENDSEC', '0', 'EOF'])
+        return '\n'.join(line_list) + '\n'
+
+    def write(self, filename):
+        with open(filename,'w') as f:
+            f.write(str(self))
+
+    def add_line(self, p0, p1):
+        entity = ['0', 'LINE', '8', self.layer]
+        entity.extend(['10', fmt(p0[0]), '20', fmt(p0[1]), '30', fmt(0.0)])
+        entity.extend(['11', fmt(p1[0]), '21', fmt(p1[1]), '31', fmt(0.0)])
+        self.entity_list.append(entity)
+
+    def add_circle(self, center, radius):
+        if self.chord_tol is not None:
+            self.add_polyline(get_arc_points(center, radius, 0.0, 360.0, self.chord_tol)[:-1])
+            return
+        entity = ['0', 'CIRCLE', '8', self.layer]
+        entity.extend(['10', fmt(center[0]), '20', fmt(center[1]), '30', fmt(0.0)])
+        entity.extend(['40', fmt(radius)])
+        self.entity_list.append(entity)
+
+    def add_arc(self, center, radius, start_angle, end_angle):
+        """
+        Add arc running counter clockwise from start_angle to end_angle
+        (degrees).
+        """
+        entity = ['0', 'ARC', '8', self.layer]
+        entity.extend(['10', fmt(center[0]), '20', fmt(center[1]), '30', fmt(0.0)])
+        entity.extend(['40', fmt(radius), '50', fmt(start_angle), '51', fmt(end_angle)])
+        self.entity_list.append(entity)
+
+    def add_polyline(self, point_list, closed=True):
+        """
+        Add polyline as LINE entities, in order from the first point.
+        """
+        if closed:
+            point_list = list(point_list) + [point_list[0]]
+        for p0, p1 in zip(point_list[:-1], point_list[1:]):
+            self.add_line(p0, p1)
+
+    def add_rect(self, center, size, radius=0.0):
+        """
+        Add rectangle, with corners rounded to the given radius, centered at
+        center.
+        """
+        cx, cy = center
+        sx, sy = size
+        x0, x1 = cx - 0.5*sx, cx + 0.5*sx
+        y0, y1 = cy - 0.5*sy, cy + 0.5*sy
+        radius = min(radius, 0.5*sx, 0.5*sy)
+        if radius <= 0:
+            self.add_polyline([(x0,y0), (x1,y0), (x1,y1), (x0,y1)])
+            return
+
+        r = radius
+        if self.chord_tol is not None:
+            corner_list = [
+                    ((x1-r, y0+r), 270.0),
+                    ((x1-r, y1-r), 0.0),
+                    ((x0+r, y1-r), 90.0),
+                    ((x0+r, y0+r), 180.0),
+                    ]
+            point_list = []
+            for corner, start_angle in corner_list:
+                point_list.extend(get_arc_points(corner, r, start_angle, start_angle + 90.0, self.chord_tol))
+            self.add_polyline(point_list)
+        else:
+            # Edges and corners in order around the rectangle
+            self.add_line((x0+r, y0), (x1-r, y0))
+            self.add_arc((x1-r, y0+r), r, 270.0, 360.0)
+            self.add_line((x1, y0+r), (x1, y1-r))
+            self.add_arc((x1-r, y1-r), r, 0.0, 90.0)
+            self.add_line((x1-r, y1), (x0+r, y1))
+            self.add_arc((x0+r, y1-r), r, 90.0, 180.0)
+            self.add_line((x0, y1-r), (x0, y0+r))
+            self.add_arc((x0+r, y0+r), r, 180.0, 270.0)
+
+    def add_hole(self, hole, offset=(0.0,0.0)):
+        """
+        Add hole given as hole dictionary.
+        """
+        x, y = hole['location']
+        center = x + offset[0], y + offset[1]
+        if hole['type'] == 'round':
+            self.add_circle(center, 0.5*hole['size'])
+        elif hole['type'] == 'square':
+            self.add_rect(center, hole['size'])
+        elif hole['type'] == 'rounded_square':
+            sx, sy, radius = hole['size']
+            self.add_rect(center, (sx,sy), radius)
+        else:
+            raise ValueError, 'unknown hole type {0}'.format(hole['type'])
+
+    def add_plate(self, plate):
+        """
+        Add Plate_2D outline and holes. The outline of a tabbed plate is
+        written with square corners.
+        """
+        if plate.tabs:
+            self.add_polyline(plate.get_outline())
+        else:
+            self.add_rect(plate.location, (plate.x, plate.y), plate.radius)
+        for hole in plate.holes:
+            self.add_hole(hole, offset=plate.location)
+
+
+def fmt(value):
+    return '{0:1.6f}'.format(value)
+
+
+def get_segment_count(radius, angle, chord_tol, min_segments=1):
+    """
+    Get number of segments needed to approximate an arc of the given radius
+    and angle (degrees) such that the sagitta of each segment is at most
+    chord_tol.
+    """
+    if chord_tol <= 0:
+        raise ValueError, 'chord_tol must be > 0'
+    if chord_tol >= radius:
+        return max(min_segments, int(math.ceil(angle/120.0)))
+    max_angle = 2.0*math.acos(1.0 - chord_tol/float(radius))
+    num = int(math.ceil(math.radians(angle)/max_angle))
+    return max(min_segments, num)
+
+
+def get_arc_points(center, radius, start_angle, end_angle, chord_tol):
+    """
+    Get list of points, including both end points, on the arc running
+    counter clockwise from start_angle to end_angle (degrees).
+    """
+    cx, cy = center
+    num = get_segment_count(radius, end_angle - start_angle, chord_tol)
+    point_list = []
+    for i in range(num+1):
+        angle = math.radians(start_angle + (end_angle - start_angle)*i/float(num))
+        point_list.append((cx + radius*math.cos(angle), cy + radius*math.sin(angle)))
+    return point_list
+
+
+def write_dxf(filename, plate_list, **kwargs):
+    """
+    Write list of Plate_2D objects to a dxf file.
+    """
+    writer = DXF_Writer(**kwargs)
+    for plate in plate_list:
+        writer.add_plate(plate)
+    writer.write(filename)
+    return writer
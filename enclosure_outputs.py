@@ -0,0 +1,132 @@
+"""
+Writing of the output files of an enclosure. An output list gives, for each
+output file, the enclosure method which creates its parts and the keyword
+arguments to call it with. Files ending in .scad are streamed with write_scad
+and files ending in .dxf with the native dxf writer.
+"""
+import os.path
+import sys
+import imp
+from py2scad import *
+from dxf_export import get_dxf_name
+from dxf_writer import write_dxf
+from scad_writer import write_scad
+from param_deps import Build_State, DEFAULT_STATE_FILE, get_code_digest, get_method_digest
+
+# Modules whose source is part of the code digest. The make scripts are left
+# out: they hold the params, whose values are digested per output, and the
+# output options, which are part of each output's digest, so that editing a
+# param only rebuilds the outputs which depend on it.
+CODE_MODULE_NAMES = (
+        'capillary_enclosure',
+        'arrayed_enclosure',
+        'param_deps',
+        'plate_2d',
+        'hole',
+        'dxf_writer',
+        'hole_array',
+        'scad_module',
+        'transforms',
+        'scad_writer',
+        'lazy_part',
+        'enclosure_outputs',
+        )
+
+# Modules imported on first use by the given module, hashed from their source
+# file if they haven't been imported yet
+LAZY_CODE_MODULES = {
+        'capillary_enclosure' : ('transforms',),
+        'arrayed_enclosure'   : ('hole_array',),
+        }
+
+
+def get_projection_files(output_list, output_dir='.'):
+    """
+    Get the projection scad files in the output list which need to be
+    converted to dxf by openscad, i.e. those without a native dxf output.
+    """
+    name_list = [filename for filename, method_name, kwargs in output_list]
+    scad_projection_files = []
+    for filename, method_name, kwargs in output_list:
+        if not filename.endswith('.scad') or method_name == 'get_assembly':
+            continue
+        if get_dxf_name(filename) in name_list:
+            continue
+        scad_projection_files.append(os.path.join(output_dir,filename))
+    return scad_projection_files
+
+
+def write_outputs(enclosure, output_list, output_dir='.', fn=50, chord_tol=None, verbose=True, output_names=None):
+    """
+    Write the files in output_list, or only those in output_names if given.
+    Returns the list of projection scad files written which still need to be
+    converted to dxf by openscad.
+    """
+    for filename, method_name, kwargs in output_list:
+        if output_names is not None and filename not in output_names:
+            continue
+        parts = getattr(enclosure, method_name)(**kwargs)
+        path = os.path.join(output_dir,filename)
+        if filename.endswith('.dxf'):
+            if verbose:
+                print '{0} (native)'.format(path)
+            write_dxf(path, parts, chord_tol=chord_tol)
+        else:
+            write_scad(path, parts, fn=fn)
+
+    scad_projection_files = []
+    for path in get_projection_files(output_list, output_dir):
+        if output_names is None or os.path.basename(path) in output_names:
+            scad_projection_files.append(path)
+    return scad_projection_files
+
+
+def get_build_state(output_dir='.'):
+    """
+    Get the Build_State of output_dir for incremental builds, tied to the
+    source code of the loaded enclosure modules.
+    """
+    lazy_names = set()
+    for name, lazy_list in LAZY_CODE_MODULES.iteritems():
+        if name in sys.modules:
+            lazy_names.update(lazy_list)
+    module_list = []
+    for name in CODE_MODULE_NAMES:
+        module = sys.modules.get(name)
+        if module is not None and hasattr(module, '__file__'):
+            module_list.append(module)
+        elif module is None and name in lazy_names:
+            module_list.append(imp.find_module(name)[1])
+    filename = os.path.join(output_dir,DEFAULT_STATE_FILE)
+    return Build_State(filename, code_digest=get_code_digest(module_list))
+
+
+def get_output_digests(enclosure, output_list, fn=50, chord_tol=None):
+    """
+    Get digest of the inputs of each output file.
+    """
+    digest_dict = {}
+    for filename, method_name, kwargs in output_list:
+        if filename.endswith('.dxf'):
+            extra = repr((sorted(kwargs.items()), chord_tol))
+        else:
+            extra = repr((sorted(kwargs.items()), fn))
+        digest_dict[filename] = get_method_digest(enclosure, method_name, extra)
+    return digest_dict
+
+
+def get_stale_outputs(state, digest_dict, output_list, output_dir='.', create_dxf=False):
+    """
+    Get the names of the output files whose inputs changed since the last
+    build, or which are missing.
+    """
+    projection_files = get_projection_files(output_list, output_dir)
+    stale_names = []
+    for filename, method_name, kwargs in output_list:
+        path = os.path.join(output_dir,filename)
+        file_list = [path]
+        if create_dxf and path in projection_files:
+            file_list.append(get_dxf_name(path))
+        if state.is_stale(filename, digest_dict[filename], file_list):
+            stale_names.append(filename)
+    return stale_names
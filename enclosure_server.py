@@ -0,0 +1,382 @@
+"""
+Long running enclosure generator. Starting python and importing py2scad and
+numpy takes longer than building an enclosure, so the server imports
+them once and keeps a pool of worker processes, forked after the imports,
+which build the enclosures. Requests are queued in the pool until a worker is
+free.
+
+The server speaks http on a tcp port or on a unix socket. A variant is
+requested by posting a json request to /generate, e.g.
+
+    {
+        "enclosure"  : "arrayed",
+        "params"     : {"capillary_diam": 1.0, "number_of_sensors": 10},
+        "outputs"    : ["arrayed_assembly.scad", "clamp_projection.dxf"],
+        "native_dxf" : true
+    }
+
+The params are applied on top of the params of make_enclosure.py ("single")
+or make_arrayed_enclosure.py ("arrayed") as in make_sweep.py. If outputs is
+not given all files of the output list are returned. Unless "create_dxf" is
+false, the requested projection scad files without a native dxf output are
+converted to dxf by openscad and their dxf files are returned as well. The
+response is a json object with the contents of the files by name. GET /status
+returns the number of workers, of queued requests, of requests served, failed
+and timed out, and of timed out requests still running in a worker.
+
+    python enclosure_server.py serve --port 8765
+    python enclosure_server.py request --port 8765 --params '{"capillary_diam": 1.0}'
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import httplib
+import tempfile
+import argparse
+import threading
+import traceback
+import SocketServer
+import BaseHTTPServer
+import multiprocessing
+from make_sweep import ENCLOSURE_TYPES, get_variant_params
+from dxf_export import convert_to_dxf
+
+# Loaded on first use by the arrayed enclosure, imported here so that the
+# forked workers start with them
+import numpy
+import hole_array
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_TIMEOUT = 60.0
+MAX_REQUEST_SIZE = 2**20
+
+
+def check_request(request):
+    """
+    Check a generate request and fill in the defaults. Raises ValueError if
+    the request is invalid.
+    """
+    if not isinstance(request, dict):
+        raise ValueError, 'request must be a json object'
+    request = dict(request)
+    request.setdefault('enclosure', 'single')
+    request.setdefault('params', {})
+    request.setdefault('native_dxf', False)
+    request.setdefault('chord_tol', None)
+    request.setdefault('create_dxf', True)
+    if request['enclosure'] not in ENCLOSURE_TYPES:
+        raise ValueError, 'unknown enclosure type {0}'.format(request['enclosure'])
+    if not isinstance(request['params'], dict):
+        raise ValueError, 'params must be a json object'
+    enclosure_class, make_module = ENCLOSURE_TYPES[request['enclosure']]
+    name_list = [filename for filename, method_name, kwargs in make_module.get_output_list(request['native_dxf'])]
+    if request.get('outputs') is None:
+        request['outputs'] = name_list
+    for filename in request['outputs']:
+        if filename not in name_list:
+            raise ValueError, 'unknown output {0}'.format(filename)
+    return request
+
+
+def generate(request, openscad='openscad'):
+    """
+    Build the enclosure of a checked request and return its output files,
+    and the dxf files of its projections converted by openscad. Runs in the
+    worker processes.
+    """
+    t_start = time.time()
+    response = {'files': {}, 'error': None}
+    output_dir = tempfile.mkdtemp(prefix='enclosure_')
+    try:
+        enclosure_class, make_module = ENCLOSURE_TYPES[request['enclosure']]
+        params = get_variant_params(make_module.params, request['params'])
+        enclosure = enclosure_class(params)
+        scad_projection_files = make_module.write_files(
+                enclosure,
+                output_dir=output_dir,
+                native_dxf=request['native_dxf'],
+                chord_tol=request['chord_tol'],
+                verbose=False,
+                output_names=request['outputs'],
+                )
+        name_list = list(request['outputs'])
+        if request['create_dxf']:
+            for scad_name in scad_projection_files:
+                result = convert_to_dxf(scad_name, openscad=openscad)
+                if result['returncode'] != 0:
+                    raise RuntimeError, 'dxf export failed for {0}: {1}'.format(scad_name, result['stderr'].strip())
+                name_list.append(os.path.basename(result['dxf']))
+        for filename in name_list:
+            with open(os.path.join(output_dir, filename),'r') as f:
+                response['files'][filename] = f.read()
+    except Exception:
+        response['error'] = traceback.format_exc()
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    response['time'] = time.time() - t_start
+    return response
+
+
+class Request_Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def address_string(self):
+        # Unix socket clients have no address
+        if isinstance(self.client_address, tuple):
+            return self.client_address[0]
+        return 'local'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            sys.stderr.write('{0} - - [{1}] {2}\n'.format(self.address_string(), self.log_date_time_string(), format % args))
+
+    def send_json(self, code, value):
+        data = json.dumps(value)
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/status':
+            self.send_json(200, self.server.get_status())
+        else:
+            self.send_json(404, {'error': 'unknown path {0}'.format(self.path)})
+
+    def do_POST(self):
+        if self.path != '/generate':
+            self.send_json(404, {'error': 'unknown path {0}'.format(self.path)})
+            return
+        try:
+            length = int(self.headers.getheader('Content-Length', 0))
+            if length > MAX_REQUEST_SIZE:
+                raise ValueError, 'request too large'
+            request = check_request(json.loads(self.rfile.read(length)))
+        except ValueError, e:
+            self.send_json(400, {'error': str(e)})
+            return
+        try:
+            response = self.server.generate(request)
+        except multiprocessing.TimeoutError:
+            self.send_json(503, {'error': 'timed out waiting for a worker'})
+            return
+        if response['error'] is not None:
+            self.send_json(500, response)
+        else:
+            self.send_json(200, response)
+
+
+class Server_Mixin(SocketServer.ThreadingMixIn):
+    """
+    Each connection is handled in its own thread which waits for the result
+    from the worker pool.
+    """
+
+    daemon_threads = True
+
+    def setup_pool(self, num_workers=None, timeout=DEFAULT_TIMEOUT, verbose=True, openscad='openscad'):
+        if num_workers is None:
+            num_workers = multiprocessing.cpu_count()
+        self.num_workers = num_workers
+        self.timeout = timeout
+        self.verbose = verbose
+        self.openscad = openscad
+        self.pool = multiprocessing.Pool(num_workers)
+        self.lock = threading.Lock()
+        self.num_queued = 0
+        self.num_served = 0
+        self.num_failed = 0
+        self.num_timed_out = 0
+        self.timed_out_results = []
+
+    def generate(self, request):
+        """
+        Build the request in the pool. A request which times out can't be
+        cancelled and keeps its worker busy until it is done.
+        """
+        with self.lock:
+            self.num_queued += 1
+        result = self.pool.apply_async(generate, (request, self.openscad))
+        try:
+            response = result.get(self.timeout)
+        except multiprocessing.TimeoutError:
+            with self.lock:
+                self.num_queued -= 1
+                self.num_timed_out += 1
+                self.timed_out_results.append(result)
+            raise
+        except Exception:
+            with self.lock:
+                self.num_queued -= 1
+                self.num_failed += 1
+            raise
+        with self.lock:
+            self.num_queued -= 1
+            if response['error'] is None:
+                self.num_served += 1
+            else:
+                self.num_failed += 1
+        return response
+
+    def get_status(self):
+        with self.lock:
+            self.timed_out_results = [result for result in self.timed_out_results if not result.ready()]
+            status = {
+                    'workers'   : self.num_workers,
+                    'queued'    : self.num_queued,
+                    'served'    : self.num_served,
+                    'failed'    : self.num_failed,
+                    'timed_out' : self.num_timed_out,
+                    'abandoned' : len(self.timed_out_results),
+                    }
+        return status
+
+    def close_pool(self):
+        self.pool.terminate()
+        self.pool.join()
+
+
+class HTTP_Server(Server_Mixin, BaseHTTPServer.HTTPServer):
+    pass
+
+
+class Unix_HTTP_Server(Server_Mixin, SocketServer.UnixStreamServer):
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        SocketServer.UnixStreamServer.server_bind(self)
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+
+class Unix_HTTP_Connection(httplib.HTTPConnection):
+
+    def __init__(self, path, timeout=DEFAULT_TIMEOUT):
+        httplib.HTTPConnection.__init__(self, 'localhost', timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, num_workers=None,
+        timeout=DEFAULT_TIMEOUT, verbose=True, openscad='openscad'):
+    """
+    Create a server on the tcp port, or on the unix socket if socket_path is
+    given, with its worker pool converting projections with the given
+    openscad executable.
+    """
+    if socket_path is not None:
+        server = Unix_HTTP_Server(socket_path, Request_Handler)
+    else:
+        server = HTTP_Server((host, port), Request_Handler)
+    server.setup_pool(num_workers, timeout, verbose, openscad)
+    return server
+
+
+class Client(object):
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, timeout=DEFAULT_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def get_connection(self):
+        if self.socket_path is not None:
+            return Unix_HTTP_Connection(self.socket_path, self.timeout)
+        return httplib.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def send(self, method, path, body=None):
+        conn = self.get_connection()
+        try:
+            headers = {}
+            if body is not None:
+                body = json.dumps(body)
+                headers['Content-Type'] = 'application/json'
+            conn.request(method, path, body, headers)
+            resp = conn.getresponse()
+            value = json.loads(resp.read())
+        finally:
+            conn.close()
+        if resp.status != 200:
+            raise RuntimeError, 'server error {0}: {1}'.format(resp.status, value.get('error'))
+        return value
+
+    def get_status(self):
+        return self.send('GET', '/status')
+
+    def generate(self, enclosure='single', params=None, outputs=None, native_dxf=False, chord_tol=None, create_dxf=True):
+        """
+        Request a variant, returns dictionary of the file contents by name.
+        """
+        request = {
+                'enclosure'  : enclosure,
+                'params'     : params or {},
+                'outputs'    : outputs,
+                'native_dxf' : native_dxf,
+                'chord_tol'  : chord_tol,
+                'create_dxf' : create_dxf,
+                }
+        return self.send('POST', '/generate', request)['files']
+
+# -----------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='enclosure generator server and client')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='server host')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='server port')
+    parser.add_argument('--socket', default=None, help='use this unix socket instead of a tcp port')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='request timeout (s)')
+    subparsers = parser.add_subparsers(dest='command')
+
+    serve_parser = subparsers.add_parser('serve', help='run the server')
+    serve_parser.add_argument('-n', '--num-workers', type=int, default=None, help='number of worker processes')
+    serve_parser.add_argument('-q', '--quiet', action='store_true', help='do not log requests')
+    serve_parser.add_argument('--openscad', default='openscad', help='openscad executable used to create the dxf files')
+
+    request_parser = subparsers.add_parser('request', help='request a variant from a running server')
+    request_parser.add_argument('--enclosure', choices=sorted(ENCLOSURE_TYPES), default='single', help='enclosure type')
+    request_parser.add_argument('--params', type=json.loads, default={}, help='param overrides as json')
+    request_parser.add_argument('--output', action='append', dest='outputs', default=None, help='output file to request, may be repeated')
+    request_parser.add_argument('--native-dxf', action='store_true', help='write the dxf files of the flat parts directly')
+    request_parser.add_argument('--no-dxf', action='store_true', help='do not convert the projections to dxf with openscad')
+    request_parser.add_argument('--output-dir', default='.', help='directory for the returned files')
+
+    subparsers.add_parser('status', help='print the status of a running server')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        server = make_server(args.host, args.port, args.socket, args.num_workers, args.timeout, not args.quiet, args.openscad)
+        if args.socket is not None:
+            print 'serving on {0}'.format(args.socket)
+        else:
+            print 'serving on {0}:{1}'.format(args.host, args.port)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            server.close_pool()
+    else:
+        client = Client(args.host, args.port, args.socket, args.timeout)
+        if args.command == 'status':
+            print json.dumps(client.get_status(), indent=4, sort_keys=True)
+        else:
+            t_start = time.time()
+            files = client.generate(args.enclosure, args.params, args.outputs, args.native_dxf, create_dxf=not args.no_dxf)
+            if not os.path.isdir(args.output_dir):
+                os.makedirs(args.output_dir)
+            for filename in sorted(files):
+                with open(os.path.join(args.output_dir, filename),'w') as f:
+                    f.write(files[filename])
+                print os.path.join(args.output_dir, filename)
+            print '{0:1.3f}s'.format(time.time() - t_start)
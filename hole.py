@@ -0,0 +1,149 @@
+"""
+Compact hole records. A Hole stores the panel, type, location and size of a
+hole in slots instead of a dictionary, which makes the large hole lists of
+arrayed enclosures smaller and faster to create. Holes can still be read,
+written and copied like the hole dictionaries used by py2scad, i.e.
+hole['panel'] and dict(hole) work, so both kinds can be mixed in a list.
+
+A Hole_Registry indexes a hole list by panel and hole type.
+"""
+
+HOLE_KEYS = ('panel', 'type', 'location', 'size')
+
+
+class Hole(object):
+
+    __slots__ = HOLE_KEYS
+
+    # Holes are mutable like the dictionaries they replace
+    __hash__ = None
+
+    def __init__(self, panel, type, location, size):
+        self.panel = panel
+        self.type = type
+        self.location = location
+        self.size = size
+
+    def __repr__(self):
+        return 'Hole(panel={0!r}, type={1!r}, location={2!r}, size={3!r})'.format(
+                self.panel,
+                self.type,
+                self.location,
+                self.size,
+                )
+
+    def __getitem__(self, key):
+        if key not in HOLE_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in HOLE_KEYS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in HOLE_KEYS
+
+    def __iter__(self):
+        return iter(HOLE_KEYS)
+
+    def __len__(self):
+        return len(HOLE_KEYS)
+
+    def __eq__(self, other):
+        try:
+            return all(self[key] == other[key] for key in HOLE_KEYS)
+        except (KeyError, TypeError):
+            return False
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __getstate__(self):
+        return tuple(getattr(self, key) for key in HOLE_KEYS)
+
+    def __setstate__(self, state):
+        for key, value in zip(HOLE_KEYS, state):
+            setattr(self, key, value)
+
+    def keys(self):
+        return list(HOLE_KEYS)
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in HOLE_KEYS]
+
+    def get(self, key, default=None):
+        if key not in HOLE_KEYS:
+            return default
+        return getattr(self, key)
+
+    def copy(self, **kwargs):
+        """
+        Returns a copy of the hole with the given fields replaced.
+        """
+        values = dict(self.items())
+        values.update(kwargs)
+        return Hole(**values)
+
+
+def to_hole(hole):
+    """
+    Convert a hole dictionary to a Hole.
+    """
+    if isinstance(hole, Hole):
+        return hole
+    return Hole(hole.get('panel'), hole['type'], hole['location'], hole['size'])
+
+
+class Hole_Registry(object):
+    """
+    Holes indexed by panel and by panel and hole type, so that the holes of
+    one panel are found without scanning the holes of all the others. The
+    holes are also kept in the order they were added.
+    """
+
+    def __init__(self, hole_list=()):
+        self.hole_list = []
+        self.panel_holes = {}
+        self.panel_type_holes = {}
+        self.extend(hole_list)
+
+    def __len__(self):
+        return len(self.hole_list)
+
+    def __iter__(self):
+        return iter(self.hole_list)
+
+    def add(self, hole):
+        panel = hole['panel']
+        self.hole_list.append(hole)
+        self.panel_holes.setdefault(panel, []).append(hole)
+        self.panel_type_holes.setdefault((panel, hole['type']), []).append(hole)
+
+    def extend(self, hole_list):
+        for hole in hole_list:
+            self.add(hole)
+
+    def copy(self):
+        registry = Hole_Registry()
+        registry.hole_list = list(self.hole_list)
+        registry.panel_holes = dict((key, list(value)) for key, value in self.panel_holes.iteritems())
+        registry.panel_type_holes = dict((key, list(value)) for key, value in self.panel_type_holes.iteritems())
+        return registry
+
+    def get_panels(self):
+        return sorted(self.panel_holes)
+
+    def get_holes(self, panel=None, hole_type=None):
+        """
+        Get list of the holes in panel of type hole_type, or of all panels or
+        types if these are None.
+        """
+        if panel is None:
+            if hole_type is None:
+                return list(self.hole_list)
+            return [hole for hole in self.hole_list if hole['type'] == hole_type]
+        if hole_type is None:
+            return list(self.panel_holes.get(panel, ()))
+        return list(self.panel_type_holes.get((panel, hole_type), ()))
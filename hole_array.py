@@ -0,0 +1,109 @@
+"""
+Hole patterns stored as numpy arrays grouped by hole type. For each type the
+holes are given by an (n,2) array of locations and an (n,k) array of sizes,
+where k is 1 for 'round' (diameter), 2 for 'square' (x,y) and 3 for
+'rounded_square' (x,y,radius). Patterns can be replicated over a set of
+offsets by broadcasting and cut from a part with a single difference.
+"""
+import numpy
+from py2scad import *
+from hole import Hole
+
+HOLE_SIZE_LEN = {
+        'round'          : 1,
+        'square'         : 2,
+        'rounded_square' : 3,
+        }
+
+
+def get_hole_arrays(hole_list):
+    """
+    Convert a list of hole dictionaries to a dictionary of hole arrays
+    (locations, sizes) keyed by hole type.
+    """
+    loc_dict = {}
+    size_dict = {}
+    for hole in hole_list:
+        hole_type = hole['type']
+        if hole_type not in HOLE_SIZE_LEN:
+            raise ValueError, 'unknown hole type {0}'.format(hole_type)
+        loc_dict.setdefault(hole_type, []).append(hole['location'])
+        size_dict.setdefault(hole_type, []).append(numpy.ravel(hole['size']))
+    hole_arrays = {}
+    for hole_type in loc_dict:
+        locations = numpy.array(loc_dict[hole_type], dtype=float).reshape(-1,2)
+        sizes = numpy.array(size_dict[hole_type], dtype=float)
+        sizes = sizes.reshape(-1,HOLE_SIZE_LEN[hole_type])
+        hole_arrays[hole_type] = locations, sizes
+    return hole_arrays
+
+
+def replicate_hole_arrays(hole_arrays, offsets):
+    """
+    Replicate hole arrays at each of the (m,2) offsets. Holes are ordered hole
+    major, i.e. all copies of the first hole come first.
+    """
+    offsets = numpy.asarray(offsets, dtype=float).reshape(-1,2)
+    num_offsets = offsets.shape[0]
+    new_hole_arrays = {}
+    for hole_type, (locations, sizes) in hole_arrays.iteritems():
+        new_locations = locations[:,numpy.newaxis,:] + offsets[numpy.newaxis,:,:]
+        new_locations = new_locations.reshape(-1,2)
+        new_sizes = numpy.repeat(sizes, num_offsets, axis=0)
+        new_hole_arrays[hole_type] = new_locations, new_sizes
+    return new_hole_arrays
+
+
+def hole_arrays_to_list(hole_arrays, panel):
+    """
+    Convert hole arrays back to a list of hole dictionaries for the given
+    panel.
+    """
+    hole_list = []
+    for hole_type in sorted(hole_arrays):
+        locations, sizes = hole_arrays[hole_type]
+        for (x,y), size in zip(locations.tolist(), sizes.tolist()):
+            if hole_type == 'round':
+                size = size[0]
+            else:
+                size = tuple(size)
+            hole = Hole(
+                    panel=panel,
+                    type=hole_type,
+                    location=(x,y),
+                    size=size,
+                    )
+            hole_list.append(hole)
+    return hole_list
+
+
+def make_hole_cuts(hole_arrays, cut_depth):
+    """
+    Create cutting geometry for the hole arrays, one union per hole type.
+    """
+    cut_list = []
+    for hole_type in sorted(hole_arrays):
+        locations, sizes = hole_arrays[hole_type]
+        hole_objs = []
+        for (x,y), size in zip(locations.tolist(), sizes.tolist()):
+            if hole_type == 'round':
+                radius = 0.5*size[0]
+                hole_obj = Cylinder(r1=radius, r2=radius, h=cut_depth)
+            elif hole_type == 'square':
+                hole_obj = Cube(size=(size[0],size[1],cut_depth))
+            else:
+                hole_obj = rounded_box(size[0],size[1],cut_depth,size[2],round_z=False)
+            hole_objs.append(Translate(hole_obj,v=(x,y,0)))
+        if hole_objs:
+            cut_list.append(Union(hole_objs))
+    return cut_list
+
+
+def cut_hole_arrays(part, hole_arrays, cut_depth):
+    """
+    Cut all holes in hole_arrays from part using a single difference.
+    """
+    cut_list = make_hole_cuts(hole_arrays, cut_depth)
+    if not cut_list:
+        return part
+    return Difference([part] + cut_list)
@@ -0,0 +1,232 @@
+"""
+Validation of the holes cut in the enclosure panels. Holes which overlap, or
+leave less than a minimum web of material between each other or to the edge
+of their panel, are reported.
+
+Each hole is treated as a rectangular core grown by a radius: a round hole is
+a point grown by half its diameter, a square hole a rectangle with zero
+radius and a rounded square a smaller rectangle grown by its corner radius.
+This makes the distance between any two holes exact. Neighbouring holes are
+found with a uniform grid index per panel, so each query only looks at the
+holes in a few cells and checking the replicated array bottom hole set stays
+linear in the number of holes.
+"""
+import math
+from hole import Hole_Registry
+
+DEFAULT_MIN_WEB = 1.0
+DEFAULT_TOLERANCE = 1.0e-6
+
+
+def get_hole_shape(hole):
+    """
+    Returns (x, y, half_x, half_y, radius) of the hole's rectangular core and
+    radius.
+    """
+    x, y = hole['location']
+    if hole['type'] == 'round':
+        return x, y, 0.0, 0.0, 0.5*hole['size']
+    elif hole['type'] == 'square':
+        size_x, size_y = hole['size']
+        return x, y, 0.5*size_x, 0.5*size_y, 0.0
+    elif hole['type'] == 'rounded_square':
+        size_x, size_y, radius = hole['size']
+        return x, y, 0.5*size_x - radius, 0.5*size_y - radius, radius
+    else:
+        raise ValueError, 'unknown hole type {0}'.format(hole['type'])
+
+
+def get_hole_distance(shape_a, shape_b):
+    """
+    Distance between two hole shapes, negative if they overlap.
+    """
+    x_a, y_a, hx_a, hy_a, r_a = shape_a
+    x_b, y_b, hx_b, hy_b, r_b = shape_b
+    dx = abs(x_a - x_b) - hx_a - hx_b
+    dy = abs(y_a - y_b) - hy_a - hy_b
+    if dx > 0 or dy > 0:
+        core_dist = math.hypot(max(dx,0.0), max(dy,0.0))
+    else:
+        core_dist = max(dx, dy)
+    return core_dist - r_a - r_b
+
+
+def get_edge_distance(shape, panel_size):
+    """
+    Distance from a hole shape to the nearest edge of a panel of the given
+    (x,y) size centered at the origin, negative if the hole crosses the edge.
+    """
+    x, y, hx, hy, r = shape
+    panel_x, panel_y = panel_size
+    dx = 0.5*panel_x - abs(x) - hx - r
+    dy = 0.5*panel_y - abs(y) - hy - r
+    return min(dx, dy)
+
+
+def is_on_edge(shape, panel_size, tol=DEFAULT_TOLERANCE):
+    """
+    True if the center of the hole lies on an edge of the panel.
+    """
+    x, y, hx, hy, r = shape
+    panel_x, panel_y = panel_size
+    return abs(abs(x) - 0.5*panel_x) <= tol or abs(abs(y) - 0.5*panel_y) <= tol
+
+
+class Hole_Index(object):
+
+    def __init__(self, hole_list, cell_size=None):
+        self.hole_list = list(hole_list)
+        self.shape_list = [get_hole_shape(hole) for hole in self.hole_list]
+        if cell_size is None:
+            cell_size = self.get_default_cell_size()
+        self.cell_size = cell_size
+        self.cells = {}
+        for i, shape in enumerate(self.shape_list):
+            for cell in self.get_cells(shape):
+                self.cells.setdefault(cell, []).append(i)
+
+    def get_default_cell_size(self):
+        """
+        Twice the median hole extent. Large holes, such as the sensor cutout,
+        then cover several cells instead of making every cell large.
+        """
+        extent_list = sorted(max(hx + r, hy + r) for x, y, hx, hy, r in self.shape_list)
+        if not extent_list:
+            return 1.0
+        return max(4*extent_list[len(extent_list)//2], 1.0)
+
+    def get_cells(self, shape, margin=0.0):
+        x, y, hx, hy, r = shape
+        i_min = int(math.floor((x - hx - r - margin)/self.cell_size))
+        i_max = int(math.floor((x + hx + r + margin)/self.cell_size))
+        j_min = int(math.floor((y - hy - r - margin)/self.cell_size))
+        j_max = int(math.floor((y + hy + r + margin)/self.cell_size))
+        for i in range(i_min, i_max+1):
+            for j in range(j_min, j_max+1):
+                yield i, j
+
+    def query(self, shape, max_dist):
+        """
+        Returns sorted indices of the holes whose bounding boxes are within
+        max_dist of the bounding box of shape.
+        """
+        found = set()
+        for cell in self.get_cells(shape, max_dist):
+            found.update(self.cells.get(cell, ()))
+        return sorted(found)
+
+    def find_close_pairs(self, min_web):
+        """
+        Returns list of (i, j, distance) for the pairs of holes closer than
+        min_web.
+        """
+        pair_list = []
+        for i, shape in enumerate(self.shape_list):
+            for j in self.query(shape, min_web):
+                if j <= i:
+                    continue
+                dist = get_hole_distance(shape, self.shape_list[j])
+                if dist < min_web:
+                    pair_list.append((i, j, dist))
+        return pair_list
+
+
+def check_holes(hole_list, panel_sizes=None, min_web=DEFAULT_MIN_WEB, tol=DEFAULT_TOLERANCE):
+    """
+    Check the holes of each panel. panel_sizes is a dictionary of the (x,y)
+    size of each panel, holes in panels without a size are only checked
+    against each other. Returns list of problems, each a dictionary with
+    'panel', 'status', 'holes' and 'web'. The status is 'overlap' for
+    overlapping holes, 'thin_web' for holes closer than min_web, 'edge' for
+    holes closer than min_web to the panel edge or crossing it, and 'notch'
+    for holes centered on the edge, which are notches cut on purpose (e.g.
+    the capillary holes in the side walls).
+    """
+    if panel_sizes is None:
+        panel_sizes = {}
+    registry = Hole_Registry(hole_list)
+
+    problem_list = []
+    for panel in registry.get_panels():
+        index = Hole_Index(registry.get_holes(panel))
+        for i, j, dist in index.find_close_pairs(min_web):
+            if dist < -tol:
+                status = 'overlap'
+            else:
+                status = 'thin_web'
+            problem = {
+                    'panel'  : panel,
+                    'status' : status,
+                    'holes'  : [dict(index.hole_list[i]), dict(index.hole_list[j])],
+                    'web'    : dist,
+                    }
+            problem_list.append(problem)
+
+        if panel not in panel_sizes:
+            continue
+        for hole, shape in zip(index.hole_list, index.shape_list):
+            dist = get_edge_distance(shape, panel_sizes[panel])
+            if dist >= min_web:
+                continue
+            if dist < -tol and is_on_edge(shape, panel_sizes[panel], tol):
+                status = 'notch'
+            else:
+                status = 'edge'
+            problem = {
+                    'panel'  : panel,
+                    'status' : status,
+                    'holes'  : [dict(hole)],
+                    'web'    : dist,
+                    }
+            problem_list.append(problem)
+    return problem_list
+
+
+def check_enclosure(enclosure, min_web=DEFAULT_MIN_WEB, tol=DEFAULT_TOLERANCE, added_only=False):
+    """
+    Check the holes of an enclosure. With added_only only the holes added by
+    the enclosure are checked, leaving out the tab slots and standoff holes,
+    which doesn't need the box to be made (see get_added_hole_list).
+    """
+    if added_only:
+        hole_list = enclosure.get_added_hole_list()
+    else:
+        hole_list = enclosure.get_hole_list()
+    return check_holes(hole_list, enclosure.get_panel_sizes(), min_web, tol)
+
+
+def get_violations(problem_list):
+    """
+    Problems other than notches.
+    """
+    return [problem for problem in problem_list if problem['status'] != 'notch']
+
+
+def print_report(problem_list):
+    for problem in problem_list:
+        hole_str = ', '.join('{0} at ({1:1.2f}, {2:1.2f})'.format(hole['type'], *hole['location']) for hole in problem['holes'])
+        print '{0:<14s} {1:<10s} {2:>8.3f}  {3}'.format(problem['panel'], problem['status'], problem['web'], hole_str)
+    print '{0} violations'.format(len(get_violations(problem_list)))
+
+# -----------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    import argparse
+    parser = argparse.ArgumentParser(description='check enclosure panels for overlapping holes and thin webs')
+    parser.add_argument('--arrayed', action='store_true', help='check the arrayed enclosure')
+    parser.add_argument('--min-web', type=float, default=DEFAULT_MIN_WEB, help='minimum material between holes and to edges (mm)')
+    args = parser.parse_args()
+
+    if args.arrayed:
+        from arrayed_enclosure import Arrayed_Enclosure
+        from make_arrayed_enclosure import params
+        enclosure = Arrayed_Enclosure(params)
+    else:
+        from capillary_enclosure import Capillary_Enclosure
+        from make_enclosure import params
+        enclosure = Capillary_Enclosure(params)
+    enclosure.make()
+    problem_list = check_enclosure(enclosure, args.min_web)
+    print_report(problem_list)
+    if get_violations(problem_list):
+        raise SystemExit(1)
@@ -0,0 +1,127 @@
+"""
+Import time instrumentation. An Import_Timer wraps the builtin __import__
+while attached and records, for each import statement which loads new
+modules, the wall time spent and the time spent in the nested imports it
+triggers, so the modules which dominate start up can be found.
+
+    timer = Import_Timer()
+    timer.attach()
+    import capillary_enclosure
+    timer.detach()
+    timer.print_report()
+
+Run as a script it times importing the given modules and building one
+enclosure, and lists which of the heavy modules (numpy, scipy, py2scad) were
+loaded along the way.
+
+    python import_timer.py capillary_enclosure --build single
+"""
+import sys
+import time
+import __builtin__
+
+HEAVY_MODULES = ('numpy', 'scipy', 'py2scad')
+
+
+class Import_Timer(object):
+
+    def __init__(self):
+        self.stats = {}
+        self.stack = []
+        self.original_import = None
+
+    def attach(self):
+        self.original_import = __builtin__.__import__
+        __builtin__.__import__ = self.timed_import
+
+    def detach(self):
+        __builtin__.__import__ = self.original_import
+        self.original_import = None
+
+    def timed_import(self, name, *args, **kwargs):
+        num_modules = len(sys.modules)
+        self.stack.append(0.0)
+        t_start = time.time()
+        try:
+            return self.original_import(name, *args, **kwargs)
+        finally:
+            elapsed = time.time() - t_start
+            nested = self.stack.pop()
+            # Only imports which loaded something are recorded, the others
+            # are dictionary lookups in sys.modules.
+            if len(sys.modules) > num_modules:
+                if not name:
+                    # from . import x, named after the importing package
+                    globals_dict = args[0] if args else kwargs.get('globals')
+                    name = '{0}.'.format((globals_dict or {}).get('__name__', ''))
+                self.add_stat(name, elapsed, elapsed - nested, len(sys.modules) - num_modules)
+                if self.stack:
+                    self.stack[-1] += elapsed
+
+    def add_stat(self, name, elapsed, self_time, num_modules):
+        stat = self.stats.setdefault(name, {'name': name, 'time': 0.0, 'self_time': 0.0, 'modules': 0})
+        stat['time'] += elapsed
+        stat['self_time'] += self_time
+        stat['modules'] += num_modules
+
+    def get_report(self):
+        """
+        Returns list of import statistics sorted by decreasing self time. The
+        time includes nested imports, the self time doesn't.
+        """
+        report = [dict(stat) for stat in self.stats.itervalues()]
+        report.sort(key=lambda stat: stat['self_time'], reverse=True)
+        return report
+
+    def get_total_time(self):
+        return sum(stat['self_time'] for stat in self.stats.itervalues())
+
+    def print_report(self, limit=None):
+        print '{0:<36s} {1:>10s} {2:>10s} {3:>8s}'.format('import', 'self (s)', 'total (s)', 'modules')
+        for stat in self.get_report()[:limit]:
+            print '{0:<36s} {1:>10.4f} {2:>10.4f} {3:>8d}'.format(
+                    stat['name'],
+                    stat['self_time'],
+                    stat['time'],
+                    stat['modules'],
+                    )
+        print '{0:<36s} {1:>10.4f}'.format('total', self.get_total_time())
+
+
+def get_loaded_heavy_modules():
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+# -----------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    import argparse
+    parser = argparse.ArgumentParser(description='time the imports of the enclosure modules')
+    parser.add_argument('modules', nargs='*', default=['capillary_enclosure'], help='modules to import')
+    parser.add_argument('--build', choices=('single', 'arrayed'), default=None, help='also build one enclosure')
+    parser.add_argument('--limit', type=int, default=20, help='number of imports to list')
+    args = parser.parse_args()
+
+    timer = Import_Timer()
+    timer.attach()
+    t_start = time.time()
+    for name in args.modules:
+        __import__(name)
+    t_import = time.time() - t_start
+    print 'imported {0} in {1:1.4f}s, heavy modules: {2}'.format(', '.join(args.modules), t_import, get_loaded_heavy_modules())
+
+    if args.build is not None:
+        t_start = time.time()
+        if args.build == 'arrayed':
+            from arrayed_enclosure import Arrayed_Enclosure
+            from make_arrayed_enclosure import params
+            enclosure = Arrayed_Enclosure(params)
+        else:
+            from capillary_enclosure import Capillary_Enclosure
+            from make_enclosure import params
+            enclosure = Capillary_Enclosure(params)
+        enclosure.make()
+        t_build = time.time() - t_start
+        print 'built {0} enclosure in {1:1.4f}s, heavy modules: {2}'.format(args.build, t_build, get_loaded_heavy_modules())
+    timer.detach()
+    print
+    timer.print_report(args.limit)
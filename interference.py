@@ -0,0 +1,262 @@
+"""
+Interference and clearance checking of the enclosure parts without rendering
+them. The parts are approximated by axis aligned boxes and cylinders, placed
+as in get_assembly (see get_solids), and every pair of parts closer than a
+search distance is found with a sweep and prune broad phase on their bounding
+boxes followed by an exact distance computation for the pair.
+
+The clearance of a pair is the distance between the parts if they are apart
+and minus the penetration depth if they overlap, so parts which just touch,
+e.g. the guide plates resting on the sensor, have zero clearance. Pairs which
+are meant to intersect, such as the capillary passing through the holes in
+the side walls, are listed as allowed and not reported as interferences.
+"""
+import math
+
+DEFAULT_TOLERANCE = 1.0e-6
+DEFAULT_MIN_CLEARANCE = 0.1
+
+AXIS_INDEX = {'x': 0, 'y': 1, 'z': 2}
+
+
+class Solid_Box(object):
+
+    def __init__(self, name, center, size, group=None):
+        self.name = name
+        self.center = tuple(center)
+        self.size = tuple(size)
+        self.group = group
+
+    def __repr__(self):
+        return 'Solid_Box({0!r}, {1}, {2}, group={3!r})'.format(self.name, self.center, self.size, self.group)
+
+    def translate(self, v, group=None):
+        center = [c + d for c, d in zip(self.center, v)]
+        return Solid_Box(self.name, center, self.size, group)
+
+    def get_bounding_box(self):
+        """
+        Returns (min, max) corners of the box.
+        """
+        lo = tuple(c - 0.5*s for c, s in zip(self.center, self.size))
+        hi = tuple(c + 0.5*s for c, s in zip(self.center, self.size))
+        return lo, hi
+
+
+class Solid_Cylinder(object):
+
+    def __init__(self, name, center, radius, length, axis='z', group=None):
+        if axis not in AXIS_INDEX:
+            raise ValueError, 'unknown cylinder axis {0}'.format(axis)
+        self.name = name
+        self.center = tuple(center)
+        self.radius = radius
+        self.length = length
+        self.axis = axis
+        self.group = group
+
+    def __repr__(self):
+        return 'Solid_Cylinder({0!r}, {1}, {2}, {3}, axis={4!r}, group={5!r})'.format(
+                self.name,
+                self.center,
+                self.radius,
+                self.length,
+                self.axis,
+                self.group,
+                )
+
+    def translate(self, v, group=None):
+        center = [c + d for c, d in zip(self.center, v)]
+        return Solid_Cylinder(self.name, center, self.radius, self.length, self.axis, group)
+
+    def get_bounding_box(self):
+        """
+        Returns (min, max) corners of the cylinder's bounding box.
+        """
+        n = AXIS_INDEX[self.axis]
+        size = [2*self.radius]*3
+        size[n] = self.length
+        lo = tuple(c - 0.5*s for c, s in zip(self.center, size))
+        hi = tuple(c + 0.5*s for c, s in zip(self.center, size))
+        return lo, hi
+
+
+def interval_distance(lo_a, hi_a, lo_b, hi_b):
+    """
+    Signed distance between two intervals, negative if they overlap.
+    """
+    return max(lo_b - hi_a, lo_a - hi_b)
+
+
+def combine_distances(dist_list):
+    """
+    Signed distance between two sets which are products of lower dimensional
+    sets, given the signed distances of the factors.
+    """
+    pos_list = [d for d in dist_list if d > 0]
+    if pos_list:
+        return math.sqrt(sum(d**2 for d in pos_list))
+    return max(dist_list)
+
+
+def point_rect_distance(point, lo, hi):
+    """
+    Signed distance from a 2D point to a rectangle, negative inside.
+    """
+    dist_list = [max(l - p, p - h) for p, l, h in zip(point, lo, hi)]
+    return combine_distances(dist_list)
+
+
+def get_clearance(solid_a, solid_b):
+    """
+    Get clearance between two solids: the distance between them, or minus the
+    penetration depth if they overlap. Exact for boxes and for cylinders
+    along the same axis, otherwise based on the cylinder's bounding box.
+    """
+    if isinstance(solid_a, Solid_Box) and isinstance(solid_b, Solid_Cylinder):
+        solid_a, solid_b = solid_b, solid_a
+    lo_a, hi_a = solid_a.get_bounding_box()
+    lo_b, hi_b = solid_b.get_bounding_box()
+
+    if isinstance(solid_a, Solid_Cylinder):
+        n = AXIS_INDEX[solid_a.axis]
+        plane = [i for i in range(3) if i != n]
+        axial = interval_distance(lo_a[n], hi_a[n], lo_b[n], hi_b[n])
+        center = [solid_a.center[i] for i in plane]
+        if isinstance(solid_b, Solid_Box):
+            radial = point_rect_distance(center, [lo_b[i] for i in plane], [hi_b[i] for i in plane])
+            return combine_distances([axial, radial - solid_a.radius])
+        elif solid_b.axis == solid_a.axis:
+            center_b = [solid_b.center[i] for i in plane]
+            radial = math.hypot(center[0] - center_b[0], center[1] - center_b[1])
+            return combine_distances([axial, radial - solid_a.radius - solid_b.radius])
+
+    dist_list = [interval_distance(lo_a[i], hi_a[i], lo_b[i], hi_b[i]) for i in range(3)]
+    return combine_distances(dist_list)
+
+
+def is_allowed(solid_a, solid_b, allowed_pairs):
+    """
+    Pairs are allowed to intersect if their names are in allowed_pairs and they
+    belong to the same group, or either doesn't belong to any group.
+    """
+    if frozenset((solid_a.name, solid_b.name)) not in allowed_pairs:
+        return False
+    return solid_a.group == solid_b.group or solid_a.group is None or solid_b.group is None
+
+
+def find_close_pairs(solid_list, search_dist=0.0):
+    """
+    Broad phase: find pairs of solids whose bounding boxes are within
+    search_dist of each other by sweeping along the axis of largest extent.
+    Returns list of index pairs.
+    """
+    box_list = [solid.get_bounding_box() for solid in solid_list]
+    if not box_list:
+        return []
+    extent = []
+    for i in range(3):
+        extent.append(max(hi[i] for lo, hi in box_list) - min(lo[i] for lo, hi in box_list))
+    axis = extent.index(max(extent))
+
+    order = sorted(range(len(box_list)), key=lambda k: box_list[k][0][axis])
+    pair_list = []
+    active = []
+    for k in order:
+        lo, hi = box_list[k]
+        active = [j for j in active if box_list[j][1][axis] + search_dist >= lo[axis]]
+        for j in active:
+            lo_j, hi_j = box_list[j]
+            if all(lo_j[i] - search_dist <= hi[i] and lo[i] - search_dist <= hi_j[i] for i in range(3)):
+                pair_list.append((j, k))
+        active.append(k)
+    return pair_list
+
+
+def check_solids(solid_list, allowed_pairs=(), min_clearance=DEFAULT_MIN_CLEARANCE, tol=DEFAULT_TOLERANCE):
+    """
+    Check solids for interferences and clearances below min_clearance. Returns
+    list of dictionaries, one per pair of solids within min_clearance of each
+    other, sorted by clearance. The status of a pair is 'interference' if the
+    solids overlap, 'allowed' if they overlap but are listed in allowed_pairs,
+    'contact' if they touch and 'clearance' if they are closer than
+    min_clearance.
+    """
+    allowed_pairs = set(frozenset(pair) for pair in allowed_pairs)
+    result_list = []
+    for i, j in find_close_pairs(solid_list, min_clearance):
+        solid_a = solid_list[i]
+        solid_b = solid_list[j]
+        clearance = get_clearance(solid_a, solid_b)
+        if clearance >= min_clearance:
+            continue
+        if clearance < -tol:
+            if is_allowed(solid_a, solid_b, allowed_pairs):
+                status = 'allowed'
+            else:
+                status = 'interference'
+        elif clearance <= tol:
+            status = 'contact'
+        else:
+            status = 'clearance'
+        result = {
+                'parts'     : (get_solid_name(solid_a), get_solid_name(solid_b)),
+                'clearance' : clearance,
+                'status'    : status,
+                }
+        result_list.append(result)
+    result_list.sort(key=lambda result: result['clearance'])
+    return result_list
+
+
+def get_solid_name(solid):
+    if solid.group is None:
+        return solid.name
+    return '{0}/{1}'.format(solid.group, solid.name)
+
+
+def check_enclosure(enclosure, min_clearance=DEFAULT_MIN_CLEARANCE, tol=DEFAULT_TOLERANCE):
+    """
+    Check the parts of an enclosure, placed as in its assembly. Only params
+    are used, the enclosure doesn't need to be made.
+    """
+    solid_list = enclosure.get_solids()
+    return check_solids(solid_list, enclosure.get_allowed_intersections(), min_clearance, tol)
+
+
+def get_interferences(result_list):
+    return [result for result in result_list if result['status'] == 'interference']
+
+
+def print_report(result_list):
+    for result in result_list:
+        print '{0:<12s} {1:>10.4f}  {2} - {3}'.format(
+                result['status'],
+                result['clearance'],
+                result['parts'][0],
+                result['parts'][1],
+                )
+    num_interferences = len(get_interferences(result_list))
+    print '{0} interferences'.format(num_interferences)
+
+# -----------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    import argparse
+    parser = argparse.ArgumentParser(description='check enclosure parts for interferences and small clearances')
+    parser.add_argument('--arrayed', action='store_true', help='check the arrayed enclosure')
+    parser.add_argument('--min-clearance', type=float, default=DEFAULT_MIN_CLEARANCE, help='report parts closer than this (mm)')
+    args = parser.parse_args()
+
+    if args.arrayed:
+        from arrayed_enclosure import Arrayed_Enclosure
+        from make_arrayed_enclosure import params
+        enclosure = Arrayed_Enclosure(params)
+    else:
+        from capillary_enclosure import Capillary_Enclosure
+        from make_enclosure import params
+        enclosure = Capillary_Enclosure(params)
+    result_list = check_enclosure(enclosure, args.min_clearance)
+    print_report(result_list)
+    if get_interferences(result_list):
+        raise SystemExit(1)
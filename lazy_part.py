@@ -0,0 +1,49 @@
+"""
+Parts which are made on first access. A Lazy_Part is a class attribute naming
+the method which makes the part. The first time the part is read from an
+instance the method is called; it sets the part as an instance attribute,
+which hides the Lazy_Part, so later reads return the part directly.
+
+    class Capillary_Enclosure(Basic_Enclosure):
+
+        diffuser = Lazy_Part('diffuser', 'make_diffuser')
+
+Calling the make method explicitly still works and (re)makes the part.
+"""
+
+
+class Lazy_Part(object):
+
+    def __init__(self, name, maker):
+        self.name = name
+        self.maker = maker
+
+    def __repr__(self):
+        return 'Lazy_Part({0!r}, {1!r})'.format(self.name, self.maker)
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        # A maker reading one of its own parts before setting it would call
+        # itself again, so the part is reported missing instead.
+        making = obj.__dict__.setdefault('_lazy_making', set())
+        if self.maker in making:
+            raise AttributeError, '{0} read while {1} is making it'.format(self.name, self.maker)
+        making.add(self.maker)
+        try:
+            getattr(obj, self.maker)()
+        finally:
+            making.discard(self.maker)
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError, '{0} did not make {1}'.format(self.maker, self.name)
+
+
+def ensure_made(obj, *names):
+    """
+    Make the given lazy parts of obj if they haven't been made yet, e.g.
+    before calling code which reads the parts' attributes directly.
+    """
+    for name in names:
+        getattr(obj, name)
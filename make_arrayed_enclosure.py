@@ -1,98 +1,138 @@
-import subprocess
-import os.path
+import argparse
 from py2scad import *
+from dxf_export import export_dxf
+from dxf_cache import DXF_Cache
+from stage_profiler import Stage_Profiler
+from enclosure_outputs import write_outputs, get_build_state, get_output_digests, get_stale_outputs
 from arrayed_enclosure import Arrayed_Enclosure
 from make_enclosure import params
 
 create_dxf = False 
+scad_fn = 50
 
 params['number_of_sensors'] = 5
 params['sensor_spacing'] = INCH2MM*2.0
+# For a grid of sensors set array_rows and array_cols (used instead of
+# number_of_sensors) and the spacing along x, e.g.
+# params['array_rows'] = 8
+# params['array_cols'] = 12
+# params['sensor_spacing_x'] = INCH2MM*3.0
 params['array_bottom_overhang'] = 1.0*INCH2MM
 params['bottom_mount_hole_diam'] = 0.2010*INCH2MM 
 params['bottom_mount_hole_spacing'] = INCH2MM 
 params['bottom_mount_hole_inset'] = 0.5*INCH2MM
 
+
+assembly_kwargs = dict(
+        show_top=True,
+        show_bottom=True, 
+        show_front=True,
+        show_back=True,
+        show_left=True,
+        show_right=True,
+        show_standoffs=True,
+        show_capillary=True,
+        show_sensor=True,
+        show_diffuser=True,
+        show_diffuser_standoffs=True,
+        show_led_pcb=True,
+        show_guide_plates=True,
+        show_guide_top=True,
+        show_clamp=True,
+        explode=(0,0,0),
+        )
+
+
+def get_output_list(native_dxf=False):
+    """
+    Get list of (filename, method name, kwargs) for the output files. If
+    native_dxf is True the dxf files for the flat parts are written directly
+    and the clamp is left out of the box projection.
+    """
+    output_list = [
+            ('arrayed_assembly.scad', 'get_assembly', assembly_kwargs),
+            ('arrayed_box_projection.scad', 'get_box_projection', {'show_clamp': not native_dxf}),
+            ('diffuser_projection.scad', 'get_diffuser_projection', {}),
+            ('top_guide_projection.scad', 'get_guide_top_projection', {}),
+            ('side_guide_projection.scad', 'get_guide_side_projection', {}),
+            ('arrayed_bottom_projection.scad', 'get_bottom_projection', {}),
+            ]
+    if native_dxf:
+        output_list.extend([
+            ('diffuser_projection.dxf', 'get_diffuser_projection_2d', {}),
+            ('top_guide_projection.dxf', 'get_guide_top_projection_2d', {}),
+            ('side_guide_projection.dxf', 'get_guide_side_projection_2d', {}),
+            ('arrayed_bottom_projection.dxf', 'get_bottom_projection_2d', {}),
+            ('clamp_projection.dxf', 'get_clamp_projection_2d', {}),
+            ])
+    return output_list
+
+
+def write_files(enclosure, output_dir='.', native_dxf=False, chord_tol=None, verbose=True, output_names=None):
+    """
+    Write the assembly and projection files for the arrayed enclosure to output_dir,
+    or only those in output_names if given. Returns the list of projection
+    scad files which still need to be converted to dxf by openscad.
+    """
+    output_list = get_output_list(native_dxf)
+    return write_outputs(
+            enclosure,
+            output_list,
+            output_dir=output_dir,
+            fn=scad_fn,
+            chord_tol=chord_tol,
+            verbose=verbose,
+            output_names=output_names,
+            )
+
 # -----------------------------------------------------------------------------
 if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--no-cache', action='store_true', help='always rerun openscad when creating dxf files')
+    parser.add_argument('--native-dxf', action='store_true', help='write dxf files for flat parts directly instead of using openscad')
+    parser.add_argument('--chord-tol', type=float, default=None, help='facet curves in native dxf files to this tolerance (mm) instead of writing exact arcs')
+    parser.add_argument('--profile', default=None, metavar='FILE', help='print time and csg nodes per build stage and save cProfile stats to FILE')
+    parser.add_argument('--force', action='store_true', help='rebuild all files, not only those whose params changed')
+    args = parser.parse_args()
+
     enclosure = Arrayed_Enclosure(params)
-    enclosure.make()
+
+    # Find the files whose params changed since the last build
+    output_list = get_output_list(args.native_dxf)
+    state = get_build_state()
+    digest_dict = get_output_digests(enclosure, output_list, fn=scad_fn, chord_tol=args.chord_tol)
+    if args.force:
+        output_names = [filename for filename, method_name, kwargs in output_list]
+    else:
+        output_names = get_stale_outputs(state, digest_dict, output_list, create_dxf=create_dxf)
+    if not output_names:
+        print 'all files up to date'
+        raise SystemExit(0)
+    print 'rebuilding: {0}'.format(', '.join(output_names))
 
     # Display size of bottom plate.
-    print [x/INCH2MM for x in enclosure.array_bottom_size]
-
-    part_assembly = enclosure.get_assembly(
-            show_top=True,
-            show_bottom=True, 
-            show_front=True,
-            show_back=True,
-            show_left=True,
-            show_right=True,
-            show_standoffs=True,
-            show_capillary=True,
-            show_sensor=True,
-            show_diffuser=True,
-            show_diffuser_standoffs=True,
-            show_led_pcb=True,
-            show_guide_plates=True,
-            show_guide_top=True,
-            show_clamp=True,
-            explode=(0,0,0),
-            )
-    prog_assembly = SCAD_Prog()
-    prog_assembly.fn = 50
-    prog_assembly.add(part_assembly)
-    prog_assembly.write('arrayed_assembly.scad')
-
-    box_projection = enclosure.get_box_projection()
-    bottom_projection = enclosure.get_bottom_projection()
-    diffuser_projection = enclosure.get_diffuser_projection()
-    top_guide_projection = enclosure.get_guide_top_projection()
-    side_guide_projection = enclosure.get_guide_side_projection()
-
-    # Create scad files
-    filename = 'arrayed_box_projection.scad'
-    scad_projection_files = []
-    prog_box_projection = SCAD_Prog()
-    prog_box_projection.fn = 50
-    prog_box_projection.add(box_projection)
-    prog_box_projection.write(filename)
-    scad_projection_files.append(filename)
-
-    filename = 'diffuser_projection.scad'
-    prog_diffuser_projection = SCAD_Prog()
-    prog_diffuser_projection.fn = 50
-    prog_diffuser_projection.add(diffuser_projection)
-    prog_diffuser_projection.write(filename)
-    scad_projection_files.append(filename)
-    
-    filename = 'top_guide_projection.scad'
-    prog_top_guide_projection = SCAD_Prog()
-    prog_top_guide_projection.fn = 50
-    prog_top_guide_projection.add(top_guide_projection)
-    prog_top_guide_projection.write(filename)
-    scad_projection_files.append(filename)
-    
-    filename = 'side_guide_projection.scad'
-    prog_side_guide_projection = SCAD_Prog()
-    prog_side_guide_projection.fn = 50
-    prog_side_guide_projection.add(side_guide_projection)
-    prog_side_guide_projection.write(filename)
-    scad_projection_files.append(filename)
-
-    filename = 'arrayed_bottom_projection.scad'
-    prog_bottom_projection = SCAD_Prog()
-    prog_bottom_projection.fn = 50
-    prog_bottom_projection.add(bottom_projection)
-    prog_bottom_projection.write(filename)
-    scad_projection_files.append(filename)
+    print [x/INCH2MM for x in enclosure.get_array_bottom_size()]
+
+    if args.profile:
+        profiler = Stage_Profiler(enclosure)
+        profiler.attach()
+        with profiler.stage('write_files'):
+            scad_projection_files = write_files(enclosure, native_dxf=args.native_dxf, chord_tol=args.chord_tol, output_names=output_names)
+        profiler.detach()
+        profiler.print_report()
+        profiler.dump_stats(args.profile)
+    else:
+        scad_projection_files = write_files(enclosure, native_dxf=args.native_dxf, chord_tol=args.chord_tol, output_names=output_names)
 
     # Create dxf files
     if create_dxf:
-        for scad_name in scad_projection_files:
-            base_name, ext = os.path.splitext(scad_name)
-            dxf_name = '{0}.dxf'.format(base_name)
-            print '{0} -> {1}'.format(scad_name, dxf_name)
-            subprocess.call(['openscad', '-x', dxf_name, scad_name])
-
+        if args.no_cache:
+            cache = None
+        else:
+            cache = DXF_Cache()
+        export_dxf(scad_projection_files, cache=cache, fn=scad_fn)
 
+    for filename in output_names:
+        state.update(filename, digest_dict[filename])
+    state.save()
@@ -1,13 +1,17 @@
 """
 Creates an enclosure
 """
-import os.path
-import subprocess
+import argparse
 from py2scad import *
+from dxf_export import export_dxf
+from dxf_cache import DXF_Cache
+from stage_profiler import Stage_Profiler
+from enclosure_outputs import write_outputs, get_build_state, get_output_digests, get_stale_outputs
 from capillary_enclosure import Capillary_Enclosure
 
 INCH2MM = 25.4
 create_dxf=False
+scad_fn = 50
 
 # Inside dimensions
 x,y,z = 61.4, 45.0, 0.75*INCH2MM 
@@ -64,78 +68,112 @@ params = {
         'guide_hole_offset'                : 0.11*INCH2MM,
         }
 
+
+assembly_kwargs = dict(
+        show_top=False,
+        show_bottom=True, 
+        show_front=True,
+        show_back=True,
+        show_left=True,
+        show_right=True,
+        show_standoffs=True,
+        show_capillary=True,
+        show_sensor=True,
+        show_diffuser=False,
+        show_diffuser_standoffs=False,
+        show_led_pcb=False,
+        show_guide_plates=True,
+        show_guide_top=True,
+        show_clamp=True,
+        explode=(0,0,0),
+        )
+
+
+def get_output_list(native_dxf=False):
+    """
+    Get list of (filename, method name, kwargs) for the output files. If
+    native_dxf is True the dxf files for the flat parts are written directly
+    and the clamp is left out of the box projection.
+    """
+    output_list = [
+            ('enclosure_assembly.scad', 'get_assembly', assembly_kwargs),
+            ('box_projection.scad', 'get_box_projection', {'show_clamp': not native_dxf}),
+            ('diffuser_projection.scad', 'get_diffuser_projection', {}),
+            ('top_guide_projection.scad', 'get_guide_top_projection', {}),
+            ('side_guide_projection.scad', 'get_guide_side_projection', {}),
+            ]
+    if native_dxf:
+        output_list.extend([
+            ('diffuser_projection.dxf', 'get_diffuser_projection_2d', {}),
+            ('top_guide_projection.dxf', 'get_guide_top_projection_2d', {}),
+            ('side_guide_projection.dxf', 'get_guide_side_projection_2d', {}),
+            ('clamp_projection.dxf', 'get_clamp_projection_2d', {}),
+            ])
+    return output_list
+
+
+def write_files(enclosure, output_dir='.', native_dxf=False, chord_tol=None, verbose=True, output_names=None):
+    """
+    Write the assembly and projection files for the enclosure to output_dir,
+    or only those in output_names if given. Returns the list of projection
+    scad files which still need to be converted to dxf by openscad.
+    """
+    output_list = get_output_list(native_dxf)
+    return write_outputs(
+            enclosure,
+            output_list,
+            output_dir=output_dir,
+            fn=scad_fn,
+            chord_tol=chord_tol,
+            verbose=verbose,
+            output_names=output_names,
+            )
+
 # -----------------------------------------------------------------------------
 if __name__ == '__main__':
-    
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--no-cache', action='store_true', help='always rerun openscad when creating dxf files')
+    parser.add_argument('--native-dxf', action='store_true', help='write dxf files for flat parts directly instead of using openscad')
+    parser.add_argument('--chord-tol', type=float, default=None, help='facet curves in native dxf files to this tolerance (mm) instead of writing exact arcs')
+    parser.add_argument('--profile', default=None, metavar='FILE', help='print time and csg nodes per build stage and save cProfile stats to FILE')
+    parser.add_argument('--force', action='store_true', help='rebuild all files, not only those whose params changed')
+    args = parser.parse_args()
+
     enclosure = Capillary_Enclosure(params)
-    enclosure.make()
-    
-    part_assembly = enclosure.get_assembly(
-            show_top=False,
-            show_bottom=True, 
-            show_front=True,
-            show_back=True,
-            show_left=True,
-            show_right=True,
-            show_standoffs=True,
-            show_capillary=True,
-            show_sensor=True,
-            show_diffuser=False,
-            show_diffuser_standoffs=False,
-            show_led_pcb=False,
-            show_guide_plates=True,
-            show_guide_top=True,
-            show_clamp=True,
-            explode=(0,0,0),
-            )
-    
-    #print enclosure.standoff_xy_pos
-    box_projection = enclosure.get_box_projection()
-    diffuser_projection = enclosure.get_diffuser_projection()
-    top_guide_projection = enclosure.get_guide_top_projection()
-    side_guide_projection = enclosure.get_guide_side_projection()
-    
-    # Write assembly scad file
-    prog_assembly = SCAD_Prog()
-    prog_assembly.fn = 50
-    prog_assembly.add(part_assembly)
-    prog_assembly.write('enclosure_assembly.scad')
-    
-    # Write scad file for projections
-    scad_projection_files = []
-
-    filename = 'box_projection.scad'
-    prog_box_projection = SCAD_Prog()
-    prog_box_projection.fn = 50
-    prog_box_projection.add(box_projection)
-    prog_box_projection.write(filename)
-    scad_projection_files.append(filename)
-    
-    filename = 'diffuser_projection.scad'
-    prog_diffuser_projection = SCAD_Prog()
-    prog_diffuser_projection.fn = 50
-    prog_diffuser_projection.add(diffuser_projection)
-    prog_diffuser_projection.write(filename)
-    scad_projection_files.append(filename)
-    
-    filename = 'top_guide_projection.scad'
-    prog_top_guide_projection = SCAD_Prog()
-    prog_top_guide_projection.fn = 50
-    prog_top_guide_projection.add(top_guide_projection)
-    prog_top_guide_projection.write(filename)
-    scad_projection_files.append(filename)
-    
-    filename = 'side_guide_projection.scad'
-    prog_side_guide_projection = SCAD_Prog()
-    prog_side_guide_projection.fn = 50
-    prog_side_guide_projection.add(side_guide_projection)
-    prog_side_guide_projection.write(filename)
-    scad_projection_files.append(filename)
+
+    # Find the files whose params changed since the last build
+    output_list = get_output_list(args.native_dxf)
+    state = get_build_state()
+    digest_dict = get_output_digests(enclosure, output_list, fn=scad_fn, chord_tol=args.chord_tol)
+    if args.force:
+        output_names = [filename for filename, method_name, kwargs in output_list]
+    else:
+        output_names = get_stale_outputs(state, digest_dict, output_list, create_dxf=create_dxf)
+    if not output_names:
+        print 'all files up to date'
+        raise SystemExit(0)
+    print 'rebuilding: {0}'.format(', '.join(output_names))
+
+    if args.profile:
+        profiler = Stage_Profiler(enclosure)
+        profiler.attach()
+        with profiler.stage('write_files'):
+            scad_projection_files = write_files(enclosure, native_dxf=args.native_dxf, chord_tol=args.chord_tol, output_names=output_names)
+        profiler.detach()
+        profiler.print_report()
+        profiler.dump_stats(args.profile)
+    else:
+        scad_projection_files = write_files(enclosure, native_dxf=args.native_dxf, chord_tol=args.chord_tol, output_names=output_names)
 
     # Create dxf files
     if create_dxf:
-        for scad_name in scad_projection_files:
-            base_name, ext = os.path.splitext(scad_name)
-            dxf_name = '{0}.dxf'.format(base_name)
-            print '{0} -> {1}'.format(scad_name, dxf_name)
-            subprocess.call(['openscad', '-x', dxf_name, scad_name])
+        if args.no_cache:
+            cache = None
+        else:
+            cache = DXF_Cache()
+        export_dxf(scad_projection_files, cache=cache, fn=scad_fn)
+
+    for filename in output_names:
+        state.update(filename, digest_dict[filename])
+    state.save()
@@ -0,0 +1,154 @@
+"""
+Creates nested laser cutting layouts for a number of enclosures. The flat
+parts of all enclosures are grouped by material and packed onto sheets of the
+given size, one dxf file per sheet, and a report with the sheet utilization
+is written to nesting_report.json.
+
+The outlines of the tabbed box panels are derived from the panel sizes, tab
+params and panel holes (see get_box_projection_2d), without openscad. The
+arrayed enclosure has one box per sensor, without its bottom, and one arrayed
+bottom plate.
+"""
+import os
+import os.path
+import json
+import argparse
+from py2scad import *
+from dxf_writer import write_dxf
+from nesting import pack_plates
+import make_enclosure
+import make_arrayed_enclosure
+from capillary_enclosure import Capillary_Enclosure
+from arrayed_enclosure import Arrayed_Enclosure
+
+DEFAULT_SHEET_SIZE = (24*INCH2MM, 12*INCH2MM)
+REPORT_FILE = 'nesting_report.json'
+
+# Flat parts of each material as (method name, copies per sensor)
+MATERIAL_PARTS = {
+        '3mm_black_acrylic'   : [('get_box_projection_2d', 1), ('get_clamp_projection_2d', 1)],
+        '1.5mm_white_acrylic' : [('get_diffuser_projection_2d', 1)],
+        '1.5mm_clear_acrylic' : [('get_diffuser_projection_2d', 1), ('get_guide_top_projection_2d', 1)],
+        '1.5mm_black_acrylic' : [('get_guide_side_projection_2d', 1)],
+        }
+
+# Parts made once per arrayed enclosure
+ARRAYED_MATERIAL_PARTS = {
+        '3mm_black_acrylic'   : [('get_bottom_projection_2d', 1)],
+        }
+
+
+def get_enclosure_plates(enclosure, arrayed=False):
+    """
+    Get dictionary of the flat parts of one enclosure by material. Each part
+    is centered at the origin.
+    """
+    if arrayed:
+        rows, cols = enclosure.get_array_shape()
+        number_of_sensors = rows*cols
+    else:
+        number_of_sensors = 1
+    part_list = []
+    for material, method_list in MATERIAL_PARTS.iteritems():
+        for method_name, count in method_list:
+            part_list.append((material, method_name, count*number_of_sensors))
+    if arrayed:
+        for material, method_list in ARRAYED_MATERIAL_PARTS.iteritems():
+            for method_name, count in method_list:
+                part_list.append((material, method_name, count))
+
+    material_plates = {}
+    for material, method_name, count in part_list:
+        plate_list = getattr(enclosure, method_name)(show_ref_cube=False)
+        for plate in plate_list:
+            pos_x, pos_y = plate.location
+            plate = plate.translate((-pos_x, -pos_y))
+            material_plates.setdefault(material, []).extend([plate]*count)
+    return material_plates
+
+
+def make_layouts(enclosure, number_of_enclosures=1, arrayed=False, sheet_size=DEFAULT_SHEET_SIZE,
+        margin=5.0, spacing=2.0, output_dir='.', chord_tol=None, verbose=True):
+    """
+    Nest the flat parts of number_of_enclosures enclosures onto sheets and
+    write one dxf file per sheet. Returns the utilization report.
+    """
+    material_plates = get_enclosure_plates(enclosure, arrayed)
+    report = {
+            'number_of_enclosures' : number_of_enclosures,
+            'sheet_size'           : sheet_size,
+            'margin'               : margin,
+            'spacing'              : spacing,
+            'materials'            : {},
+            }
+    for material in sorted(material_plates):
+        plate_list = material_plates[material]*number_of_enclosures
+        sheet_list = pack_plates(plate_list, sheet_size, margin=margin, spacing=spacing)
+        sheet_report_list = []
+        for i, sheet in enumerate(sheet_list):
+            filename = os.path.join(output_dir, 'nested_{0}_sheet{1}.dxf'.format(material, i))
+            write_dxf(filename, sheet.plate_list, chord_tol=chord_tol)
+            sheet_report = {
+                    'filename'    : filename,
+                    'parts'       : len(sheet.plate_list),
+                    'utilization' : sheet.get_utilization(),
+                    }
+            sheet_report_list.append(sheet_report)
+            if verbose:
+                print '{0}  parts={1:<4d} utilization={2:1.1f}%'.format(
+                        filename,
+                        sheet_report['parts'],
+                        100*sheet_report['utilization'],
+                        )
+        part_area = sum(plate.get_area() for plate in plate_list)
+        report['materials'][material] = {
+                'parts'       : len(plate_list),
+                'sheets'      : sheet_report_list,
+                'utilization' : part_area/(len(sheet_list)*sheet_size[0]*sheet_size[1]),
+                }
+
+    with open(os.path.join(output_dir, REPORT_FILE),'w') as f:
+        json.dump(report, f, indent=4, sort_keys=True)
+    return report
+
+
+def parse_sheet_size(value):
+    """
+    Parse sheet size given as WIDTHxHEIGHT in mm.
+    """
+    try:
+        width, height = [float(x) for x in value.lower().split('x')]
+    except ValueError:
+        raise argparse.ArgumentTypeError('sheet size must be given as WIDTHxHEIGHT, e.g. 600x300')
+    return width, height
+
+# -----------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='nest the flat parts of several enclosures onto laser cutting sheets')
+    parser.add_argument('-n', '--number', type=int, default=5, help='number of enclosures')
+    parser.add_argument('--arrayed', action='store_true', help='use the arrayed enclosure')
+    parser.add_argument('--sheet', type=parse_sheet_size, default=DEFAULT_SHEET_SIZE, help='sheet size WIDTHxHEIGHT in mm')
+    parser.add_argument('--margin', type=float, default=5.0, help='distance of the parts from the sheet edges (mm)')
+    parser.add_argument('--spacing', type=float, default=2.0, help='distance between parts (mm)')
+    parser.add_argument('--output-dir', default='.', help='directory for the dxf files and report')
+    parser.add_argument('--chord-tol', type=float, default=None, help='facet curves to this tolerance (mm) instead of writing exact arcs')
+    args = parser.parse_args()
+
+    if args.arrayed:
+        enclosure = Arrayed_Enclosure(make_arrayed_enclosure.params)
+    else:
+        enclosure = Capillary_Enclosure(make_enclosure.params)
+
+    if not os.path.isdir(args.output_dir):
+        os.makedirs(args.output_dir)
+    make_layouts(
+            enclosure,
+            number_of_enclosures=args.number,
+            arrayed=args.arrayed,
+            sheet_size=args.sheet,
+            margin=args.margin,
+            spacing=args.spacing,
+            output_dir=args.output_dir,
+            chord_tol=args.chord_tol,
+            )
@@ -0,0 +1,304 @@
+"""
+Creates enclosure variants for a parameter sweep.
+
+The sweep is described by a json (or yaml) spec file, e.g.
+
+    {
+        "enclosure"  : "arrayed",
+        "output_dir" : "sweep_output",
+        "native_dxf" : true,
+        "create_dxf" : false,
+        "templates"  : false,
+        "grid"       : {
+            "capillary_diam"    : [1.0, 1.5],
+            "number_of_sensors" : [5, 10],
+            "sensor_spacing"    : [38.1, 50.8]
+        }
+    }
+
+Every combination of the grid values is applied on top of the params of
+make_enclosure.py ("single") or make_arrayed_enclosure.py ("arrayed"). The
+variants are built in a pool of worker processes, each in its own output
+directory together with a manifest.json describing it, and a manifest of the
+whole sweep is written to the top level output directory. Each variant is
+also checked for interfering parts and for overlapping holes or thin webs
+in its panels, which are listed in its manifest.
+
+With "templates" the scad files are rendered from parameterized templates
+(see scad_template.py) instead of making the parts of every variant. Before
+the variants are built, a template of each scad output is compiled for every
+variant that no compiled template matches, i.e. once per combination of the
+values which change the structure of the parts, with the swept params as the
+template slots. Each template is checked against the parts made at the
+corners of the grid range it covers, and outputs whose template differs
+there are made directly instead. The templates are shared with the workers,
+which then only render them. The workers don't make the box either, so the hole
+check only covers the holes added by the enclosure and not the tab slots and
+standoff holes.
+"""
+import os
+import os.path
+import json
+import time
+import argparse
+import itertools
+import traceback
+import multiprocessing
+from dxf_export import convert_to_dxf
+from interference import check_enclosure, get_interferences
+from enclosure_outputs import get_projection_files
+import hole_check
+
+import make_enclosure
+import make_arrayed_enclosure
+from capillary_enclosure import Capillary_Enclosure
+from arrayed_enclosure import Arrayed_Enclosure
+
+ENCLOSURE_TYPES = {
+        'single'  : (Capillary_Enclosure, make_enclosure),
+        'arrayed' : (Arrayed_Enclosure, make_arrayed_enclosure),
+        }
+
+# Templates of the scad outputs in a worker process, see set_template_cache
+template_cache = None
+
+
+def load_spec(filename):
+    """
+    Load sweep spec from a json or yaml file.
+    """
+    base_name, ext = os.path.splitext(filename)
+    with open(filename,'r') as f:
+        if ext.lower() in ('.yaml', '.yml'):
+            import yaml
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    if spec.get('enclosure', 'single') not in ENCLOSURE_TYPES:
+        raise ValueError, 'unknown enclosure type {0}'.format(spec['enclosure'])
+    return spec
+
+
+def get_variant_list(spec):
+    """
+    Get list of param overrides, one dictionary per point of the sweep grid.
+    """
+    grid = spec.get('grid', {})
+    key_list = sorted(grid)
+    value_lists = [grid[key] for key in key_list]
+    variant_list = []
+    for values in itertools.product(*value_lists):
+        variant_list.append(dict(zip(key_list, values)))
+    return variant_list
+
+
+def get_variant_params(base_params, overrides):
+    """
+    Apply overrides to a copy of base_params. Lists are converted to tuples
+    for parameters which are tuples in base_params.
+    """
+    params = dict(base_params)
+    for key, value in overrides.iteritems():
+        if isinstance(value, list) and isinstance(base_params.get(key), tuple):
+            value = tuple(value)
+        params[key] = value
+    return params
+
+
+def compile_templates(spec, variant_list):
+    """
+    Compile the templates of the scad outputs needed by the variants. Only
+    the swept params are template slots. Each template is checked against
+    the parts made at the corners of the grid range it covers, and dropped if
+    they differ, so those variants are rendered directly. Returns the
+    Template_Cache.
+    """
+    from scad_template import Template_Cache
+    enclosure_class, make_module = ENCLOSURE_TYPES[spec.get('enclosure', 'single')]
+    cache = Template_Cache(enclosure_class, slot_keys=sorted(spec.get('grid', {})))
+    output_list = make_module.get_output_list(spec.get('native_dxf', False))
+    scad_outputs = [(method_name, kwargs) for filename, method_name, kwargs in output_list if filename.endswith('.scad')]
+    params_list = [get_variant_params(make_module.params, overrides) for overrides in variant_list]
+    for params in params_list:
+        for method_name, kwargs in scad_outputs:
+            cache.get_template(params, method_name, kwargs)
+    for method_name, kwargs in scad_outputs:
+        cache.verify_templates(params_list, method_name, kwargs)
+    return cache
+
+
+def set_template_cache(cache):
+    """
+    Pool initializer giving each worker its copy of the compiled templates.
+    """
+    global template_cache
+    template_cache = cache
+
+
+def write_template_files(enclosure, params, output_dir, spec):
+    """
+    Write the scad files of a variant from the templates, and the native dxf
+    files from the enclosure. Returns the list of projection scad files.
+    """
+    global template_cache
+    from scad_template import Template_Cache, write_template_outputs
+    enclosure_class, make_module = ENCLOSURE_TYPES[spec.get('enclosure', 'single')]
+    if template_cache is None:
+        template_cache = Template_Cache(enclosure_class)
+    output_list = make_module.get_output_list(spec.get('native_dxf', False))
+    rest_names = write_template_outputs(template_cache, params, output_list, output_dir, fn=make_module.scad_fn)
+    if rest_names:
+        make_module.write_files(
+                enclosure,
+                output_dir=output_dir,
+                native_dxf=spec.get('native_dxf', False),
+                chord_tol=spec.get('chord_tol', None),
+                verbose=False,
+                output_names=rest_names,
+                )
+    return get_projection_files(output_list, output_dir)
+
+
+def build_variant(work):
+    """
+    Build a single variant. work is (index, overrides, spec). Returns the
+    manifest of the variant.
+    """
+    index, overrides, spec = work
+    enclosure_type = spec.get('enclosure', 'single')
+    enclosure_class, make_module = ENCLOSURE_TYPES[enclosure_type]
+    output_dir = os.path.join(spec.get('output_dir', 'sweep_output'), 'variant_{0:04d}'.format(index))
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    manifest = {
+            'index'         : index,
+            'enclosure'     : enclosure_type,
+            'output_dir'    : output_dir,
+            'overrides'     : overrides,
+            'files'         : [],
+            'error'         : None,
+            'interferences' : [],
+            'hole_problems' : [],
+            }
+    t_start = time.time()
+    try:
+        params = get_variant_params(make_module.params, overrides)
+        enclosure = enclosure_class(params)
+        manifest['interferences'] = get_interferences(check_enclosure(enclosure))
+        if not spec.get('templates', False):
+            enclosure.make()
+        hole_problems = hole_check.check_enclosure(enclosure, added_only=spec.get('templates', False))
+        manifest['hole_problems'] = hole_check.get_violations(hole_problems)
+        if spec.get('templates', False):
+            scad_projection_files = write_template_files(enclosure, params, output_dir, spec)
+        else:
+            scad_projection_files = make_module.write_files(
+                    enclosure,
+                    output_dir=output_dir,
+                    native_dxf=spec.get('native_dxf', False),
+                    chord_tol=spec.get('chord_tol', None),
+                    verbose=False,
+                    )
+        # Workers are daemon processes and can't create a pool of their own,
+        # so openscad is run sequentially here.
+        if spec.get('create_dxf', False):
+            for scad_name in scad_projection_files:
+                result = convert_to_dxf(scad_name, openscad=spec.get('openscad', 'openscad'))
+                if result['returncode'] != 0:
+                    raise RuntimeError, 'dxf export failed for {0}: {1}'.format(scad_name, result['stderr'].strip())
+    except Exception:
+        manifest['error'] = traceback.format_exc()
+    manifest['files'] = sorted(os.listdir(output_dir))
+    manifest['time'] = time.time() - t_start
+
+    with open(os.path.join(output_dir, 'manifest.json'),'w') as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+    return manifest
+
+
+def run_sweep(spec, num_workers=None, verbose=True):
+    """
+    Build all variants of the sweep in a process pool. Returns the sweep
+    manifest.
+    """
+    variant_list = get_variant_list(spec)
+    output_dir = spec.get('output_dir', 'sweep_output')
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    if num_workers is None:
+        num_workers = multiprocessing.cpu_count()
+    num_workers = max(1, min(num_workers, len(variant_list)))
+
+    t_start = time.time()
+    manifest_list = []
+    if spec.get('templates', False) and variant_list:
+        cache = compile_templates(spec, variant_list)
+        if verbose:
+            print '{0} templates compiled ({1} rejected) in {2:1.2f}s'.format(cache.num_compiled - cache.num_rejected, cache.num_rejected, cache.compile_time)
+        pool = multiprocessing.Pool(num_workers, initializer=set_template_cache, initargs=(cache,))
+    else:
+        pool = multiprocessing.Pool(num_workers)
+    try:
+        work_list = [(i, overrides, spec) for i, overrides in enumerate(variant_list)]
+        for manifest in pool.imap_unordered(build_variant, work_list):
+            if verbose:
+                if manifest['error'] is not None:
+                    status = 'FAILED'
+                elif manifest['interferences']:
+                    status = 'INTERFERENCE'
+                elif manifest['hole_problems']:
+                    status = 'HOLE_PROBLEMS'
+                else:
+                    status = 'ok'
+                print '{0}  {1:1.2f}s  {2}  {3}'.format(
+                        manifest['output_dir'],
+                        manifest['time'],
+                        status,
+                        json.dumps(manifest['overrides'], sort_keys=True),
+                        )
+            manifest_list.append(manifest)
+    finally:
+        pool.close()
+        pool.join()
+    elapsed = time.time() - t_start
+    manifest_list.sort(key=lambda manifest: manifest['index'])
+
+    num_failed = len([m for m in manifest_list if m['error'] is not None])
+    if elapsed > 0:
+        throughput = 60.0*len(manifest_list)/elapsed
+    else:
+        throughput = float('inf')
+    sweep_manifest = {
+            'spec'                : spec,
+            'num_variants'        : len(manifest_list),
+            'num_failed'          : num_failed,
+            'num_workers'         : num_workers,
+            'time'                : elapsed,
+            'variants_per_minute' : throughput,
+            'variants'            : manifest_list,
+            }
+    with open(os.path.join(output_dir, 'sweep_manifest.json'),'w') as f:
+        json.dump(sweep_manifest, f, indent=4, sort_keys=True)
+
+    if verbose:
+        print '{0} variants ({1} failed) in {2:1.2f}s, {3:1.1f} variants/min'.format(
+                len(manifest_list),
+                num_failed,
+                elapsed,
+                throughput,
+                )
+    return sweep_manifest
+
+# -----------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='create enclosure variants for a parameter sweep')
+    parser.add_argument('spec', help='sweep spec file (json or yaml)')
+    parser.add_argument('-n', '--num-workers', type=int, default=None, help='number of worker processes')
+    args = parser.parse_args()
+
+    spec = load_spec(args.spec)
+    sweep_manifest = run_sweep(spec, num_workers=args.num_workers)
+    if sweep_manifest['num_failed']:
+        raise SystemExit(1)
@@ -0,0 +1,572 @@
+"""
+Native mesh export of the flat parts for 3D printing. The guide plates and
+the capillary clamp are plates with holes and the diffuser standoffs are
+cylinders, so they can be meshed directly instead of rendering the scad files
+with openscad/CGAL: the outline and holes are faceted to a chord tolerance,
+the face is triangulated by ear clipping (with the holes joined to the outline
+by bridge edges) and extruded to the part thickness.
+
+Meshes are written as binary STL, one file per part, or as a single 3MF
+file containing all parts. With --compare-openscad each part is also
+rendered to STL by openscad and the times are printed side by side.
+"""
+import os
+import os.path
+import math
+import struct
+import zipfile
+import numpy
+from dxf_writer import get_arc_points
+
+DEFAULT_CHORD_TOL = 0.01
+EPS = 1.0e-12
+
+STL_DTYPE = numpy.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3,3)),
+    ('attr', '<u2'),
+    ])
+
+
+class Mesh(object):
+
+    def __init__(self, vertices, faces, name=''):
+        self.vertices = numpy.asarray(vertices, dtype=float).reshape(-1,3)
+        self.faces = numpy.asarray(faces, dtype=int).reshape(-1,3)
+        self.name = name
+
+    def __repr__(self):
+        return 'Mesh(vertices=<{0}>, faces=<{1}>, name={2!r})'.format(len(self.vertices), len(self.faces), self.name)
+
+    def translate(self, v):
+        return Mesh(self.vertices + numpy.asarray(v, dtype=float), self.faces, self.name)
+
+    def get_bounding_box(self):
+        return self.vertices.min(axis=0), self.vertices.max(axis=0)
+
+    def get_normals(self):
+        """
+        Returns (m,3) array of unit face normals.
+        """
+        tri = self.vertices[self.faces]
+        normals = numpy.cross(tri[:,1] - tri[:,0], tri[:,2] - tri[:,0])
+        length = numpy.sqrt((normals**2).sum(axis=1))
+        length[length == 0] = 1.0
+        return normals/length[:,numpy.newaxis]
+
+    def get_volume(self):
+        """
+        Enclosed volume, positive if the faces are oriented outwards.
+        """
+        tri = self.vertices[self.faces]
+        return numpy.einsum('ij,ij->i', tri[:,0], numpy.cross(tri[:,1], tri[:,2])).sum()/6.0
+
+
+def get_signed_area(points):
+    x = points[:,0]
+    y = points[:,1]
+    return 0.5*(numpy.dot(x, numpy.roll(y,-1)) - numpy.dot(numpy.roll(x,-1), y))
+
+
+def clean_loop(points, ccw=True):
+    """
+    Remove repeated points and orient the loop counter clockwise (or
+    clockwise if ccw is False). Returns (n,2) array.
+    """
+    points = numpy.asarray(points, dtype=float).reshape(-1,2)
+    keep = numpy.sqrt(((points - numpy.roll(points,1,axis=0))**2).sum(axis=1)) > 1.0e-9
+    points = points[keep]
+    if (get_signed_area(points) > 0) != ccw:
+        points = points[::-1]
+    return points
+
+
+def get_rect_loop(center, size, radius=0.0, chord_tol=DEFAULT_CHORD_TOL):
+    """
+    Points of a rectangle, with corners rounded to radius, counter clockwise.
+    """
+    cx, cy = center
+    sx, sy = size
+    x0, x1 = cx - 0.5*sx, cx + 0.5*sx
+    y0, y1 = cy - 0.5*sy, cy + 0.5*sy
+    r = min(radius, 0.5*sx, 0.5*sy)
+    if r <= 0:
+        return clean_loop([(x0,y0), (x1,y0), (x1,y1), (x0,y1)])
+    corner_list = [
+            ((x1-r, y0+r), 270.0),
+            ((x1-r, y1-r), 0.0),
+            ((x0+r, y1-r), 90.0),
+            ((x0+r, y0+r), 180.0),
+            ]
+    point_list = []
+    for corner, start_angle in corner_list:
+        point_list.extend(get_arc_points(corner, r, start_angle, start_angle + 90.0, chord_tol))
+    return clean_loop(point_list)
+
+
+def get_circle_loop(center, radius, chord_tol=DEFAULT_CHORD_TOL):
+    """
+    Points of a circle, counter clockwise. At least 8 segments are used.
+    """
+    num = max(8, len(get_arc_points(center, radius, 0.0, 360.0, chord_tol)) - 1)
+    angle = numpy.linspace(0.0, 2*math.pi, num, endpoint=False)
+    points = numpy.column_stack((center[0] + radius*numpy.cos(angle), center[1] + radius*numpy.sin(angle)))
+    return clean_loop(points)
+
+
+def get_hole_loop(hole, offset=(0.0,0.0), chord_tol=DEFAULT_CHORD_TOL):
+    """
+    Points of a hole given as hole dictionary, counter clockwise.
+    """
+    x, y = hole['location']
+    center = x + offset[0], y + offset[1]
+    if hole['type'] == 'round':
+        return get_circle_loop(center, 0.5*hole['size'], chord_tol)
+    elif hole['type'] == 'square':
+        return get_rect_loop(center, hole['size'])
+    elif hole['type'] == 'rounded_square':
+        sx, sy, radius = hole['size']
+        return get_rect_loop(center, (sx,sy), radius, chord_tol)
+    else:
+        raise ValueError, 'unknown hole type {0}'.format(hole['type'])
+
+
+def is_convex(a, b, c):
+    return (b[0]-a[0])*(c[1]-a[1]) - (b[1]-a[1])*(c[0]-a[0]) > EPS
+
+
+def is_in_triangle(p, a, b, c):
+    """
+    True if p is inside or on the boundary of the counter clockwise triangle
+    (a,b,c).
+    """
+    d1 = (b[0]-a[0])*(p[1]-a[1]) - (b[1]-a[1])*(p[0]-a[0])
+    d2 = (c[0]-b[0])*(p[1]-b[1]) - (c[1]-b[1])*(p[0]-b[0])
+    d3 = (a[0]-c[0])*(p[1]-c[1]) - (a[1]-c[1])*(p[0]-c[0])
+    return d1 >= -EPS and d2 >= -EPS and d3 >= -EPS
+
+
+def is_in_wedge(a, b, c, p):
+    """
+    True if p is in the interior angle at vertex b of a counter clockwise
+    ring with neighbours a and c.
+    """
+    left_ab = is_convex(a, b, p)
+    left_bc = is_convex(b, c, p)
+    if is_convex(a, b, c):
+        return left_ab and left_bc
+    return left_ab or left_bc
+
+
+def get_cross(a, b, c):
+    return (b[0]-a[0])*(c[1]-a[1]) - (b[1]-a[1])*(c[0]-a[0])
+
+
+class Point_Grid(object):
+    """
+    Uniform grid of the reflex vertices of the ring being clipped, so that an
+    ear is only tested against the vertices in the cells its bounding box
+    covers instead of against all of them.
+    """
+
+    def __init__(self, xy_list, index_list):
+        self.xy_list = xy_list
+        x_list = [p[0] for p in xy_list]
+        y_list = [p[1] for p in xy_list]
+        self.x0 = min(x_list)
+        self.y0 = min(y_list)
+        extent = max(max(x_list) - self.x0, max(y_list) - self.y0)
+        self.size = max(extent/max(1.0, math.sqrt(len(index_list))), EPS)
+        self.cells = {}
+        for k in index_list:
+            self.add(k)
+
+    def get_cell(self, x, y):
+        return int((x - self.x0)/self.size), int((y - self.y0)/self.size)
+
+    def add(self, k):
+        self.cells.setdefault(self.get_cell(*self.xy_list[k]), []).append(k)
+
+    def remove(self, k):
+        self.cells[self.get_cell(*self.xy_list[k])].remove(k)
+
+    def has_point_in_triangle(self, a, b, c):
+        """
+        True if any point of the grid, other than the corners, is inside or
+        on the boundary of the counter clockwise triangle (a,b,c).
+        """
+        x_min, x_max = min(a[0], b[0], c[0]), max(a[0], b[0], c[0])
+        y_min, y_max = min(a[1], b[1], c[1]), max(a[1], b[1], c[1])
+        i0, j0 = self.get_cell(x_min, y_min)
+        i1, j1 = self.get_cell(x_max, y_max)
+        for i in range(i0, i1+1):
+            for j in range(j0, j1+1):
+                for k in self.cells.get((i,j), ()):
+                    p = self.xy_list[k]
+                    if p[0] < x_min or p[0] > x_max or p[1] < y_min or p[1] > y_max:
+                        continue
+                    if p == a or p == b or p == c:
+                        continue
+                    if is_in_triangle(p, a, b, c):
+                        return True
+        return False
+
+
+def bridge_hole(ring, hole, points):
+    """
+    Join a hole (list of vertex indices, clockwise) to the ring (list of
+    vertex indices, counter clockwise) with a bridge from the hole's
+    rightmost vertex to a visible ring vertex. points is the (n,2) array of
+    the vertices. Returns the new ring.
+    """
+    hole_xy = points[hole]
+    m = numpy.lexsort((hole_xy[:,1], -hole_xy[:,0]))[0]
+    mx, my = hole_xy[m]
+
+    # Closest ring edge hit by a ray from the hole vertex in the +x direction.
+    # The ring is counter clockwise so edges seen from the inside go upwards,
+    # which also picks the right copy of vertices already used by a bridge.
+    xy = points[ring]
+    next_xy = numpy.roll(xy, -1, axis=0)
+    ax, ay = xy[:,0], xy[:,1]
+    bx, by = next_xy[:,0], next_xy[:,1]
+    edges = numpy.flatnonzero((ay <= my) & (my <= by) & (ay < by))
+    x_hit = ax[edges] + (my - ay[edges])*(bx[edges] - ax[edges])/(by[edges] - ay[edges])
+    edges, x_hit = edges[x_hit >= mx], x_hit[x_hit >= mx]
+    if not len(edges):
+        raise ValueError, 'hole is not inside the outline'
+    k = edges[numpy.argmin(x_hit)]
+    x_hit = x_hit.min()
+    # Candidate is the edge end point with the larger x
+    if ax[k] > bx[k]:
+        candidate = k
+    else:
+        candidate = (k+1) % len(ring)
+
+    # A reflex ring vertex inside the triangle (hole vertex, hit point,
+    # candidate) would block the bridge, use the one closest in angle instead
+    p_m = (mx, my)
+    p_i = (x_hit, my)
+    p_c = tuple(xy[candidate])
+    if p_c[1] < my:
+        tri = p_m, p_c, p_i
+    else:
+        tri = p_m, p_i, p_c
+    prev_xy = numpy.roll(xy, 1, axis=0)
+    reflex = get_cross_array(prev_xy, xy, next_xy) <= EPS
+    blocking = numpy.flatnonzero(reflex & get_in_triangle_array(xy, *tri))
+    best_angle = None
+    for k in blocking.tolist():
+        if k == candidate:
+            continue
+        p = tuple(xy[k])
+        if not is_in_wedge(tuple(prev_xy[k]), p, tuple(next_xy[k]), p_m):
+            continue
+        angle = abs(math.atan2(p[1] - my, p[0] - mx))
+        dist = math.hypot(p[0] - mx, p[1] - my)
+        if best_angle is None or (angle, dist) < best_angle:
+            best_angle = angle, dist
+            candidate = k
+    hole_order = hole[m:] + hole[:m]
+    return ring[:candidate+1] + hole_order + [hole[m], ring[candidate]] + ring[candidate+1:]
+
+
+def get_cross_array(a, b, c):
+    return (b[:,0]-a[:,0])*(c[:,1]-a[:,1]) - (b[:,1]-a[:,1])*(c[:,0]-a[:,0])
+
+
+def get_in_triangle_array(points, a, b, c):
+    """
+    Boolean array, True for the (n,2) array of points inside or on the
+    boundary of the counter clockwise triangle (a,b,c).
+    """
+    x = points[:,0]
+    y = points[:,1]
+    inside = (b[0]-a[0])*(y-a[1]) - (b[1]-a[1])*(x-a[0]) >= -EPS
+    inside &= (c[0]-b[0])*(y-b[1]) - (c[1]-b[1])*(x-b[0]) >= -EPS
+    inside &= (a[0]-c[0])*(y-c[1]) - (a[1]-c[1])*(x-c[0]) >= -EPS
+    return inside
+
+
+def triangulate(outline, holes=()):
+    """
+    Triangulate a polygon with holes by ear clipping. outline is an (n,2)
+    array of points counter clockwise and holes a list of arrays of points
+    clockwise. Returns (points, triangles) where points is the (n,2) array of
+    all points and triangles an (m,3) array of indices into it, counter
+    clockwise. Raises ValueError if no ear is left to clip, which happens if
+    the outline or holes intersect.
+    """
+    loop_list = [outline] + list(holes)
+    points = numpy.concatenate(loop_list)
+    ring = range(len(outline))
+    start = len(outline)
+    hole_rings = []
+    for hole in holes:
+        hole_rings.append(range(start, start + len(hole)))
+        start += len(hole)
+    hole_rings.sort(key=lambda hole: points[hole,0].max(), reverse=True)
+    for hole in hole_rings:
+        ring = bridge_hole(ring, hole, points)
+
+    # Ear clipping on a linked list of ring positions; a bridged vertex
+    # appears twice in the ring. Only reflex vertices can lie inside an ear,
+    # so only those near it are tested, see Point_Grid. Collinear vertices
+    # are clipped without a triangle.
+    xy_list = points[ring].tolist()
+    n = len(ring)
+    prev_node = [(k-1) % n for k in range(n)]
+    next_node = [(k+1) % n for k in range(n)]
+    reflex = [not is_convex(xy_list[k-1], xy_list[k], xy_list[(k+1) % n]) for k in range(n)]
+    grid = Point_Grid(xy_list, [k for k in range(n) if reflex[k]])
+    triangles = []
+    k = 0
+    num_failed = 0
+    while n > 3:
+        k_prev = prev_node[k]
+        k_next = next_node[k]
+        a, b, c = xy_list[k_prev], xy_list[k], xy_list[k_next]
+        cross = get_cross(a, b, c)
+        if cross > EPS:
+            is_ear = not grid.has_point_in_triangle(a, b, c)
+        else:
+            is_ear = cross >= -EPS
+        if is_ear:
+            if cross > EPS:
+                triangles.append((ring[k_prev], ring[k], ring[k_next]))
+            next_node[k_prev] = k_next
+            prev_node[k_next] = k_prev
+            if reflex[k]:
+                grid.remove(k)
+                reflex[k] = False
+            for j in (k_prev, k_next):
+                is_reflex = not is_convex(xy_list[prev_node[j]], xy_list[j], xy_list[next_node[j]])
+                if is_reflex != reflex[j]:
+                    if is_reflex:
+                        grid.add(j)
+                    else:
+                        grid.remove(j)
+                    reflex[j] = is_reflex
+            n -= 1
+            k = k_prev
+            num_failed = 0
+        else:
+            k = k_next
+            num_failed += 1
+            if num_failed > n:
+                raise ValueError, 'no ear left to clip, the outline or holes intersect'
+    k_prev, k_next = prev_node[k], next_node[k]
+    if is_convex(xy_list[k_prev], xy_list[k], xy_list[k_next]):
+        triangles.append((ring[k_prev], ring[k], ring[k_next]))
+    return points, numpy.array(triangles, dtype=int).reshape(-1,3)
+
+
+def extrude(outline, holes, thickness, name=''):
+    """
+    Extrude a polygon with holes to a closed mesh from z=-thickness/2 to
+    z=thickness/2.
+    """
+    outline = clean_loop(outline, ccw=True)
+    holes = [clean_loop(hole, ccw=False) for hole in holes]
+    points, triangles = triangulate(outline, holes)
+    n = len(points)
+    z0 = -0.5*thickness
+    z1 = 0.5*thickness
+    vertices = numpy.vstack((
+        numpy.column_stack((points, numpy.full(n, z0))),
+        numpy.column_stack((points, numpy.full(n, z1))),
+        ))
+
+    # Top and bottom faces
+    face_list = [triangles + n, triangles[:,::-1]]
+
+    # Side walls, the material is on the left of each loop
+    start = 0
+    for loop in [outline] + holes:
+        idx = numpy.arange(start, start + len(loop))
+        idx_next = numpy.roll(idx, -1)
+        face_list.append(numpy.column_stack((idx, idx_next, idx_next + n)))
+        face_list.append(numpy.column_stack((idx, idx_next + n, idx + n)))
+        start += len(loop)
+    return Mesh(vertices, numpy.vstack(face_list), name)
+
+
+def plate_mesh(plate, thickness, chord_tol=DEFAULT_CHORD_TOL):
+    """
+    Mesh of a Plate_2D extruded to thickness, centered at the plate location.
+    """
+    outline = get_rect_loop(plate.location, (plate.x, plate.y), plate.radius, chord_tol)
+    holes = [get_hole_loop(hole, plate.location, chord_tol) for hole in plate.holes]
+    return extrude(outline, holes, thickness, plate.name)
+
+
+def cylinder_mesh(radius, height, chord_tol=DEFAULT_CHORD_TOL, name=''):
+    """
+    Mesh of a cylinder along z centered at the origin.
+    """
+    return extrude(get_circle_loop((0.0,0.0), radius, chord_tol), [], height, name)
+
+
+def get_part_meshes(enclosure, chord_tol=DEFAULT_CHORD_TOL):
+    """
+    Get meshes of the guide plates, capillary clamp and diffuser standoffs of
+    an enclosure, each centered at the origin.
+    """
+    params = enclosure.params
+    guide_z = params['guide_plate_dimensions'][2]
+    clamp_z = enclosure.get_capillary_clamp_size()[2]
+    plate_list = []
+    for plate in enclosure.get_guide_side_projection_2d(show_ref_cube=False):
+        plate_list.append((plate, guide_z))
+    for plate in enclosure.get_guide_top_projection_2d(show_ref_cube=False):
+        plate_list.append((plate, guide_z))
+    for plate in enclosure.get_clamp_projection_2d(show_ref_cube=False):
+        plate_list.append((plate, clamp_z))
+
+    mesh_list = []
+    for plate, thickness in plate_list:
+        pos_x, pos_y = plate.location
+        plate = plate.translate((-pos_x, -pos_y))
+        mesh_list.append(plate_mesh(plate, thickness, chord_tol))
+    radius = 0.5*params['diffuser_standoff_diam']
+    height = params['diffuser_standoff_height']
+    for name in ('diffuser_standoff_pos', 'diffuser_standoff_neg'):
+        mesh_list.append(cylinder_mesh(radius, height, chord_tol, name))
+    return mesh_list
+
+
+def write_stl(filename, mesh):
+    """
+    Write mesh as binary STL.
+    """
+    data = numpy.zeros(len(mesh.faces), dtype=STL_DTYPE)
+    data['normal'] = mesh.get_normals()
+    data['vertices'] = mesh.vertices[mesh.faces]
+    header = mesh.name[:80].ljust(80, ' ')
+    with open(filename,'wb') as f:
+        f.write(header)
+        f.write(struct.pack('<I', len(data)))
+        f.write(data.tostring())
+
+
+def write_3mf(filename, mesh_list, spacing=5.0):
+    """
+    Write meshes as objects of a single 3MF file. The parts are placed next
+    to each other along x, resting on the build plate.
+    """
+    object_list = []
+    item_list = []
+    x_pos = 0.0
+    for i, mesh in enumerate(mesh_list):
+        lo, hi = mesh.get_bounding_box()
+        vertex_str = '\n'.join('<vertex x="{0:1.6f}" y="{1:1.6f}" z="{2:1.6f}"/>'.format(*v) for v in mesh.vertices.tolist())
+        triangle_str = '\n'.join('<triangle v1="{0}" v2="{1}" v3="{2}"/>'.format(*t) for t in mesh.faces.tolist())
+        object_list.append(
+                '<object id="{0}" name="{1}" type="model"><mesh>\n<vertices>\n{2}\n</vertices>\n'
+                '<triangles>\n{3}\n</triangles>\n</mesh></object>'.format(i+1, mesh.name, vertex_str, triangle_str)
+                )
+        transform = '1 0 0 0 1 0 0 0 1 {0:1.6f} {1:1.6f} {2:1.6f}'.format(x_pos - lo[0], -0.5*(lo[1] + hi[1]), -lo[2])
+        item_list.append('<item objectid="{0}" transform="{1}"/>'.format(i+1, transform))
+        x_pos += hi[0] - lo[0] + spacing
+
+    model = '\n'.join([
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<model unit="millimeter" xml:lang="en-US" xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">',
+        '<resources>',
+        '\n'.join(object_list),
+        '</resources>',
+        '<build>',
+        '\n'.join(item_list),
+        '</build>',
+        '</model>',
+        ])
+    content_types = '\n'.join([
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">',
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>',
+        '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>',
+        '</Types>',
+        ])
+    rels = '\n'.join([
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">',
+        '<Relationship Target="/3D/3dmodel.model" Id="rel0" Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>',
+        '</Relationships>',
+        ])
+    with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED) as f:
+        f.writestr('[Content_Types].xml', content_types)
+        f.writestr('_rels/.rels', rels)
+        f.writestr('3D/3dmodel.model', model)
+
+
+def time_openscad(enclosure, mesh_list, output_dir='.', openscad='openscad', fn=50):
+    """
+    Render the part of each mesh, looked up on the enclosure by mesh name,
+    to stl with openscad for a speed comparison with the native meshes.
+    Returns list of (name, seconds, exit status), the exit status is -1 if
+    openscad couldn't be run.
+    """
+    import time
+    import subprocess
+    from scad_writer import write_scad
+    result_list = []
+    for mesh in mesh_list:
+        scad_name = os.path.join(output_dir, '{0}_openscad.scad'.format(mesh.name))
+        stl_name = os.path.join(output_dir, '{0}_openscad.stl'.format(mesh.name))
+        write_scad(scad_name, [getattr(enclosure, mesh.name)], fn=fn)
+        t_start = time.time()
+        try:
+            proc = subprocess.Popen([openscad, '-o', stl_name, scad_name], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            proc.communicate()
+            returncode = proc.returncode
+        except OSError:
+            returncode = -1
+        result_list.append((mesh.name, time.time() - t_start, returncode))
+    return result_list
+
+
+# -----------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    import argparse
+    parser = argparse.ArgumentParser(description='write meshes of the 3D printable parts')
+    parser.add_argument('--arrayed', action='store_true', help='use the arrayed enclosure params')
+    parser.add_argument('--format', choices=('stl', '3mf'), default='stl', help='one stl file per part or a single 3mf file')
+    parser.add_argument('--chord-tol', type=float, default=DEFAULT_CHORD_TOL, help='facet curves to this tolerance (mm)')
+    parser.add_argument('--output-dir', default='.', help='directory for the mesh files')
+    parser.add_argument('--compare-openscad', action='store_true', help='also render each part with openscad and compare the times')
+    parser.add_argument('--openscad', default='openscad', help='openscad executable for --compare-openscad')
+    args = parser.parse_args()
+
+    import time
+    if args.arrayed:
+        from arrayed_enclosure import Arrayed_Enclosure
+        from make_arrayed_enclosure import params, scad_fn
+        enclosure = Arrayed_Enclosure(params)
+    else:
+        from capillary_enclosure import Capillary_Enclosure
+        from make_enclosure import params, scad_fn
+        enclosure = Capillary_Enclosure(params)
+
+    if not os.path.isdir(args.output_dir):
+        os.makedirs(args.output_dir)
+    t_start = time.time()
+    mesh_list = get_part_meshes(enclosure, args.chord_tol)
+    if args.format == 'stl':
+        for mesh in mesh_list:
+            filename = os.path.join(args.output_dir, '{0}.stl'.format(mesh.name))
+            write_stl(filename, mesh)
+            print '{0}  {1} triangles'.format(filename, len(mesh.faces))
+    else:
+        filename = os.path.join(args.output_dir, 'printed_parts.3mf')
+        write_3mf(filename, mesh_list)
+        print '{0}  {1} parts'.format(filename, len(mesh_list))
+    native_time = time.time() - t_start
+
+    if args.compare_openscad:
+        result_list = time_openscad(enclosure, mesh_list, args.output_dir, args.openscad, scad_fn)
+        for name, seconds, returncode in result_list:
+            print '{0:<24s} openscad {1:1.3f}s  exit {2}'.format(name, seconds, returncode)
+        print 'native {0:1.3f}s for all parts, openscad {1:1.3f}s'.format(native_time, sum(seconds for name, seconds, returncode in result_list))
+        if any(returncode != 0 for name, seconds, returncode in result_list):
+            raise SystemExit, 'openscad failed, its times are not comparable'
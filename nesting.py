@@ -0,0 +1,134 @@
+"""
+Nesting of flat parts onto material sheets for laser cutting. Parts are
+Plate_2D outlines which are packed by their bounding rectangles, tabs
+included, optionally rotated by 90 degrees, using the maximal rectangles
+algorithm with the best short side fit rule. Parts that don't fit on the
+open sheets start a new sheet.
+"""
+
+
+class Sheet(object):
+
+    def __init__(self, width, height, margin=5.0, spacing=2.0):
+        self.width = width
+        self.height = height
+        self.margin = margin
+        self.spacing = spacing
+        self.plate_list = []
+        # Free area, each part is padded by spacing on its top and right side
+        free_w = width - 2*margin + spacing
+        free_h = height - 2*margin + spacing
+        self.free_rects = [(0.0, 0.0, free_w, free_h)]
+
+    def find_position(self, plate, allow_rotation=True):
+        """
+        Find best free position for the plate. Returns (score, x, y, rotate)
+        or None if the plate doesn't fit.
+        """
+        best = None
+        size_x, size_y = plate.get_size()
+        orientation_list = [(size_x, size_y, False)]
+        if allow_rotation and size_x != size_y:
+            orientation_list.append((size_y, size_x, True))
+        for w, h, rotate in orientation_list:
+            w += self.spacing
+            h += self.spacing
+            for fx, fy, fw, fh in self.free_rects:
+                if w > fw or h > fh:
+                    continue
+                score = (min(fw - w, fh - h), max(fw - w, fh - h))
+                if best is None or score < best[0]:
+                    best = (score, fx, fy, rotate)
+        return best
+
+    def place(self, plate, x, y, rotate):
+        """
+        Place plate with the lower left corner of its bounding box at (x,y) of
+        the free area and update the free rectangles.
+        """
+        if rotate:
+            plate = plate.rotate90()
+        min_x, min_y, max_x, max_y = plate.get_bounding_box()
+        w = max_x - min_x + self.spacing
+        h = max_y - min_y + self.spacing
+        self.plate_list.append(plate.translate((self.margin + x - min_x, self.margin + y - min_y)))
+
+        # Split free rectangles overlapping the placed part
+        new_rects = []
+        for fx, fy, fw, fh in self.free_rects:
+            if x >= fx + fw or x + w <= fx or y >= fy + fh or y + h <= fy:
+                new_rects.append((fx, fy, fw, fh))
+                continue
+            if x > fx:
+                new_rects.append((fx, fy, x - fx, fh))
+            if x + w < fx + fw:
+                new_rects.append((x + w, fy, fx + fw - x - w, fh))
+            if y > fy:
+                new_rects.append((fx, fy, fw, y - fy))
+            if y + h < fy + fh:
+                new_rects.append((fx, y + h, fw, fy + fh - y - h))
+
+        # Remove free rectangles contained in others
+        self.free_rects = []
+        for i, rect in enumerate(new_rects):
+            contained = False
+            for j, other in enumerate(new_rects):
+                if i != j and contains(other, rect) and (rect != other or j < i):
+                    contained = True
+                    break
+            if not contained:
+                self.free_rects.append(rect)
+
+    def get_utilization(self):
+        """
+        Fraction of the sheet area covered by part material.
+        """
+        part_area = sum(plate.get_area() for plate in self.plate_list)
+        return part_area/float(self.width*self.height)
+
+
+def contains(outer, inner):
+    ox, oy, ow, oh = outer
+    ix, iy, iw, ih = inner
+    return ix >= ox and iy >= oy and ix + iw <= ox + ow and iy + ih <= oy + oh
+
+
+def get_sort_key(plate):
+    """
+    Plates are packed largest first, by longest side and then by area.
+    """
+    size_x, size_y = plate.get_size()
+    return max(size_x, size_y), size_x*size_y
+
+
+def pack_plates(plate_list, sheet_size, margin=5.0, spacing=2.0, allow_rotation=True):
+    """
+    Pack the plates onto as few sheets of the given size (width, height) as
+    possible. Returns the list of Sheets.
+    """
+    width, height = sheet_size
+    order = sorted(plate_list, key=get_sort_key, reverse=True)
+    sheet_list = []
+    for plate in order:
+        best = None
+        for sheet in sheet_list:
+            position = sheet.find_position(plate, allow_rotation)
+            if position is not None and (best is None or position[0] < best[1][0]):
+                best = sheet, position
+        if best is None:
+            sheet = Sheet(width, height, margin, spacing)
+            position = sheet.find_position(plate, allow_rotation)
+            if position is None:
+                size_x, size_y = plate.get_size()
+                raise ValueError, 'part {0} ({1} x {2}) does not fit on a {3} x {4} sheet'.format(
+                        plate.name,
+                        size_x,
+                        size_y,
+                        width,
+                        height,
+                        )
+            sheet_list.append(sheet)
+            best = sheet, position
+        sheet, (score, x, y, rotate) = best
+        sheet.place(plate, x, y, rotate)
+    return sheet_list
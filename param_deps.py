@@ -0,0 +1,150 @@
+"""
+Dependencies of the enclosure parts and outputs on the params keys, used for
+incremental rebuilds.
+
+Methods declare the params keys they read, and the other methods whose
+results they use, with the depends_on decorator. The keys an output depends
+on are found by following these declarations from the method which creates
+it. A Build_State records a digest of those params values (and of the source
+code) for every output written, so that on the next run only outputs whose
+inputs have changed need to be regenerated.
+"""
+import os
+import os.path
+import json
+import hashlib
+
+# Keys read by py2scad's Basic_Enclosure when making the box panels
+BASE_KEYS = (
+        'inner_dimensions',
+        'wall_thickness',
+        'lid_radius',
+        'top_x_overhang',
+        'top_y_overhang',
+        'bottom_x_overhang',
+        'bottom_y_overhang',
+        'lid2front_tabs',
+        'lid2side_tabs',
+        'side2side_tabs',
+        'lid2front_tab_width',
+        'lid2side_tab_width',
+        'side2side_tab_width',
+        'standoff_diameter',
+        'standoff_offset',
+        'standoff_hole_diameter',
+        'hole_list',
+        )
+
+DEFAULT_STATE_FILE = '.build_state.json'
+
+
+def depends_on(*keys, **kwargs):
+    """
+    Decorator declaring the params keys read by a method and, with the parts
+    keyword, the names of the methods whose results it uses.
+    """
+    parts = tuple(kwargs.pop('parts', ()))
+    if kwargs:
+        raise TypeError, 'unexpected keyword arguments {0}'.format(kwargs.keys())
+    def decorator(func):
+        func.param_keys = tuple(keys)
+        func.part_methods = parts
+        return func
+    return decorator
+
+
+def get_param_keys(obj, method_name):
+    """
+    Get the set of params keys the given method of obj depends on, directly
+    or through the methods it uses. Returns None, meaning all keys, if any
+    method on the way has no declared dependencies.
+    """
+    key_set = set()
+    done = set()
+    todo = [method_name]
+    while todo:
+        name = todo.pop()
+        if name in done:
+            continue
+        done.add(name)
+        method = getattr(type(obj), name, None)
+        try:
+            key_set.update(method.param_keys)
+            todo.extend(method.part_methods)
+        except AttributeError:
+            return None
+    return key_set
+
+
+def get_params_digest(params, keys, extra=''):
+    """
+    Get digest of the values of the given params keys (all keys if keys is
+    None) together with an extra string, e.g. the options of the output.
+    """
+    if keys is None:
+        keys = params.keys()
+    value_list = [(key, params.get(key)) for key in sorted(keys)]
+    digest = hashlib.sha1()
+    digest.update(json.dumps(value_list, sort_keys=True, default=repr))
+    digest.update('\0{0}'.format(extra))
+    return digest.hexdigest()
+
+
+def get_method_digest(obj, method_name, extra=''):
+    """
+    Get digest of the params values the given method of obj depends on.
+    """
+    keys = get_param_keys(obj, method_name)
+    return get_params_digest(obj.params, keys, extra)
+
+
+def get_code_digest(module_list):
+    """
+    Get digest of the source files of the given modules, or file names, so
+    that outputs are rebuilt when the code which generates them changes.
+    """
+    digest = hashlib.sha1()
+    for module in module_list:
+        filename = getattr(module, '__file__', module)
+        base_name, ext = os.path.splitext(filename)
+        if ext in ('.pyc', '.pyo'):
+            filename = base_name + '.py'
+        with open(filename,'r') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class Build_State(object):
+
+    def __init__(self, filename=DEFAULT_STATE_FILE, code_digest=''):
+        self.filename = filename
+        self.code_digest = code_digest
+        self.digests = {}
+        if os.path.isfile(filename):
+            with open(filename,'r') as f:
+                try:
+                    state = json.load(f)
+                except ValueError:
+                    state = {}
+            if state.get('code_digest') == code_digest:
+                self.digests = state.get('digests', {})
+
+    def is_stale(self, name, digest, file_list=()):
+        """
+        An output is stale if the digest of its inputs changed or if any of
+        its files is missing.
+        """
+        if self.digests.get(name) != digest:
+            return True
+        return not all(os.path.isfile(filename) for filename in file_list)
+
+    def update(self, name, digest):
+        self.digests[name] = digest
+
+    def save(self):
+        state = {
+                'code_digest' : self.code_digest,
+                'digests'     : self.digests,
+                }
+        with open(self.filename,'w') as f:
+            json.dump(state, f, indent=4, sort_keys=True)
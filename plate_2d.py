@@ -0,0 +1,174 @@
+"""
+Analytic 2D outlines of the flat parts of the enclosure. A Plate_2D is a
+(possibly rounded) rectangle with a list of holes given in the same dictionary
+format as the enclosure hole lists, i.e. with 'type', 'location' and 'size'
+keys where type is 'round', 'square' or 'rounded_square'. The tabs of the
+tabbed box panels are given as (edge, offset, width, depth) tuples, where edge
+is 'top', 'bottom', 'left' or 'right' and offset is the position of the tab
+center along the edge from the plate center.
+"""
+import math
+
+INCH2MM = 25.4
+
+EDGES = ('top', 'bottom', 'left', 'right')
+
+# Edge, and the sign of the tab offset along it, of each edge after a
+# rotation by 90 degrees counterclockwise
+ROTATE90_EDGES = {
+        'right'  : ('top', -1),
+        'top'    : ('left', 1),
+        'left'   : ('bottom', -1),
+        'bottom' : ('right', 1),
+        }
+
+
+class Plate_2D(object):
+
+    def __init__(self, x, y, holes=None, radius=0.0, location=(0.0,0.0), name='', tabs=None):
+        self.x = x
+        self.y = y
+        if holes is None:
+            holes = []
+        self.holes = holes
+        if tabs is None:
+            tabs = []
+        self.tabs = tabs
+        self.radius = radius
+        self.location = location
+        self.name = name
+
+    def __repr__(self):
+        return 'Plate_2D({0}, {1}, holes=<{2}>, radius={3}, location={4}, name={5!r}, tabs=<{6}>)'.format(
+                self.x,
+                self.y,
+                len(self.holes),
+                self.radius,
+                self.location,
+                self.name,
+                len(self.tabs),
+                )
+
+    def translate(self, v):
+        """
+        Returns a copy of the plate translated by v = (x,y).
+        """
+        pos_x, pos_y = self.location
+        location = pos_x + v[0], pos_y + v[1]
+        return Plate_2D(self.x, self.y, self.holes, self.radius, location, self.name, self.tabs)
+
+    def rotate90(self):
+        """
+        Returns a copy of the plate rotated by 90 degrees about its center.
+        """
+        hole_list = []
+        for hole in self.holes:
+            hole_new = hole.copy()
+            x, y = hole['location']
+            hole_new['location'] = -y, x
+            if hole['type'] == 'square':
+                sx, sy = hole['size']
+                hole_new['size'] = sy, sx
+            elif hole['type'] == 'rounded_square':
+                sx, sy, radius = hole['size']
+                hole_new['size'] = sy, sx, radius
+            hole_list.append(hole_new)
+        tab_list = []
+        for edge, offset, width, depth in self.tabs:
+            edge_new, sign = ROTATE90_EDGES[edge]
+            tab_list.append((edge_new, sign*offset, width, depth))
+        return Plate_2D(self.y, self.x, hole_list, self.radius, self.location, self.name, tab_list)
+
+    def get_area(self):
+        """
+        Returns area of the plate material, i.e. the outline minus the holes.
+        """
+        area = self.x*self.y - (4 - math.pi)*self.radius**2
+        for edge, offset, width, depth in self.tabs:
+            area += width*depth
+        for hole in self.holes:
+            if hole['type'] == 'round':
+                area -= 0.25*math.pi*hole['size']**2
+            elif hole['type'] == 'square':
+                sx, sy = hole['size']
+                area -= sx*sy
+            else:
+                sx, sy, radius = hole['size']
+                area -= sx*sy - (4 - math.pi)*radius**2
+        return area
+
+    def get_bounding_box(self):
+        """
+        Returns (min_x, min_y, max_x, max_y) of the plate outline, including
+        the tabs.
+        """
+        pos_x, pos_y = self.location
+        depth = dict((edge, 0.0) for edge in EDGES)
+        for edge, offset, width, tab_depth in self.tabs:
+            depth[edge] = max(depth[edge], tab_depth)
+        return (
+                pos_x - 0.5*self.x - depth['left'],
+                pos_y - 0.5*self.y - depth['bottom'],
+                pos_x + 0.5*self.x + depth['right'],
+                pos_y + 0.5*self.y + depth['top'],
+                )
+
+    def get_size(self):
+        """
+        Returns (x,y) size of the bounding box of the plate outline.
+        """
+        min_x, min_y, max_x, max_y = self.get_bounding_box()
+        return max_x - min_x, max_y - min_y
+
+    def get_outline(self):
+        """
+        Returns the points of the outline of a plate with square corners,
+        including the tabs, counterclockwise from the lower left corner.
+        """
+        pos_x, pos_y = self.location
+        hx, hy = 0.5*self.x, 0.5*self.y
+        # Corner, edge direction and outward normal of each edge in order
+        edge_list = [
+                ('bottom', (-hx,-hy), (1,0), (0,-1)),
+                ('right', (hx,-hy), (0,1), (1,0)),
+                ('top', (hx,hy), (-1,0), (0,1)),
+                ('left', (-hx,hy), (0,-1), (-1,0)),
+                ]
+        point_list = []
+        for edge, (cx, cy), (dx, dy), (nx, ny) in edge_list:
+            point_list.append((pos_x + cx, pos_y + cy))
+            tab_list = [tab for tab in self.tabs if tab[0] == edge]
+            tab_list.sort(key=lambda tab: (dx + dy)*tab[1])
+            for edge, offset, width, depth in tab_list:
+                if dx != 0:
+                    tx, ty = offset, cy
+                else:
+                    tx, ty = cx, offset
+                for s, d in ((-1,0), (-1,depth), (1,depth), (1,0)):
+                    x = tx + s*0.5*width*dx + d*nx
+                    y = ty + s*0.5*width*dy + d*ny
+                    point_list.append((pos_x + x, pos_y + y))
+        return point_list
+
+
+def round_holes(hole_tuples):
+    """
+    Converts a list of (x, y, diameter) hole tuples, as used by plate_w_holes,
+    to a list of round hole dictionaries.
+    """
+    hole_list = []
+    for x, y, diam in hole_tuples:
+        hole = {
+                'type'     : 'round',
+                'location' : (x,y),
+                'size'     : diam,
+                }
+        hole_list.append(hole)
+    return hole_list
+
+
+def ref_square(location=(0.0,0.0)):
+    """
+    Returns the outline of the one inch reference cube used in the layouts.
+    """
+    return Plate_2D(INCH2MM, INCH2MM, location=location, name='ref_cube')
@@ -0,0 +1,59 @@
+"""
+OpenSCAD module definitions and calls. These let an assembly define a part
+once and place it many times with a transform per instance, instead of
+repeating the part's whole subtree for every instance. A Multmatrix places
+a part, or a module call, with a single 4x4 matrix (see transforms.py).
+"""
+
+
+class SCAD_Module(object):
+
+    def __init__(self, name, obj_list):
+        self.name = name
+        if not isinstance(obj_list, (list, tuple)):
+            obj_list = [obj_list]
+        self.obj_list = obj_list
+
+    def __str__(self):
+        return ''.join(self.iter_scad())
+
+    def iter_scad(self):
+        """
+        Generator yielding the module definition one body object at a time.
+        """
+        yield 'module {0}() {{\n'.format(self.name)
+        for obj in self.obj_list:
+            line_list = ['    {0}\n'.format(line) for line in str(obj).splitlines()]
+            yield ''.join(line_list)
+        yield '}\n'
+
+
+class Module_Call(object):
+
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return '{0}();\n'.format(self.name)
+
+
+class Multmatrix(object):
+
+    def __init__(self, obj, matrix, rgba=None):
+        """
+        Place obj with a 4x4 transformation matrix given as nested lists,
+        optionally colored with rgba.
+        """
+        self.obj = obj
+        self.matrix = matrix
+        self.rgba = rgba
+
+    def __str__(self):
+        row_list = ['[{0}]'.format(', '.join(repr(float(value)) for value in row)) for row in self.matrix]
+        head = 'multmatrix([{0}])'.format(', '.join(row_list))
+        if self.rgba is not None:
+            head = 'color([{0}]) {1}'.format(', '.join(repr(float(value)) for value in self.rgba), head)
+        if isinstance(self.obj, Module_Call):
+            return '{0} {1}'.format(head, self.obj)
+        line_list = ['    {0}\n'.format(line) for line in str(self.obj).splitlines()]
+        return '{0} {{\n{1}}}\n'.format(head, ''.join(line_list))
@@ -0,0 +1,571 @@
+"""
+Parameterized scad templates of the enclosure outputs. A part is rendered to
+scad text once, and the numbers in the text are split from the rest of it.
+Each params value the part depends on, or each component of a tuple value
+such as 'guide_plate_dimensions', is a slot of the template. The slots are
+probed by rendering the part again with one value changed at a time, which
+gives the coefficients of every number in the slot values, and once more
+with all of them changed to check the coefficients. Slots which change the
+structure of the text (e.g. the number of holes) are kept fixed, and if the
+check fails the slots are probed on the other side of their values as well
+to find and fix those the numbers don't depend on affinely.
+
+A variant which only differs in slot values is then rendered by substituting
+the values into the template, which is string level work instead of making
+the parts and building their csg tree:
+
+    cache = Template_Cache(Capillary_Enclosure)
+    text = cache.render(params, 'get_diffuser_projection', {})
+
+A template can also be written as an OpenSCAD module with an argument per
+slot key, in which each number is an expression of the arguments.
+
+Templates are exact for parts whose numbers are affine functions of the slot
+values, which compile_template checks at a second set of probe values. A
+variant far from the compiled values could still cross a branch in the
+enclosure code which the probes didn't, so templates are meant for sweeps
+over a range of dimensions rather than arbitrary params, and a sweep checks
+them against the parts made at the corners of its range first (see
+Template_Cache.verify_templates).
+"""
+import re
+import copy
+import time
+import argparse
+import os.path
+import numpy
+from param_deps import get_param_keys, get_params_digest
+from scad_writer import iter_scad
+
+NUMBER_RE = re.compile(r'(?<![\w.$])[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+# Size of the probe steps relative to the slot values, and tolerance of the
+# check that the numbers are affine in the slot values.
+PROBE_STEP = 0.1
+TOLERANCE = 1.0e-6
+
+
+def split_numbers(text):
+    """
+    Split text into (skeleton, tokens) where tokens is the list of numbers in
+    the text and skeleton the list of the text pieces around them, so that
+    skeleton has one more item than tokens.
+    """
+    skeleton = []
+    tokens = []
+    pos = 0
+    for match in NUMBER_RE.finditer(text):
+        skeleton.append(text[pos:match.start()])
+        tokens.append(match.group())
+        pos = match.end()
+    skeleton.append(text[pos:])
+    return skeleton, tokens
+
+
+def join_numbers(skeleton, tokens):
+    text_list = [skeleton[0]]
+    for token, text in zip(tokens, skeleton[1:]):
+        text_list.append(token)
+        text_list.append(text)
+    return ''.join(text_list)
+
+
+def format_number(value):
+    value = round(value, 9)
+    if value == 0:
+        value = 0.0
+    return repr(value)
+
+
+def format_scad_value(value):
+    if isinstance(value, (tuple, list)):
+        return '[{0}]'.format(', '.join(format_scad_value(item) for item in value))
+    return repr(value)
+
+
+def is_number(value):
+    return isinstance(value, (int, long, float)) and not isinstance(value, bool)
+
+
+def is_slot_value(value):
+    """
+    Params values which can be template slots: floats and tuples of numbers.
+    Integers on their own are usually counts, which change the structure of
+    the parts, and are kept fixed.
+    """
+    if isinstance(value, float):
+        return True
+    if isinstance(value, (tuple, list)):
+        return len(value) > 0 and all(is_number(item) for item in value)
+    return False
+
+
+def get_slot_list(params, keys):
+    """
+    Get list of (key, index) slots of the given keys, with index None for
+    scalar values.
+    """
+    slot_list = []
+    for key in keys:
+        value = params[key]
+        if isinstance(value, (tuple, list)):
+            slot_list.extend((key, index) for index in range(len(value)))
+        else:
+            slot_list.append((key, None))
+    return slot_list
+
+
+def get_slot_value(params, slot):
+    key, index = slot
+    if index is None:
+        return params[key]
+    return params[key][index]
+
+
+def set_slot_values(params, slot_values):
+    """
+    Returns copy of params with the values of the given (slot, value) pairs
+    replaced.
+    """
+    params = dict(params)
+    for (key, index), value in slot_values:
+        if index is None:
+            params[key] = value
+        else:
+            value_list = list(params[key])
+            value_list[index] = value
+            params[key] = tuple(value_list)
+    return params
+
+
+def get_slot_name(slot):
+    key, index = slot
+    if index is None:
+        return key
+    return '{0}[{1}]'.format(key, index)
+
+
+def get_scad_text(enclosure_class, params, method_name, kwargs):
+    """
+    Returns (enclosure, text) of the parts made by the given method, without
+    the $fn header.
+    """
+    enclosure = enclosure_class(params)
+    parts = getattr(enclosure, method_name)(**kwargs)
+    return enclosure, ''.join(iter_scad(parts))
+
+
+def get_numbers(enclosure_class, params, method_name, kwargs, skeleton):
+    """
+    Get array of the numbers in the text of the parts made with params, or
+    None if the text doesn't fit skeleton.
+    """
+    enclosure, text = get_scad_text(enclosure_class, params, method_name, kwargs)
+    skeleton_new, tokens = split_numbers(text)
+    if skeleton_new != skeleton:
+        return None
+    return numpy.array([float(token) for token in tokens])
+
+
+def is_close(numbers, expected):
+    return numbers is not None and numpy.allclose(numbers, expected, rtol=TOLERANCE, atol=TOLERANCE)
+
+
+class Part_Template(object):
+
+    def __init__(self, name, skeleton, tokens, slot_list, slot_values, coeffs, keys, params):
+        self.name = name
+        self.skeleton = skeleton
+        self.tokens = tokens
+        self.base = numpy.array([float(token) for token in tokens])
+        self.slot_list = slot_list
+        self.slot_base = list(slot_values)
+        self.slot_values = numpy.array(slot_values, dtype=float)
+        self.coeffs = coeffs
+        self.keys = sorted(keys)
+        self.varying = numpy.flatnonzero(numpy.abs(coeffs).max(axis=1) > 1.0e-12) if coeffs.size else numpy.zeros(0, dtype=int)
+        # Slots none of the numbers depend on aren't module arguments
+        slot_keys = set(key for (key, index), column in zip(slot_list, coeffs.T) if numpy.abs(column).max() > 1.0e-12)
+        self.defaults = [(key, params[key]) for key in sorted(slot_keys)]
+        self.fixed_values = copy.deepcopy(self.get_fixed_values(params))
+
+    def __repr__(self):
+        return 'Part_Template({0!r}, {1} numbers, {2} slots)'.format(self.name, len(self.tokens), len(self.slot_list))
+
+    def get_fixed_values(self, params):
+        """
+        Values params has for the keys the part depends on, apart from the
+        slot values.
+        """
+        params = set_slot_values(params, zip(self.slot_list, self.slot_base))
+        return [params.get(key) for key in self.keys]
+
+    def matches(self, params):
+        """
+        True if params differ from the compiled params only in slot values.
+        """
+        return self.get_fixed_values(params) == self.fixed_values
+
+    def get_numbers(self, params):
+        values = numpy.array([get_slot_value(params, slot) for slot in self.slot_list], dtype=float)
+        if not len(values):
+            return self.base.copy()
+        return self.base + numpy.dot(self.coeffs, values - self.slot_values)
+
+    def render(self, params):
+        """
+        Get scad text of the part for params by substituting the slot values.
+        """
+        numbers = self.get_numbers(params)
+        token_list = list(self.tokens)
+        for i in self.varying:
+            token_list[i] = format_number(numbers[i])
+        return join_numbers(self.skeleton, token_list)
+
+    def get_expression(self, i):
+        """
+        Get number i as an OpenSCAD expression of the slots.
+        """
+        term_list = []
+        const = self.base[i]
+        for coeff, slot, value in zip(self.coeffs[i], self.slot_list, self.slot_values):
+            if abs(coeff) < 1.0e-12:
+                continue
+            const -= coeff*value
+            if round(abs(coeff), 9) == 1:
+                term = get_slot_name(slot)
+            else:
+                term = '{0}*{1}'.format(format_number(abs(coeff)), get_slot_name(slot))
+            if coeff < 0:
+                term_list.append(' - {0}'.format(term))
+            else:
+                term_list.append(' + {0}'.format(term))
+        if round(const, 9) != 0:
+            expression = format_number(const) + ''.join(term_list)
+        elif term_list[0].startswith(' - '):
+            expression = '-' + ''.join(term_list)[3:]
+        else:
+            expression = ''.join(term_list)[3:]
+        return '({0})'.format(expression)
+
+    def get_module_text(self, module_name=None):
+        """
+        Get the template as an OpenSCAD module with an argument, defaulting
+        to the compiled value, for each slot key.
+        """
+        if module_name is None:
+            module_name = self.name
+        token_list = list(self.tokens)
+        for i in self.varying:
+            token_list[i] = self.get_expression(i)
+        body = join_numbers(self.skeleton, token_list)
+        arg_list = ['{0}={1}'.format(key, format_scad_value(value)) for key, value in self.defaults]
+        line_list = ['    {0}\n'.format(line) for line in body.splitlines()]
+        return 'module {0}({1}) {{\n{2}}}\n'.format(module_name, ', '.join(arg_list), ''.join(line_list))
+
+
+def compile_template(enclosure_class, params, method_name, kwargs=None, keys=None, name=None):
+    """
+    Compile template of the parts made by the given method of an enclosure
+    created with params. The slots are the values of the float and tuple
+    valued params keys the method depends on, only of the given keys if
+    keys isn't None. Raises ValueError if the numbers aren't affine in the
+    slot values.
+    """
+    if kwargs is None:
+        kwargs = {}
+    if name is None:
+        name = method_name.replace('get_', '', 1)
+    enclosure, text = get_scad_text(enclosure_class, params, method_name, kwargs)
+    skeleton, tokens = split_numbers(text)
+    base = numpy.array([float(token) for token in tokens])
+
+    dep_keys = get_param_keys(enclosure, method_name)
+    if dep_keys is None:
+        dep_keys = set(params)
+    if keys is None:
+        keys = dep_keys
+    keys = [key for key in keys if key in dep_keys and is_slot_value(params.get(key))]
+
+    # Probe the slots one at a time. One probe per slot gives the
+    # coefficients, the joint check below tells whether they hold together.
+    slot_list = []
+    slot_values = []
+    coeff_list = []
+    for slot in get_slot_list(params, sorted(keys)):
+        value = get_slot_value(params, slot)
+        step = PROBE_STEP*max(abs(value), 1.0)
+        numbers_pos = get_numbers(enclosure_class, set_slot_values(params, [(slot, value + step)]), method_name, kwargs, skeleton)
+        if numbers_pos is None:
+            continue
+        slot_list.append(slot)
+        slot_values.append(value)
+        coeff_list.append((numbers_pos - base)/step)
+    template = make_template(name, skeleton, tokens, slot_list, slot_values, coeff_list, dep_keys, params)
+    if check_template(template, enclosure_class, params, method_name, kwargs):
+        return template
+
+    # Some slot isn't affine, probe each slot on the other side of the
+    # compiled value too and keep only those which are
+    affine = []
+    for slot, value, coeff in zip(slot_list, slot_values, coeff_list):
+        step = PROBE_STEP*max(abs(value), 1.0)
+        numbers_neg = get_numbers(enclosure_class, set_slot_values(params, [(slot, value - step)]), method_name, kwargs, skeleton)
+        if is_close(numbers_neg, base - coeff*step):
+            affine.append((slot, value, coeff))
+    slot_list = [slot for slot, value, coeff in affine]
+    slot_values = [value for slot, value, coeff in affine]
+    coeff_list = [coeff for slot, value, coeff in affine]
+    template = make_template(name, skeleton, tokens, slot_list, slot_values, coeff_list, dep_keys, params)
+    if not check_template(template, enclosure_class, params, method_name, kwargs):
+        raise ValueError, '{0} is not affine in its slot values'.format(method_name)
+    return template
+
+
+def make_template(name, skeleton, tokens, slot_list, slot_values, coeff_list, keys, params):
+    if coeff_list:
+        coeffs = numpy.array(coeff_list).T
+    else:
+        coeffs = numpy.zeros((len(tokens), 0))
+    return Part_Template(name, skeleton, tokens, slot_list, slot_values, coeffs, keys, params)
+
+
+def check_template(template, enclosure_class, params, method_name, kwargs):
+    """
+    Check the template against the parts made with all slots changed
+    together, by steps which differ per slot.
+    """
+    check_values = []
+    for i, (slot, value) in enumerate(zip(template.slot_list, template.slot_base)):
+        check_values.append((slot, value - 0.5*PROBE_STEP*max(abs(value), 1.0)*(1.0 + 0.1*(i%7))))
+    if not check_values:
+        return True
+    check_params = set_slot_values(params, check_values)
+    numbers = get_numbers(enclosure_class, check_params, method_name, kwargs, template.skeleton)
+    return is_close(numbers, template.get_numbers(check_params))
+
+
+def get_corner_params(params_list, keys):
+    """
+    Get the params of params_list at the corners of the range they span in
+    the given keys, i.e. with the value of every key at its minimum or
+    maximum.
+    """
+    get_value = lambda params, key: tuple(params[key]) if isinstance(params[key], (tuple, list)) else params[key]
+    bounds = {}
+    for key in keys:
+        value_list = [get_value(params, key) for params in params_list]
+        bounds[key] = min(value_list), max(value_list)
+    return [params for params in params_list if all(get_value(params, key) in bounds[key] for key in keys)]
+
+
+def get_output_key(method_name, kwargs):
+    return method_name, repr(sorted(kwargs.items()))
+
+
+def compile_output_template(enclosure_class, params, method_name, kwargs=None, keys=None, name=None):
+    """
+    Compile template of an output. Returns (template, compile time) where
+    template is None if the output isn't affine in its slot values.
+    """
+    t_start = time.time()
+    try:
+        template = compile_template(enclosure_class, params, method_name, kwargs, keys, name)
+    except ValueError:
+        template = None
+    return template, time.time() - t_start
+
+
+class Template_Cache(object):
+    """
+    Compiled templates of the outputs of an enclosure class. If slot_keys is
+    given, e.g. the keys a sweep varies, only those params are template slots
+    and a template matches only params equal in all other keys, which needs
+    far fewer probes to compile.
+    """
+
+    def __init__(self, enclosure_class, slot_keys=None):
+        self.enclosure_class = enclosure_class
+        self.slot_keys = slot_keys
+        self.templates = {}
+        self.failed = set()
+        self.num_compiled = 0
+        self.num_rejected = 0
+        self.compile_time = 0.0
+
+    def get_fail_key(self, params, method_name, kwargs):
+        """
+        Key under which params failed to compile, which ignores the slot
+        values.
+        """
+        fixed_keys = [key for key, value in params.iteritems() if not self.is_slot_key(key, value)]
+        return get_output_key(method_name, kwargs), get_params_digest(params, fixed_keys)
+
+    def is_slot_key(self, key, value):
+        if self.slot_keys is not None and key not in self.slot_keys:
+            return False
+        return is_slot_value(value)
+
+    def find_template(self, params, method_name, kwargs=None):
+        """
+        Get the compiled template of the output matching params, or None.
+        """
+        for template in self.templates.get(get_output_key(method_name, kwargs or {}), ()):
+            if template.matches(params):
+                return template
+        return None
+
+    def is_compiled(self, params, method_name, kwargs=None):
+        """
+        True if a template of the output matching params has been compiled,
+        or has failed to compile.
+        """
+        if self.find_template(params, method_name, kwargs) is not None:
+            return True
+        return self.get_fail_key(params, method_name, kwargs or {}) in self.failed
+
+    def add_template(self, params, method_name, kwargs, template, compile_time=0.0):
+        """
+        Add a template of the output compiled for params, e.g. in another
+        process. template is None if compiling failed.
+        """
+        self.compile_time += compile_time
+        if template is None:
+            self.failed.add(self.get_fail_key(params, method_name, kwargs or {}))
+        else:
+            self.num_compiled += 1
+            self.templates.setdefault(get_output_key(method_name, kwargs or {}), []).append(template)
+
+    def verify_template(self, params, method_name, kwargs=None):
+        """
+        Check the template matching params against the parts made with
+        params. A template which differs is dropped, so the output is made
+        directly for all params it matched. Returns False if it was dropped.
+        """
+        if kwargs is None:
+            kwargs = {}
+        template = self.find_template(params, method_name, kwargs)
+        if template is None:
+            return True
+        t_start = time.time()
+        numbers = get_numbers(self.enclosure_class, params, method_name, kwargs, template.skeleton)
+        self.compile_time += time.time() - t_start
+        if is_close(numbers, template.get_numbers(params)):
+            return True
+        self.templates[get_output_key(method_name, kwargs)].remove(template)
+        self.failed.add(self.get_fail_key(params, method_name, kwargs))
+        self.num_rejected += 1
+        return False
+
+    def verify_templates(self, params_list, method_name, kwargs=None):
+        """
+        Check the templates of the output at the corners of the params of
+        params_list each of them matches. The probes only cover the compiled
+        values, and params across a branch of the enclosure code (e.g. a
+        shift changing sign, or a different number of holes) would otherwise
+        be rendered wrong. Returns the number of templates dropped.
+        """
+        group_dict = {}
+        for params in params_list:
+            template = self.find_template(params, method_name, kwargs)
+            if template is not None:
+                group_dict.setdefault(id(template), (template, []))[1].append(params)
+        num_rejected = 0
+        for template, group in group_dict.itervalues():
+            keys = sorted(set(key for key, index in template.slot_list))
+            for params in get_corner_params(group, keys):
+                if not self.verify_template(params, method_name, kwargs):
+                    num_rejected += 1
+                    break
+        return num_rejected
+
+    def get_template(self, params, method_name, kwargs=None, name=None):
+        """
+        Get a template of the given output matching params, compiling one if
+        there is none. Returns None if the output can't be compiled.
+        """
+        if kwargs is None:
+            kwargs = {}
+        template = self.find_template(params, method_name, kwargs)
+        if template is not None or self.get_fail_key(params, method_name, kwargs) in self.failed:
+            return template
+        template, compile_time = compile_output_template(self.enclosure_class, params, method_name, kwargs, self.slot_keys, name)
+        self.add_template(params, method_name, kwargs, template, compile_time)
+        return template
+
+    def render(self, params, method_name, kwargs=None):
+        """
+        Get scad text of the given output for params, from a template if
+        possible or else by making the parts.
+        """
+        template = self.get_template(params, method_name, kwargs)
+        if template is None:
+            enclosure, text = get_scad_text(self.enclosure_class, params, method_name, kwargs or {})
+            return text
+        return template.render(params)
+
+
+def write_template_outputs(cache, params, output_list, output_dir='.', fn=50, output_names=None):
+    """
+    Write the scad files of output_list, or only those in output_names if
+    given, from the templates in cache. Returns the names of the outputs
+    which weren't written, i.e. the dxf files.
+    """
+    rest_names = []
+    for filename, method_name, kwargs in output_list:
+        if output_names is not None and filename not in output_names:
+            continue
+        if not filename.endswith('.scad'):
+            rest_names.append(filename)
+            continue
+        text = cache.render(params, method_name, kwargs)
+        with open(os.path.join(output_dir,filename),'w') as f:
+            if fn is not None:
+                f.write('$fn = {0};\n'.format(fn))
+            f.write(text)
+    return rest_names
+
+
+def write_template_modules(cache, params, output_list, output_dir='.', fn=50, verbose=True):
+    """
+    Write each scad output of output_list as a parameterized OpenSCAD module
+    to <name>_template.scad.
+    """
+    for filename, method_name, kwargs in output_list:
+        if not filename.endswith('.scad'):
+            continue
+        base_name = os.path.splitext(filename)[0]
+        t_start = time.time()
+        template = cache.get_template(params, method_name, kwargs, name=base_name)
+        if template is None:
+            if verbose:
+                print '{0}: not affine in its params, no template'.format(filename)
+            continue
+        path = os.path.join(output_dir, '{0}_template.scad'.format(base_name))
+        with open(path,'w') as f:
+            if fn is not None:
+                f.write('$fn = {0};\n'.format(fn))
+            f.write(template.get_module_text())
+            f.write('\n{0}();\n'.format(base_name))
+        if verbose:
+            print '{0}  {1} slots  {2} of {3} numbers  {4:1.2f}s'.format(
+                    path,
+                    len(template.slot_list),
+                    len(template.varying),
+                    len(template.tokens),
+                    time.time() - t_start,
+                    )
+
+# -----------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    from make_sweep import ENCLOSURE_TYPES
+
+    parser = argparse.ArgumentParser(description='write parameterized scad templates of the enclosure outputs')
+    parser.add_argument('enclosure', choices=sorted(ENCLOSURE_TYPES), help='enclosure type')
+    parser.add_argument('-o', '--output-dir', default='.', help='directory for the template files')
+    args = parser.parse_args()
+
+    enclosure_class, make_module = ENCLOSURE_TYPES[args.enclosure]
+    cache = Template_Cache(enclosure_class)
+    write_template_modules(cache, make_module.params, make_module.get_output_list(), args.output_dir, fn=make_module.scad_fn)
@@ -0,0 +1,61 @@
+"""
+Streaming writer for scad files. SCAD_Prog builds the text of the whole
+program in memory before writing it. write_scad instead walks the part list
+and writes the text of each top level object (and of each object in a module
+body) as soon as it has been generated, so the memory used while writing
+depends on the size of the largest single part rather than on the number of
+parts in the assembly.
+"""
+DEFAULT_CHUNK_SIZE = 2**16
+
+
+def iter_scad(obj):
+    """
+    Generator yielding the scad text of obj, or of each object in obj if it
+    is a list, in pieces. Objects with an iter_scad method, such as modules,
+    are streamed by it, other objects are converted with str.
+    """
+    if isinstance(obj, (list, tuple)):
+        for item in obj:
+            for text in iter_scad(item):
+                yield text
+    elif hasattr(obj, 'iter_scad'):
+        for text in obj.iter_scad():
+            yield text
+    else:
+        text = str(obj)
+        if not text.endswith('\n'):
+            text += '\n'
+        yield text
+
+
+def iter_scad_prog(part_list, fn=None):
+    """
+    Generator yielding the text of a scad program containing the parts.
+    """
+    if fn is not None:
+        yield '$fn = {0};\n'.format(fn)
+    for text in iter_scad(part_list):
+        yield text
+
+
+def write_scad(filename, part_list, fn=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Write scad program containing the parts to filename. Text is written in
+    chunks of about chunk_size bytes. Returns the number of bytes written.
+    """
+    num_bytes = 0
+    buf = []
+    buf_size = 0
+    with open(filename,'w') as f:
+        for text in iter_scad_prog(part_list, fn):
+            buf.append(text)
+            buf_size += len(text)
+            if buf_size >= chunk_size:
+                f.write(''.join(buf))
+                num_bytes += buf_size
+                buf = []
+                buf_size = 0
+        f.write(''.join(buf))
+        num_bytes += buf_size
+    return num_bytes
@@ -0,0 +1,175 @@
+"""
+Opt-in profiling of the enclosure build stages. A Stage_Profiler wraps the
+make, make_* and get_*projection* methods (and get_assembly) of an enclosure
+instance and records the wall time, the number of calls and the number of
+CSG nodes created by each. Other blocks of code, such as writing scad files,
+can be timed with the stage context manager. While attached a cProfile
+profile is also collected which can be saved with dump_stats.
+
+    profiler = Stage_Profiler(enclosure)
+    profiler.attach()
+    enclosure.make()
+    projection = enclosure.get_box_projection()
+    with profiler.stage('scad_write'):
+        prog.write('box_projection.scad')
+    profiler.detach()
+    profiler.print_report()
+    profiler.dump_stats('enclosure.prof')
+"""
+import time
+import fnmatch
+import cProfile
+import contextlib
+
+DEFAULT_PATTERNS = ('make', 'make_*', 'get_*projection*', 'get_assembly')
+
+
+class Stage_Profiler(object):
+
+    def __init__(self, enclosure, patterns=DEFAULT_PATTERNS, count_nodes=True):
+        self.enclosure = enclosure
+        self.patterns = patterns
+        self.count_nodes = count_nodes
+        self.stats = {}
+        self.wrapped_names = []
+        self.profile = cProfile.Profile()
+        self.overhead = 0.0
+
+    def get_method_names(self):
+        name_list = []
+        for name in dir(self.enclosure):
+            if name.startswith('_'):
+                continue
+            if not any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns):
+                continue
+            if callable(getattr(type(self.enclosure), name, None)):
+                name_list.append(name)
+        return name_list
+
+    def attach(self):
+        """
+        Wrap the matching methods of the enclosure instance and start the
+        cProfile profile.
+        """
+        for name in self.get_method_names():
+            method = getattr(self.enclosure, name)
+            setattr(self.enclosure, name, self.wrap(name, method))
+            self.wrapped_names.append(name)
+        self.profile.enable()
+
+    def detach(self):
+        """
+        Stop profiling and restore the original methods.
+        """
+        self.profile.disable()
+        for name in self.wrapped_names:
+            delattr(self.enclosure, name)
+        self.wrapped_names = []
+
+    def wrap(self, name, method):
+        def wrapper(*args, **kwargs):
+            if self.count_nodes:
+                attr_before = dict(vars(self.enclosure))
+            overhead_start = self.overhead
+            t_start = time.time()
+            rtn_value = method(*args, **kwargs)
+            t_stop = time.time()
+            # Node counting in nested calls is not part of this stage's time
+            elapsed = t_stop - t_start - (self.overhead - overhead_start)
+            num_nodes = 0
+            if self.count_nodes:
+                self.profile.disable()
+                num_nodes = self.count_new_nodes(attr_before, rtn_value)
+                self.profile.enable()
+                self.overhead += time.time() - t_stop
+            self.add_stat(name, elapsed, num_nodes)
+            return rtn_value
+        wrapper.__name__ = name
+        wrapper.__doc__ = method.__doc__
+        return wrapper
+
+    def count_new_nodes(self, attr_before, rtn_value):
+        """
+        Count nodes reachable from the return value and from attributes set
+        by the call which were not reachable from the attributes before it.
+        """
+        old_ids = set()
+        for value in attr_before.itervalues():
+            get_node_ids(value, old_ids)
+        new_ids = set()
+        for name, value in vars(self.enclosure).iteritems():
+            if name in self.wrapped_names:
+                continue
+            if attr_before.get(name) is not value:
+                get_node_ids(value, new_ids)
+        get_node_ids(rtn_value, new_ids)
+        return len(new_ids - old_ids)
+
+    def add_stat(self, name, elapsed, num_nodes=0):
+        stat = self.stats.setdefault(name, {'name': name, 'calls': 0, 'time': 0.0, 'csg_nodes': 0})
+        stat['calls'] += 1
+        stat['time'] += elapsed
+        stat['csg_nodes'] += num_nodes
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Context manager for timing an arbitrary stage, e.g. writing scad files.
+        """
+        overhead_start = self.overhead
+        t_start = time.time()
+        try:
+            yield
+        finally:
+            elapsed = time.time() - t_start - (self.overhead - overhead_start)
+            self.add_stat(name, elapsed)
+
+    def get_report(self):
+        """
+        Returns list of stage statistics sorted by decreasing time. Times are
+        inclusive, i.e. make includes the time of the make_* methods it calls.
+        """
+        report = [dict(stat) for stat in self.stats.itervalues()]
+        report.sort(key=lambda stat: stat['time'], reverse=True)
+        return report
+
+    def print_report(self):
+        print '{0:<36s} {1:>6s} {2:>10s} {3:>10s}'.format('stage', 'calls', 'time (s)', 'csg nodes')
+        for stat in self.get_report():
+            print '{0:<36s} {1:>6d} {2:>10.4f} {3:>10d}'.format(
+                    stat['name'],
+                    stat['calls'],
+                    stat['time'],
+                    stat['csg_nodes'],
+                    )
+
+    def dump_stats(self, filename):
+        """
+        Save cProfile profile, readable with pstats or snakeviz.
+        """
+        self.profile.dump_stats(filename)
+
+
+def is_csg_node(obj):
+    return type(obj).__module__.split('.')[0] in ('py2scad', 'scad_module')
+
+
+def get_node_ids(obj, id_set):
+    """
+    Add ids of all CSG nodes reachable from obj to id_set.
+    """
+    stack = [obj]
+    seen = set()
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.itervalues())
+        elif is_csg_node(obj):
+            id_set.add(id(obj))
+            stack.extend(vars(obj).itervalues())
+    return id_set
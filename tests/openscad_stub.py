@@ -0,0 +1,26 @@
+"""
+Stub openscad scripts for the tests, so that they run without openscad.
+"""
+import os.path
+import stat
+
+# Writes a minimal dxf to the file given with -x, like openscad -x out in
+STUB_OK = """#!/bin/sh
+printf '0\\nSECTION\\n2\\nENTITIES\\n0\\nENDSEC\\n0\\nEOF\\n' > "$2"
+"""
+
+STUB_FAIL = """#!/bin/sh
+echo "ERROR: Current top level object is not a 2D object." >&2
+exit 1
+"""
+
+
+def write_stub(bin_dir, text):
+    """
+    Write an executable openscad stub script to bin_dir. Returns its path.
+    """
+    filename = os.path.join(bin_dir, 'openscad')
+    with open(filename,'w') as f:
+        f.write(text)
+    os.chmod(filename, os.stat(filename).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return filename
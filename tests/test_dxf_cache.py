@@ -0,0 +1,95 @@
+"""
+Tests of the dxf cache, and of its use by the dxf export with a stub openscad
+script on the PATH.
+"""
+import os
+import os.path
+import shutil
+import tempfile
+import unittest
+from dxf_cache import DXF_Cache
+from dxf_export import export_dxf
+from openscad_stub import STUB_OK, STUB_FAIL, write_stub
+
+
+class DXF_Cache_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.bin_dir = os.path.join(self.tmp_dir, 'bin')
+        os.mkdir(self.bin_dir)
+        self.path = os.environ.get('PATH', '')
+        os.environ['PATH'] = os.pathsep.join([self.bin_dir, self.path])
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+
+    def tearDown(self):
+        os.environ['PATH'] = self.path
+        shutil.rmtree(self.tmp_dir)
+
+    def write_file(self, name, text):
+        filename = os.path.join(self.tmp_dir, name)
+        with open(filename,'w') as f:
+            f.write(text)
+        return filename
+
+    def test_miss(self):
+        cache = DXF_Cache(self.cache_dir)
+        scad_name = self.write_file('part.scad', 'cube([1,1,1]);\n')
+        dxf_name = os.path.join(self.tmp_dir, 'part.dxf')
+        key = cache.get_key(scad_name, fn=50)
+        self.assertFalse(cache.fetch(key, dxf_name))
+        self.assertFalse(os.path.exists(dxf_name))
+
+    def test_hit(self):
+        cache = DXF_Cache(self.cache_dir)
+        scad_name = self.write_file('part.scad', 'cube([1,1,1]);\n')
+        dxf_name = self.write_file('part.dxf', 'dxf text')
+        key = cache.get_key(scad_name, fn=50)
+        cache.store(key, dxf_name)
+        os.remove(dxf_name)
+        self.assertTrue(cache.fetch(key, dxf_name))
+        with open(dxf_name,'r') as f:
+            self.assertEqual(f.read(), 'dxf text')
+
+    def test_key(self):
+        cache = DXF_Cache(self.cache_dir)
+        scad_name = self.write_file('part.scad', 'cube([1,1,1]);\n')
+        other_name = self.write_file('other.scad', 'cube([1,1,1]);\n')
+        key = cache.get_key(scad_name, fn=50)
+        self.assertEqual(cache.get_key(other_name, fn=50), key)
+        self.assertNotEqual(cache.get_key(scad_name, fn=20), key)
+        self.write_file('other.scad', 'cube([2,1,1]);\n')
+        self.assertNotEqual(cache.get_key(other_name, fn=50), key)
+
+    def test_eviction(self):
+        cache = DXF_Cache(self.cache_dir, max_size=35)
+        dxf_name = self.write_file('part.dxf', 10*'x')
+        for i, key in enumerate(('a', 'b', 'c')):
+            cache.store(key, dxf_name)
+            os.utime(cache.get_path(key), (1000 + i, 1000 + i))
+        self.assertTrue(all(os.path.isfile(cache.get_path(key)) for key in ('a', 'b', 'c')))
+
+        # Using an entry makes it the most recently used one
+        self.assertTrue(cache.fetch('a', os.path.join(self.tmp_dir, 'copy.dxf')))
+        cache.store('d', dxf_name)
+        self.assertTrue(os.path.isfile(cache.get_path('a')))
+        self.assertFalse(os.path.isfile(cache.get_path('b')))
+        self.assertTrue(os.path.isfile(cache.get_path('c')))
+        self.assertTrue(os.path.isfile(cache.get_path('d')))
+
+    def test_export_uses_cache(self):
+        write_stub(self.bin_dir, STUB_OK)
+        cache = DXF_Cache(self.cache_dir)
+        scad_name = self.write_file('part.scad', 'projection(cut=true) cube([1,1,1]);\n')
+        results = export_dxf([scad_name], num_workers=1, verbose=False, cache=cache, fn=50)
+        self.assertFalse(results[0]['cached'])
+
+        # The failing stub isn't run for a cached file
+        write_stub(self.bin_dir, STUB_FAIL)
+        results = export_dxf([scad_name], num_workers=1, verbose=False, cache=cache, fn=50)
+        self.assertTrue(results[0]['cached'])
+        self.assertTrue(os.path.isfile(results[0]['dxf']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Tests of the dxf export with a stub openscad script on the PATH.
+"""
+import os
+import os.path
+import shutil
+import tempfile
+import unittest
+from dxf_export import convert_to_dxf, export_dxf, get_dxf_name
+from openscad_stub import STUB_OK, STUB_FAIL, write_stub
+
+
+class Dxf_Export_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.bin_dir = os.path.join(self.tmp_dir, 'bin')
+        os.mkdir(self.bin_dir)
+        self.path = os.environ.get('PATH', '')
+        os.environ['PATH'] = os.pathsep.join([self.bin_dir, self.path])
+        self.scad_files = []
+        for name in ('box_projection.scad', 'diffuser_projection.scad'):
+            scad_name = os.path.join(self.tmp_dir, name)
+            with open(scad_name,'w') as f:
+                f.write('projection(cut=true) cube([1,1,1]);\n')
+            self.scad_files.append(scad_name)
+
+    def tearDown(self):
+        os.environ['PATH'] = self.path
+        shutil.rmtree(self.tmp_dir)
+
+    def test_convert_success(self):
+        write_stub(self.bin_dir, STUB_OK)
+        result = convert_to_dxf(self.scad_files[0])
+        self.assertEqual(result['returncode'], 0)
+        self.assertEqual(result['dxf'], get_dxf_name(self.scad_files[0]))
+        self.assertTrue(os.path.isfile(result['dxf']))
+
+    def test_export_success(self):
+        write_stub(self.bin_dir, STUB_OK)
+        results = export_dxf(self.scad_files, num_workers=2, verbose=False)
+        self.assertEqual([result['scad'] for result in results], self.scad_files)
+        for result in results:
+            self.assertEqual(result['returncode'], 0)
+            self.assertFalse(result['cached'])
+            self.assertTrue(os.path.isfile(result['dxf']))
+
+    def test_convert_failure(self):
+        write_stub(self.bin_dir, STUB_FAIL)
+        result = convert_to_dxf(self.scad_files[0])
+        self.assertEqual(result['returncode'], 1)
+        self.assertIn('not a 2D object', result['stderr'])
+
+    def test_export_failure(self):
+        write_stub(self.bin_dir, STUB_FAIL)
+        with self.assertRaises(RuntimeError) as context:
+            export_dxf(self.scad_files, num_workers=2, verbose=False)
+        msg = str(context.exception)
+        self.assertIn('failed for 2 file(s)', msg)
+        self.assertIn('box_projection.scad (exit 1)', msg)
+
+    def test_missing_binary(self):
+        openscad = os.path.join(self.bin_dir, 'openscad')
+        result = convert_to_dxf(self.scad_files[0], openscad=openscad)
+        self.assertEqual(result['returncode'], -1)
+        self.assertFalse(os.path.exists(result['dxf']))
+        with self.assertRaises(RuntimeError):
+            export_dxf(self.scad_files, openscad=openscad, num_workers=1, verbose=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
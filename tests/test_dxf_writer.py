@@ -0,0 +1,162 @@
+"""
+Tests of the native dxf writer.
+"""
+import math
+import os.path
+import shutil
+import tempfile
+import unittest
+from plate_2d import Plate_2D
+from dxf_writer import DXF_Writer, write_dxf, get_segment_count, get_arc_points
+
+R12_ENTITIES = set(['LINE', 'ARC', 'CIRCLE'])
+
+
+def get_pairs(text):
+    line_list = text.splitlines()
+    return [(int(code), value) for code, value in zip(line_list[0::2], line_list[1::2])]
+
+
+def get_entity_types(text):
+    return [value for code, value in get_pairs(text) if code == 0 and value not in ('SECTION', 'ENDSEC', 'EOF')]
+
+
+def get_entities(text):
+    """
+    Returns list of (entity type, dictionary of group code values).
+    """
+    entity_list = []
+    for code, value in get_pairs(text):
+        if code == 0:
+            entity_list.append((value, {}))
+        elif entity_list:
+            entity_list[-1][1][code] = value
+    return [(entity_type, values) for entity_type, values in entity_list if entity_type in R12_ENTITIES]
+
+
+def get_sagitta(radius, p0, p1):
+    chord = math.hypot(p1[0] - p0[0], p1[1] - p0[1])
+    return radius - math.sqrt(radius**2 - 0.25*chord**2)
+
+
+class DXF_Writer_Test(unittest.TestCase):
+
+    def test_structure(self):
+        writer = DXF_Writer()
+        writer.add_line((0,0), (1,2))
+        pairs = get_pairs(str(writer))
+        self.assertEqual(pairs[:2], [(0, 'SECTION'), (2, 'ENTITIES')])
+        self.assertEqual(pairs[-2:], [(0, 'ENDSEC'), (0, 'EOF')])
+        self.assertEqual(pairs[2:-2], [
+            (0, 'LINE'), (8, '0'),
+            (10, '0.000000'), (20, '0.000000'), (30, '0.000000'),
+            (11, '1.000000'), (21, '2.000000'), (31, '0.000000'),
+            ])
+
+    def test_rounded_rect(self):
+        writer = DXF_Writer()
+        writer.add_rect((0,0), (10,6), radius=1.0)
+        self.assertEqual(get_entity_types(str(writer)), 4*['LINE', 'ARC'])
+
+    def test_polyline(self):
+        writer = DXF_Writer()
+        writer.add_polyline([(0,0), (1,0), (1,1)])
+        self.assertEqual(get_entity_types(str(writer)), 3*['LINE'])
+        writer = DXF_Writer()
+        writer.add_polyline([(0,0), (1,0), (1,1)], closed=False)
+        self.assertEqual(get_entity_types(str(writer)), 2*['LINE'])
+
+    def test_plates_only_r12_entities(self):
+        hole_list = [
+                {'type': 'round', 'location': (-10.0,0.0), 'size': 3.0},
+                {'type': 'square', 'location': (0.0,0.0), 'size': (4.0,2.0)},
+                {'type': 'rounded_square', 'location': (10.0,0.0), 'size': (4.0,4.0,1.0)},
+                ]
+        tabs = [('top', 0.0, 8.0, 3.0), ('left', 2.0, 4.0, 3.0)]
+        plate_list = [
+                Plate_2D(40.0, 20.0, hole_list, radius=2.0),
+                Plate_2D(30.0, 20.0, hole_list, location=(50.0,0.0), tabs=tabs),
+                ]
+        for chord_tol in (None, 0.05):
+            tmp_dir = tempfile.mkdtemp()
+            try:
+                filename = os.path.join(tmp_dir, 'plates.dxf')
+                write_dxf(filename, plate_list, chord_tol=chord_tol)
+                with open(filename,'r') as f:
+                    text = f.read()
+            finally:
+                shutil.rmtree(tmp_dir)
+            type_set = set(get_entity_types(text))
+            self.assertTrue(type_set <= R12_ENTITIES, type_set)
+            if chord_tol is None:
+                self.assertEqual(type_set, R12_ENTITIES)
+            else:
+                self.assertEqual(type_set, set(['LINE']))
+
+    def test_enclosure_projections(self):
+        from capillary_enclosure import Capillary_Enclosure
+        from make_enclosure import params
+        enclosure = Capillary_Enclosure(params)
+        for method_name in ('get_box_projection_2d', 'get_guide_top_projection_2d', 'get_clamp_projection_2d'):
+            writer = DXF_Writer()
+            for plate in getattr(enclosure, method_name)():
+                writer.add_plate(plate)
+            type_set = set(get_entity_types(str(writer)))
+            self.assertTrue(type_set <= R12_ENTITIES, (method_name, type_set))
+
+    def test_clamp_holes_are_circles(self):
+        from capillary_enclosure import Capillary_Enclosure
+        from make_enclosure import params
+        enclosure = Capillary_Enclosure(params)
+        plate = enclosure.get_clamp_projection_2d(show_ref_cube=False)[0]
+        hole_tuples = enclosure.get_capillary_clamp_holes()
+        writer = DXF_Writer()
+        writer.add_plate(plate)
+        circle_list = [values for entity_type, values in get_entities(str(writer)) if entity_type == 'CIRCLE']
+        self.assertEqual(len(circle_list), len(hole_tuples))
+        for values, (x, y, diam) in zip(circle_list, hole_tuples):
+            self.assertAlmostEqual(float(values[10]), x, places=6)
+            self.assertAlmostEqual(float(values[20]), y, places=6)
+            self.assertAlmostEqual(float(values[40]), 0.5*diam, places=6)
+
+    def test_faceted_circle(self):
+        radius = 2.5
+        chord_tol = 0.01
+        writer = DXF_Writer(chord_tol=chord_tol)
+        writer.add_circle((1.0,-1.0), radius)
+        entity_list = get_entities(str(writer))
+        self.assertEqual(set(entity_type for entity_type, values in entity_list), set(['LINE']))
+        self.assertEqual(len(entity_list), get_segment_count(radius, 360.0, chord_tol))
+        for entity_type, values in entity_list:
+            p0 = float(values[10]) - 1.0, float(values[20]) + 1.0
+            p1 = float(values[11]) - 1.0, float(values[21]) + 1.0
+            self.assertAlmostEqual(math.hypot(*p0), radius, places=5)
+            self.assertTrue(get_sagitta(radius, p0, p1) <= chord_tol + 1.0e-6)
+
+    def test_segment_count(self):
+        for radius in (0.5, 1.5, 10.0, 100.0):
+            for angle in (90.0, 180.0, 360.0):
+                for chord_tol in (0.001, 0.01, 0.1):
+                    num = get_segment_count(radius, angle, chord_tol)
+                    point_list = get_arc_points((0.0,0.0), radius, 0.0, angle, chord_tol)
+                    self.assertEqual(len(point_list), num + 1)
+                    for p0, p1 in zip(point_list[:-1], point_list[1:]):
+                        self.assertTrue(get_sagitta(radius, p0, p1) <= chord_tol*(1 + 1.0e-9))
+
+                    # One segment less would exceed the tolerance
+                    if num > 1:
+                        half_angle = 0.5*math.radians(angle)/(num - 1)
+                        self.assertTrue(radius*(1 - math.cos(half_angle)) > chord_tol)
+
+    def test_segment_count_large_tolerance(self):
+        self.assertEqual(get_segment_count(1.0, 360.0, 2.0), 3)
+        self.assertEqual(get_segment_count(1.0, 90.0, 2.0, min_segments=2), 2)
+        self.assertRaises(ValueError, get_segment_count, 1.0, 90.0, 0.0)
+
+    def test_unknown_hole_type(self):
+        writer = DXF_Writer()
+        self.assertRaises(ValueError, writer.add_hole, {'type': 'oval', 'location': (0,0), 'size': 1.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
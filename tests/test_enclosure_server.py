@@ -0,0 +1,116 @@
+"""
+Round trip tests of the enclosure server through the Client, on a unix
+socket, with a stub openscad converting the projections.
+"""
+import os
+import os.path
+import shutil
+import tempfile
+import time
+import threading
+import unittest
+from enclosure_server import make_server, Client
+from openscad_stub import STUB_OK, STUB_FAIL, write_stub
+
+# Converts like STUB_OK, after a while
+STUB_SLOW = """#!/bin/sh
+sleep 0.5
+printf '0\\nSECTION\\n2\\nENTITIES\\n0\\nENDSEC\\n0\\nEOF\\n' > "$2"
+"""
+
+
+class Enclosure_Server_Test(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.openscad = write_stub(cls.tmp_dir, STUB_OK)
+        socket_path = os.path.join(cls.tmp_dir, 'server.sock')
+        cls.server = make_server(socket_path=socket_path, num_workers=1, verbose=False, openscad=cls.openscad)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, kwargs={'poll_interval': 0.05})
+        cls.thread.daemon = True
+        cls.thread.start()
+        cls.client = Client(socket_path=socket_path)
+        cls.server_timeout = cls.server.timeout
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.server.close_pool()
+        shutil.rmtree(cls.tmp_dir)
+
+    def setUp(self):
+        write_stub(self.tmp_dir, STUB_OK)
+
+    def test_projection_converted(self):
+        outputs = ['enclosure_assembly.scad', 'diffuser_projection.scad']
+        files = self.client.generate(params={'capillary_diam': 1.2}, outputs=outputs)
+        self.assertEqual(sorted(files), ['diffuser_projection.dxf', 'diffuser_projection.scad', 'enclosure_assembly.scad'])
+        self.assertIn('ENTITIES', files['diffuser_projection.dxf'])
+        self.assertTrue(files['enclosure_assembly.scad'].startswith('$fn'))
+
+    def test_no_dxf(self):
+        files = self.client.generate(outputs=['diffuser_projection.scad'], create_dxf=False)
+        self.assertEqual(sorted(files), ['diffuser_projection.scad'])
+
+    def test_native_dxf(self):
+        # Flat parts with a native dxf output aren't passed to openscad
+        write_stub(self.tmp_dir, STUB_FAIL)
+        outputs = ['diffuser_projection.scad', 'diffuser_projection.dxf']
+        files = self.client.generate(outputs=outputs, native_dxf=True)
+        self.assertEqual(sorted(files), sorted(outputs))
+        self.assertIn('CIRCLE', files['diffuser_projection.dxf'])
+
+    def test_openscad_failure(self):
+        write_stub(self.tmp_dir, STUB_FAIL)
+        with self.assertRaises(RuntimeError) as context:
+            self.client.generate(outputs=['top_guide_projection.scad'])
+        self.assertIn('not a 2D object', str(context.exception))
+
+    def test_unknown_output(self):
+        with self.assertRaises(RuntimeError) as context:
+            self.client.generate(outputs=['missing.scad'])
+        self.assertIn('server error 400', str(context.exception))
+
+    def test_status(self):
+        status = self.client.get_status()
+        self.assertEqual(status['workers'], 1)
+        self.assertEqual(status['queued'], 0)
+
+    def test_status_counts(self):
+        # Failed requests aren't counted as served
+        status = self.client.get_status()
+        self.client.generate(outputs=['diffuser_projection.scad'], create_dxf=False)
+        write_stub(self.tmp_dir, STUB_FAIL)
+        self.assertRaises(RuntimeError, self.client.generate, outputs=['top_guide_projection.scad'])
+        new_status = self.client.get_status()
+        self.assertEqual(new_status['served'], status['served'] + 1)
+        self.assertEqual(new_status['failed'], status['failed'] + 1)
+        self.assertEqual(new_status['timed_out'], status['timed_out'])
+
+    def test_timeout(self):
+        write_stub(self.tmp_dir, STUB_SLOW)
+        status = self.client.get_status()
+        self.server.timeout = 0.1
+        try:
+            with self.assertRaises(RuntimeError) as context:
+                self.client.generate(outputs=['top_guide_projection.scad'])
+        finally:
+            self.server.timeout = self.server_timeout
+        self.assertIn('server error 503', str(context.exception))
+
+        # The timed out request still runs in the worker until it is done
+        new_status = self.client.get_status()
+        self.assertEqual(new_status['timed_out'], status['timed_out'] + 1)
+        self.assertEqual(new_status['served'], status['served'])
+        self.assertEqual(new_status['abandoned'], 1)
+        for i in range(100):
+            if self.client.get_status()['abandoned'] == 0:
+                break
+            time.sleep(0.05)
+        self.assertEqual(self.client.get_status()['abandoned'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
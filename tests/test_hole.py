@@ -0,0 +1,83 @@
+"""
+Tests of the Hole records and of the Hole_Registry lookup by panel and type.
+"""
+import copy
+import pickle
+import unittest
+from hole import Hole, Hole_Registry, to_hole
+
+HOLE_LIST = [
+        Hole('top', 'round', (0.0,0.0), 2.0),
+        {'panel': 'bottom', 'type': 'square', 'location': (1.0,1.0), 'size': (2.0,3.0)},
+        Hole('top', 'square', (5.0,0.0), (1.0,1.0)),
+        Hole('bottom', 'round', (-5.0,0.0), 1.5),
+        Hole('top', 'round', (0.0,5.0), 2.0),
+        ]
+
+
+class Hole_Test(unittest.TestCase):
+
+    def test_dict_access(self):
+        hole = Hole('top', 'round', (1.0,2.0), 3.0)
+        self.assertEqual(hole['panel'], 'top')
+        self.assertEqual(dict(hole), {'panel': 'top', 'type': 'round', 'location': (1.0,2.0), 'size': 3.0})
+        hole['size'] = 4.0
+        self.assertEqual(hole.size, 4.0)
+        self.assertRaises(KeyError, hole.__getitem__, 'depth')
+        self.assertEqual(hole.get('depth', 1.0), 1.0)
+
+    def test_equality(self):
+        hole = Hole('top', 'round', (1.0,2.0), 3.0)
+        self.assertEqual(hole, {'panel': 'top', 'type': 'round', 'location': (1.0,2.0), 'size': 3.0})
+        self.assertEqual(to_hole(dict(hole)), hole)
+        self.assertNotEqual(hole.copy(size=2.0), hole)
+        self.assertNotEqual(hole, 'top')
+
+    def test_copy_and_pickle(self):
+        hole = Hole('top', 'round', (1.0,2.0), 3.0)
+        self.assertEqual(copy.deepcopy(hole), hole)
+        self.assertEqual(pickle.loads(pickle.dumps(hole, 2)), hole)
+
+
+class Hole_Registry_Test(unittest.TestCase):
+
+    def test_lookup_by_panel(self):
+        registry = Hole_Registry(HOLE_LIST)
+        self.assertEqual(len(registry), 5)
+        self.assertEqual(registry.get_panels(), ['bottom', 'top'])
+        self.assertEqual(registry.get_holes('top'), [HOLE_LIST[0], HOLE_LIST[2], HOLE_LIST[4]])
+        self.assertEqual(registry.get_holes('bottom'), [HOLE_LIST[1], HOLE_LIST[3]])
+        self.assertEqual(registry.get_holes('left'), [])
+
+    def test_lookup_by_type(self):
+        registry = Hole_Registry(HOLE_LIST)
+        self.assertEqual(registry.get_holes('top', 'round'), [HOLE_LIST[0], HOLE_LIST[4]])
+        self.assertEqual(registry.get_holes('bottom', 'square'), [HOLE_LIST[1]])
+        self.assertEqual(registry.get_holes('bottom', 'rounded_square'), [])
+        self.assertEqual(registry.get_holes(hole_type='round'), [HOLE_LIST[0], HOLE_LIST[3], HOLE_LIST[4]])
+        self.assertEqual(registry.get_holes(), HOLE_LIST)
+
+    def test_add(self):
+        registry = Hole_Registry(HOLE_LIST[:2])
+        hole = Hole('top', 'round', (9.0,9.0), 1.0)
+        registry.add(hole)
+        self.assertEqual(registry.get_holes('top', 'round'), [HOLE_LIST[0], hole])
+        self.assertEqual(list(registry), HOLE_LIST[:2] + [hole])
+
+        # The returned lists are copies
+        registry.get_holes('top').append(hole)
+        self.assertEqual(len(registry.get_holes('top')), 2)
+
+    def test_copy(self):
+        registry = Hole_Registry(HOLE_LIST)
+        registry_copy = registry.copy()
+        registry_copy.add(Hole('left', 'round', (0.0,0.0), 1.0))
+        registry_copy.add(Hole('top', 'round', (9.0,9.0), 1.0))
+        self.assertEqual(registry.get_panels(), ['bottom', 'top'])
+        self.assertEqual(len(registry.get_holes('top', 'round')), 2)
+        self.assertEqual(len(registry_copy.get_holes('top', 'round')), 3)
+        self.assertEqual(len(registry), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Tests of the replication of hole patterns with hole arrays.
+"""
+import unittest
+from hole import Hole
+from hole_array import get_hole_arrays, replicate_hole_arrays, hole_arrays_to_list
+
+HOLE_LIST = [
+        {'panel': 'bottom', 'type': 'round', 'location': (1.0,2.0), 'size': 3.0},
+        {'panel': 'bottom', 'type': 'square', 'location': (-4.0,0.0), 'size': (2.0,1.0)},
+        {'panel': 'bottom', 'type': 'round', 'location': (0.0,-1.0), 'size': 0.5},
+        ]
+
+OFFSETS = [(0.0,0.0), (10.0,0.0), (0.0,20.0)]
+
+
+class Hole_Array_Test(unittest.TestCase):
+
+    def test_get_hole_arrays(self):
+        hole_arrays = get_hole_arrays(HOLE_LIST)
+        self.assertEqual(sorted(hole_arrays), ['round', 'square'])
+        locations, sizes = hole_arrays['round']
+        self.assertEqual(locations.tolist(), [[1.0,2.0], [0.0,-1.0]])
+        self.assertEqual(sizes.tolist(), [[3.0], [0.5]])
+        locations, sizes = hole_arrays['square']
+        self.assertEqual(locations.tolist(), [[-4.0,0.0]])
+        self.assertEqual(sizes.tolist(), [[2.0,1.0]])
+
+    def test_unknown_type(self):
+        hole = {'panel': 'bottom', 'type': 'oval', 'location': (0,0), 'size': 1.0}
+        self.assertRaises(ValueError, get_hole_arrays, [hole])
+
+    def test_replicated_positions(self):
+        hole_arrays = replicate_hole_arrays(get_hole_arrays(HOLE_LIST), OFFSETS)
+        locations, sizes = hole_arrays['round']
+        expected = [
+                [1.0,2.0], [11.0,2.0], [1.0,22.0],
+                [0.0,-1.0], [10.0,-1.0], [0.0,19.0],
+                ]
+        self.assertEqual(locations.tolist(), expected)
+        self.assertEqual(sizes.ravel().tolist(), [3.0, 3.0, 3.0, 0.5, 0.5, 0.5])
+        locations, sizes = hole_arrays['square']
+        self.assertEqual(locations.tolist(), [[-4.0,0.0], [6.0,0.0], [-4.0,20.0]])
+        self.assertEqual(sizes.tolist(), 3*[[2.0,1.0]])
+
+    def test_replicated_list(self):
+        hole_arrays = replicate_hole_arrays(get_hole_arrays(HOLE_LIST), OFFSETS)
+        hole_list = hole_arrays_to_list(hole_arrays, 'array_bottom')
+        self.assertEqual(len(hole_list), len(HOLE_LIST)*len(OFFSETS))
+        for hole in HOLE_LIST:
+            for dx, dy in OFFSETS:
+                x, y = hole['location']
+                expected = Hole('array_bottom', hole['type'], (x + dx, y + dy), hole['size'])
+                self.assertIn(expected, hole_list)
+
+    def test_single_offset(self):
+        hole_arrays = replicate_hole_arrays(get_hole_arrays(HOLE_LIST), (0.0,0.0))
+        hole_list = hole_arrays_to_list(hole_arrays, 'bottom')
+        self.assertEqual(sorted(hole_list, key=repr), sorted([Hole(**hole) for hole in HOLE_LIST], key=repr))
+
+
+if __name__ == '__main__':
+    unittest.main()
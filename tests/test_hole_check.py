@@ -0,0 +1,110 @@
+"""
+Tests of the panel hole validation.
+"""
+import unittest
+from hole import Hole
+from hole_check import get_hole_shape, get_hole_distance, check_holes, get_violations
+
+PANEL_SIZES = {'top': (40.0,20.0)}
+
+
+def get_status(problem_list):
+    return sorted((problem['panel'], problem['status']) for problem in problem_list)
+
+
+class Hole_Distance_Test(unittest.TestCase):
+
+    def test_round_round(self):
+        shape_a = get_hole_shape(Hole('top', 'round', (0.0,0.0), 2.0))
+        shape_b = get_hole_shape(Hole('top', 'round', (3.0,4.0), 4.0))
+        self.assertAlmostEqual(get_hole_distance(shape_a, shape_b), 2.0)
+
+    def test_square_round(self):
+        shape_a = get_hole_shape(Hole('top', 'square', (0.0,0.0), (4.0,2.0)))
+        shape_b = get_hole_shape(Hole('top', 'round', (5.0,0.0), 2.0))
+        self.assertAlmostEqual(get_hole_distance(shape_a, shape_b), 2.0)
+        shape_b = get_hole_shape(Hole('top', 'round', (5.0,4.0), 2.0))
+        self.assertAlmostEqual(get_hole_distance(shape_a, shape_b), 18**0.5 - 1.0)
+
+    def test_rounded_square(self):
+        shape_a = get_hole_shape(Hole('top', 'rounded_square', (0.0,0.0), (4.0,4.0,1.0)))
+        shape_b = get_hole_shape(Hole('top', 'rounded_square', (6.0,6.0), (4.0,4.0,1.0)))
+        self.assertAlmostEqual(get_hole_distance(shape_a, shape_b), 32**0.5 - 2.0)
+
+    def test_unknown_type(self):
+        self.assertRaises(ValueError, get_hole_shape, Hole('top', 'oval', (0.0,0.0), 1.0))
+
+
+class Check_Holes_Test(unittest.TestCase):
+
+    def test_clear(self):
+        hole_list = [
+                Hole('top', 'round', (-5.0,0.0), 3.0),
+                Hole('top', 'round', (5.0,0.0), 3.0),
+                Hole('top', 'square', (0.0,6.0), (4.0,2.0)),
+                ]
+        self.assertEqual(check_holes(hole_list, PANEL_SIZES), [])
+
+    def test_overlap(self):
+        hole_list = [
+                Hole('top', 'round', (0.0,0.0), 4.0),
+                Hole('top', 'square', (2.5,0.0), (2.0,2.0)),
+                ]
+        problem_list = check_holes(hole_list, PANEL_SIZES)
+        self.assertEqual(get_status(problem_list), [('top', 'overlap')])
+        self.assertAlmostEqual(problem_list[0]['web'], -0.5)
+        self.assertEqual(problem_list[0]['holes'], [dict(hole) for hole in hole_list])
+
+    def test_thin_web(self):
+        hole_list = [
+                Hole('top', 'round', (0.0,0.0), 2.0),
+                Hole('top', 'round', (2.5,0.0), 2.0),
+                ]
+        problem_list = check_holes(hole_list, PANEL_SIZES, min_web=1.0)
+        self.assertEqual(get_status(problem_list), [('top', 'thin_web')])
+        self.assertAlmostEqual(problem_list[0]['web'], 0.5)
+        self.assertEqual(check_holes(hole_list, PANEL_SIZES, min_web=0.4), [])
+
+    def test_other_panels(self):
+        # Holes in different panels don't interact, and panels without a
+        # size aren't checked against their edges
+        hole_list = [
+                Hole('top', 'round', (0.0,0.0), 2.0),
+                Hole('bottom', 'round', (0.0,0.0), 2.0),
+                Hole('bottom', 'round', (100.0,0.0), 2.0),
+                ]
+        self.assertEqual(check_holes(hole_list, PANEL_SIZES), [])
+
+    def test_edge(self):
+        hole_list = [
+                Hole('top', 'round', (18.5,0.0), 2.0),
+                Hole('top', 'square', (0.0,-9.5), (2.0,2.0)),
+                ]
+        problem_list = check_holes(hole_list, PANEL_SIZES)
+        self.assertEqual(get_status(problem_list), [('top', 'edge'), ('top', 'edge')])
+        web_list = sorted(problem['web'] for problem in problem_list)
+        self.assertAlmostEqual(web_list[0], -0.5)
+        self.assertAlmostEqual(web_list[1], 0.5)
+
+    def test_notch(self):
+        hole_list = [
+                Hole('top', 'round', (20.0,0.0), 2.0),
+                Hole('top', 'rounded_square', (0.0,10.0), (4.0,4.0,1.0)),
+                ]
+        problem_list = check_holes(hole_list, PANEL_SIZES)
+        self.assertEqual(get_status(problem_list), [('top', 'notch'), ('top', 'notch')])
+        self.assertEqual(get_violations(problem_list), [])
+
+    def test_array_bottom(self):
+        hole_list = []
+        for i in range(20):
+            for j in range(20):
+                hole_list.append(Hole('array_bottom', 'round', (5.0*i,5.0*j), 3.0))
+        hole_list.append(Hole('array_bottom', 'round', (51.0,50.0), 3.0))
+        problem_list = check_holes(hole_list)
+        self.assertEqual(get_status(problem_list), [('array_bottom', 'overlap')])
+        self.assertEqual(problem_list[0]['holes'][0]['location'], (50.0,50.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Tests of the interference checking of parts approximated by boxes and
+cylinders.
+"""
+import unittest
+from interference import Solid_Box, Solid_Cylinder, get_clearance, check_solids, check_enclosure, get_interferences
+
+
+class Clearance_Test(unittest.TestCase):
+
+    def test_box_box(self):
+        box_a = Solid_Box('a', (0,0,0), (2,2,2))
+        self.assertAlmostEqual(get_clearance(box_a, Solid_Box('b', (5,0,0), (2,2,2))), 3.0)
+        self.assertAlmostEqual(get_clearance(box_a, Solid_Box('b', (4,4,0), (2,2,2))), 8**0.5)
+        self.assertAlmostEqual(get_clearance(box_a, Solid_Box('b', (2,0,0), (2,2,2))), 0.0)
+        self.assertAlmostEqual(get_clearance(box_a, Solid_Box('b', (1.5,0,0), (2,2,2))), -0.5)
+
+    def test_cylinder_box(self):
+        cylinder = Solid_Cylinder('a', (0,0,0), 1.0, 4.0, axis='z')
+        box = Solid_Box('b', (3,0,0), (2,2,2))
+        self.assertAlmostEqual(get_clearance(cylinder, box), 1.0)
+        self.assertAlmostEqual(get_clearance(box, cylinder), 1.0)
+
+        # Clear of the cylinder but inside its bounding box
+        box = Solid_Box('b', (1.5,1.5,0), (1,1,1))
+        self.assertAlmostEqual(get_clearance(cylinder, box), 2**0.5 - 1.0)
+
+    def test_cylinder_cylinder(self):
+        cylinder_a = Solid_Cylinder('a', (0,0,0), 1.0, 2.0, axis='x')
+        cylinder_b = Solid_Cylinder('b', (0,3,0), 1.5, 2.0, axis='x')
+        self.assertAlmostEqual(get_clearance(cylinder_a, cylinder_b), 0.5)
+        cylinder_b = Solid_Cylinder('b', (0,2,0), 1.5, 2.0, axis='x')
+        self.assertAlmostEqual(get_clearance(cylinder_a, cylinder_b), -0.5)
+
+    def test_unknown_axis(self):
+        self.assertRaises(ValueError, Solid_Cylinder, 'a', (0,0,0), 1.0, 2.0, axis='w')
+
+
+class Check_Solids_Test(unittest.TestCase):
+
+    def get_status(self, result_list):
+        return dict((frozenset(result['parts']), result['status']) for result in result_list)
+
+    def test_interfering_and_clear(self):
+        solid_list = [
+                Solid_Box('wall', (0,0,0), (10,10,1)),
+                Solid_Box('plate', (0,0,0.9), (4,4,1)),
+                Solid_Box('lid', (0,0,20), (10,10,1)),
+                Solid_Cylinder('post', (0,0,10.0), 1.0, 19.0),
+                Solid_Box('sensor', (30,0,0), (5,5,5)),
+                ]
+        result_list = check_solids(solid_list, min_clearance=0.1)
+        status = self.get_status(result_list)
+        self.assertEqual(status, {
+            frozenset(('wall', 'plate')) : 'interference',
+            frozenset(('plate', 'post')) : 'interference',
+            frozenset(('wall', 'post'))  : 'contact',
+            frozenset(('post', 'lid'))   : 'contact',
+            })
+
+        # Sorted by clearance, the deepest interference first
+        self.assertEqual(frozenset(result_list[0]['parts']), frozenset(('plate', 'post')))
+        self.assertAlmostEqual(result_list[0]['clearance'], -0.9)
+        self.assertAlmostEqual(result_list[1]['clearance'], -0.1)
+
+    def test_clearance(self):
+        solid_list = [
+                Solid_Box('a', (0,0,0), (2,2,2)),
+                Solid_Box('b', (2.05,0,0), (2,2,2)),
+                Solid_Box('c', (10,0,0), (2,2,2)),
+                ]
+        result_list = check_solids(solid_list, min_clearance=0.1)
+        self.assertEqual(self.get_status(result_list), {frozenset(('a', 'b')): 'clearance'})
+        self.assertAlmostEqual(result_list[0]['clearance'], 0.05)
+
+    def test_allowed(self):
+        solid_list = [
+                Solid_Box('wall', (0,0,0), (10,10,1), group='sensor_0'),
+                Solid_Cylinder('capillary', (0,0,0), 0.75, 20.0, axis='x', group='sensor_0'),
+                Solid_Box('wall', (0,0,1.0), (10,10,1), group='sensor_1'),
+                ]
+        result_list = check_solids(solid_list, allowed_pairs=[('wall', 'capillary')])
+        self.assertEqual(self.get_status(result_list), {
+            frozenset(('sensor_0/wall', 'sensor_0/capillary')) : 'allowed',
+            frozenset(('sensor_0/capillary', 'sensor_1/wall')) : 'interference',
+            frozenset(('sensor_0/wall', 'sensor_1/wall'))      : 'contact',
+            })
+
+
+class Check_Enclosure_Test(unittest.TestCase):
+
+    def test_default_params(self):
+        from capillary_enclosure import Capillary_Enclosure
+        from make_enclosure import params
+        result_list = check_enclosure(Capillary_Enclosure(params))
+        self.assertEqual(get_interferences(result_list), [])
+
+    def test_narrow_box(self):
+        from capillary_enclosure import Capillary_Enclosure
+        from make_enclosure import params
+        params = dict(params)
+        x, y, z = params['inner_dimensions']
+        params['inner_dimensions'] = x - 1.0, y, z
+        interference_list = get_interferences(check_enclosure(Capillary_Enclosure(params)))
+        part_set = set(frozenset(result['parts']) for result in interference_list)
+        self.assertIn(frozenset(('left', 'guide_plate_pos')), part_set)
+        self.assertIn(frozenset(('guide_plate_pos', 'right')), part_set)
+        for result in interference_list:
+            self.assertTrue(result['clearance'] < 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
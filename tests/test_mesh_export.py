@@ -0,0 +1,160 @@
+"""
+Tests of the native meshes of the flat parts: triangulation of plates with
+holes, closed extrusions and the binary STL output.
+"""
+import os
+import os.path
+import math
+import shutil
+import struct
+import tempfile
+import unittest
+import numpy
+from plate_2d import Plate_2D
+from mesh_export import (get_signed_area, get_rect_loop, get_circle_loop, get_hole_loop, triangulate,
+        extrude, plate_mesh, cylinder_mesh, write_stl)
+
+HOLE_LIST = [
+        {'type': 'round', 'location': (-15.0,0.0), 'size': 6.0},
+        {'type': 'square', 'location': (0.0,5.0), 'size': (8.0,4.0)},
+        {'type': 'rounded_square', 'location': (12.0,-4.0), 'size': (10.0,6.0,2.0)},
+        ]
+
+# A row of holes whose rightmost points line up, which the hole bridging has
+# to handle
+ROW_HOLE_LIST = [{'type': 'round', 'location': (x,y), 'size': 2.0} for x in (-12.0, 0.0, 12.0) for y in (-6.0, 0.0, 6.0)]
+
+
+def get_triangle_areas(points, triangles):
+    tri = points[triangles]
+    return 0.5*((tri[:,1,0] - tri[:,0,0])*(tri[:,2,1] - tri[:,0,1]) - (tri[:,1,1] - tri[:,0,1])*(tri[:,2,0] - tri[:,0,0]))
+
+
+def get_edge_counts(mesh):
+    """
+    Count of each directed edge of the mesh faces.
+    """
+    count_dict = {}
+    for a, b, c in mesh.faces.tolist():
+        for edge in ((a,b), (b,c), (c,a)):
+            count_dict[edge] = count_dict.get(edge, 0) + 1
+    return count_dict
+
+
+class Triangulate_Test(unittest.TestCase):
+
+    def check_area(self, plate, chord_tol=0.01):
+        outline = get_rect_loop(plate.location, (plate.x, plate.y), plate.radius, chord_tol)
+        holes = [get_hole_loop(hole, plate.location, chord_tol)[::-1] for hole in plate.holes]
+        points, triangles = triangulate(outline, holes)
+        areas = get_triangle_areas(points, triangles)
+        self.assertTrue((areas > 0).all())
+
+        # Exact for the faceted loops, and close to the analytic plate area
+        loop_area = get_signed_area(outline) + sum(get_signed_area(hole) for hole in holes)
+        self.assertAlmostEqual(areas.sum(), loop_area, places=6)
+        self.assertAlmostEqual(areas.sum(), plate.get_area(), delta=0.01*plate.get_area())
+
+    def test_square(self):
+        points, triangles = triangulate(get_rect_loop((0.0,0.0), (4.0,2.0)))
+        self.assertEqual(len(triangles), 2)
+        self.assertAlmostEqual(get_triangle_areas(points, triangles).sum(), 8.0)
+
+    def test_plate_with_holes(self):
+        self.check_area(Plate_2D(50.0, 30.0, HOLE_LIST, radius=3.0))
+
+    def test_row_of_holes(self):
+        self.check_area(Plate_2D(40.0, 20.0, ROW_HOLE_LIST, location=(5.0,-3.0)))
+
+    def test_concave(self):
+        # L shaped outline with a hole in the reflex corner region
+        outline = numpy.array([(0,0), (10,0), (10,4), (4,4), (4,10), (0,10)], dtype=float)
+        hole = get_circle_loop((2.0,2.0), 1.0)[::-1]
+        points, triangles = triangulate(outline, [hole])
+        areas = get_triangle_areas(points, triangles)
+        self.assertTrue((areas > 0).all())
+        self.assertAlmostEqual(areas.sum(), 64.0 + get_signed_area(hole))
+
+    def test_intersecting_holes(self):
+        outline = get_rect_loop((0.0,0.0), (20.0,20.0))
+        holes = [get_rect_loop((x,0.0), (6.0,6.0))[::-1] for x in (-2.0, 2.0)]
+        self.assertRaises(ValueError, triangulate, outline, holes)
+
+    def test_hole_crossing_outline(self):
+        outline = get_rect_loop((0.0,0.0), (20.0,20.0))
+        hole = get_rect_loop((10.0,0.0), (6.0,6.0))[::-1]
+        self.assertRaises(ValueError, triangulate, outline, [hole])
+
+
+class Extrude_Test(unittest.TestCase):
+
+    def check_closed(self, mesh):
+        """
+        Every edge is shared by two faces which use it in opposite
+        directions.
+        """
+        count_dict = get_edge_counts(mesh)
+        for (a, b), count in count_dict.iteritems():
+            self.assertEqual(count, 1)
+            self.assertEqual(count_dict.get((b,a)), 1)
+
+    def test_plate_mesh(self):
+        plate = Plate_2D(50.0, 30.0, HOLE_LIST, radius=3.0, location=(10.0,20.0), name='plate')
+        thickness = 3.0
+        mesh = plate_mesh(plate, thickness)
+        self.assertEqual(mesh.name, 'plate')
+        self.check_closed(mesh)
+
+        # Top faces cover the plate area
+        top = (mesh.vertices[mesh.faces][:,:,2] > 0).all(axis=1)
+        top_area = get_triangle_areas(mesh.vertices[:,:2], mesh.faces[top]).sum()
+        self.assertAlmostEqual(top_area, plate.get_area(), delta=0.01*plate.get_area())
+
+        # Outward facing, so the volume is positive
+        self.assertAlmostEqual(mesh.get_volume(), top_area*thickness, places=6)
+        lo, hi = mesh.get_bounding_box()
+        self.assertEqual(lo.tolist(), [-15.0, 5.0, -1.5])
+        self.assertEqual(hi.tolist(), [35.0, 35.0, 1.5])
+
+    def test_cylinder_mesh(self):
+        mesh = cylinder_mesh(2.0, 10.0, chord_tol=0.001)
+        self.check_closed(mesh)
+        self.assertAlmostEqual(mesh.get_volume(), math.pi*4.0*10.0, delta=0.001*math.pi*40.0)
+
+    def test_clockwise_input(self):
+        # Loops are reoriented, so the orientation of the input doesn't matter
+        outline = get_rect_loop((0.0,0.0), (10.0,10.0))
+        hole = get_circle_loop((0.0,0.0), 2.0)
+        mesh = extrude(outline[::-1], [hole], 2.0)
+        self.check_closed(mesh)
+        self.assertAlmostEqual(mesh.get_volume(), 2.0*(100.0 - get_signed_area(hole)))
+
+
+class Write_STL_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_triangle_count(self):
+        mesh = plate_mesh(Plate_2D(40.0, 20.0, ROW_HOLE_LIST, name='row'), 2.0)
+        filename = os.path.join(self.tmp_dir, 'row.stl')
+        write_stl(filename, mesh)
+        with open(filename,'rb') as f:
+            data = f.read()
+        self.assertEqual(data[:3], 'row')
+        num_triangles, = struct.unpack('<I', data[80:84])
+        self.assertEqual(num_triangles, len(mesh.faces))
+        self.assertEqual(len(data), 84 + 50*num_triangles)
+
+        # First facet: unit normal followed by the vertices of the first face
+        values = struct.unpack('<12f', data[84:132])
+        self.assertAlmostEqual(sum(v**2 for v in values[:3]), 1.0, places=5)
+        vertices = numpy.array(values[3:]).reshape(3,3)
+        self.assertTrue(numpy.allclose(vertices, mesh.vertices[mesh.faces[0]], atol=1.0e-5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Tests of the nesting of plates onto sheets.
+"""
+import random
+import unittest
+from plate_2d import Plate_2D
+from nesting import pack_plates
+
+SHEET_SIZE = (300.0, 200.0)
+MARGIN = 5.0
+SPACING = 2.0
+TOL = 1.0e-9
+
+
+def get_random_plates(num, seed=1):
+    rand = random.Random(seed)
+    plate_list = []
+    for i in range(num):
+        x = rand.uniform(10.0, 120.0)
+        y = rand.uniform(10.0, 80.0)
+        plate_list.append(Plate_2D(x, y, name='plate_{0}'.format(i)))
+    return plate_list
+
+
+class Pack_Plates_Test(unittest.TestCase):
+
+    def check_sheets(self, sheet_list, plate_list):
+        """
+        Every plate is placed once, inside the sheet margins and at least
+        spacing apart from the other plates on its sheet.
+        """
+        names = sorted(plate.name for sheet in sheet_list for plate in sheet.plate_list)
+        self.assertEqual(names, sorted(plate.name for plate in plate_list))
+        for sheet in sheet_list:
+            box_list = [plate.get_bounding_box() for plate in sheet.plate_list]
+            for min_x, min_y, max_x, max_y in box_list:
+                self.assertTrue(min_x >= MARGIN - TOL and min_y >= MARGIN - TOL)
+                self.assertTrue(max_x <= sheet.width - MARGIN + TOL)
+                self.assertTrue(max_y <= sheet.height - MARGIN + TOL)
+            for i, box_a in enumerate(box_list):
+                for box_b in box_list[i+1:]:
+                    apart_x = box_a[2] + SPACING <= box_b[0] + TOL or box_b[2] + SPACING <= box_a[0] + TOL
+                    apart_y = box_a[3] + SPACING <= box_b[1] + TOL or box_b[3] + SPACING <= box_a[1] + TOL
+                    self.assertTrue(apart_x or apart_y, (box_a, box_b))
+
+    def test_random_plates(self):
+        plate_list = get_random_plates(40)
+        sheet_list = pack_plates(plate_list, SHEET_SIZE, MARGIN, SPACING)
+        self.check_sheets(sheet_list, plate_list)
+        for sheet in sheet_list:
+            self.assertTrue(0 < sheet.get_utilization() <= 1)
+
+    def test_without_rotation(self):
+        plate_list = get_random_plates(20, seed=2)
+        sheet_list = pack_plates(plate_list, SHEET_SIZE, MARGIN, SPACING, allow_rotation=False)
+        self.check_sheets(sheet_list, plate_list)
+        size_dict = dict((plate.name, (plate.x, plate.y)) for plate in plate_list)
+        for sheet in sheet_list:
+            for plate in sheet.plate_list:
+                self.assertEqual((plate.x, plate.y), size_dict[plate.name])
+
+    def test_rotation(self):
+        # Only fits the sheet when turned
+        plate = Plate_2D(150.0, 250.0, name='tall')
+        sheet_list = pack_plates([plate], SHEET_SIZE, MARGIN, SPACING)
+        self.assertEqual(len(sheet_list), 1)
+        self.assertEqual((sheet_list[0].plate_list[0].x, sheet_list[0].plate_list[0].y), (250.0, 150.0))
+        self.assertRaises(ValueError, pack_plates, [plate], SHEET_SIZE, MARGIN, SPACING, allow_rotation=False)
+
+    def test_overflow(self):
+        # Two of these fill a sheet, the third starts a new one
+        plate_list = [Plate_2D(140.0, 185.0, name='plate_{0}'.format(i)) for i in range(3)]
+        sheet_list = pack_plates(plate_list, SHEET_SIZE, MARGIN, SPACING)
+        self.assertEqual([len(sheet.plate_list) for sheet in sheet_list], [2, 1])
+        self.check_sheets(sheet_list, plate_list)
+
+    def test_fills_open_sheets_first(self):
+        plate_list = [Plate_2D(140.0, 185.0, name='big_{0}'.format(i)) for i in range(3)]
+        plate_list.append(Plate_2D(20.0, 20.0, name='small'))
+        sheet_list = pack_plates(plate_list, SHEET_SIZE, MARGIN, SPACING)
+        self.assertEqual(len(sheet_list), 2)
+        self.check_sheets(sheet_list, plate_list)
+
+    def test_too_large(self):
+        plate_list = get_random_plates(3) + [Plate_2D(400.0, 50.0, name='long')]
+        with self.assertRaises(ValueError) as context:
+            pack_plates(plate_list, SHEET_SIZE, MARGIN, SPACING)
+        self.assertIn('long', str(context.exception))
+
+    def test_tabbed_panels(self):
+        # The tabs stick out of the panels and have to be nested with them
+        from capillary_enclosure import Capillary_Enclosure
+        from make_enclosure import params
+        enclosure = Capillary_Enclosure(params)
+        plate_list = []
+        for i in range(3):
+            for plate in enclosure.get_box_projection_2d(show_ref_cube=False):
+                pos_x, pos_y = plate.location
+                plate = plate.translate((-pos_x, -pos_y))
+                plate.name = '{0}_{1}'.format(plate.name, i)
+                plate_list.append(plate)
+        self.assertTrue(any(plate.tabs for plate in plate_list))
+        sheet_list = pack_plates(plate_list, SHEET_SIZE, MARGIN, SPACING)
+        self.check_sheets(sheet_list, plate_list)
+
+        # The packed outlines, tabs included, lie within the bounding boxes
+        # which were checked
+        for sheet in sheet_list:
+            for plate in sheet.plate_list:
+                min_x, min_y, max_x, max_y = plate.get_bounding_box()
+                for x, y in plate.get_outline():
+                    self.assertTrue(min_x - TOL <= x <= max_x + TOL and min_y - TOL <= y <= max_y + TOL)
+                if plate.tabs:
+                    self.assertTrue(plate.get_size() != (plate.x, plate.y))
+
+
+if __name__ == '__main__':
+    unittest.main()
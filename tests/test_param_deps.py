@@ -0,0 +1,146 @@
+"""
+Tests of the params dependencies of the enclosure outputs and of the stale
+outputs found from them for incremental rebuilds.
+"""
+import os.path
+import shutil
+import tempfile
+import unittest
+from param_deps import depends_on, get_param_keys, Build_State
+from enclosure_outputs import get_output_digests, get_stale_outputs
+
+
+class Part_Enclosure(object):
+
+    def __init__(self, params):
+        self.params = params
+
+    @depends_on('a', parts=('get_b',))
+    def get_a(self):
+        pass
+
+    @depends_on('b', parts=('get_a',))
+    def get_b(self):
+        pass
+
+    @depends_on('c', parts=('get_undeclared',))
+    def get_c(self):
+        pass
+
+    def get_undeclared(self):
+        pass
+
+
+class Param_Keys_Test(unittest.TestCase):
+
+    def test_parts(self):
+        enclosure = Part_Enclosure({})
+        self.assertEqual(get_param_keys(enclosure, 'get_a'), set(['a', 'b']))
+        self.assertEqual(get_param_keys(enclosure, 'get_b'), set(['a', 'b']))
+
+    def test_undeclared(self):
+        enclosure = Part_Enclosure({})
+        self.assertIsNone(get_param_keys(enclosure, 'get_undeclared'))
+        self.assertIsNone(get_param_keys(enclosure, 'get_c'))
+
+    def test_bad_keyword(self):
+        self.assertRaises(TypeError, depends_on, 'a', part=('get_b',))
+
+    def test_enclosure_methods_declared(self):
+        # Every part method of the enclosures declares its dependencies, as an
+        # undeclared one makes every output depending on it stale on any edit
+        from capillary_enclosure import Capillary_Enclosure
+        from arrayed_enclosure import Arrayed_Enclosure
+        for cls in (Capillary_Enclosure, Arrayed_Enclosure):
+            for name in dir(cls):
+                if not name.startswith(('get_', 'make_')):
+                    continue
+                method = getattr(cls, name)
+                if method.__module__.startswith('py2scad'):
+                    continue
+                self.assertTrue(hasattr(method, 'param_keys'), '{0}.{1}'.format(cls.__name__, name))
+                for part_name in method.part_methods:
+                    self.assertTrue(hasattr(cls, part_name), '{0}.{1}: {2}'.format(cls.__name__, name, part_name))
+
+
+class Stale_Outputs_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def get_stale(self, cls, params, changes, native_dxf=True, remove=()):
+        """
+        Save the build state of all outputs for params and get the outputs
+        which are stale after applying changes to them.
+        """
+        output_list = self.get_output_list(cls, native_dxf)
+        state = Build_State(os.path.join(self.tmp_dir, 'state.json'), code_digest='code')
+        digest_dict = get_output_digests(cls(params), output_list)
+        for filename, method_name, kwargs in output_list:
+            if filename not in remove:
+                with open(os.path.join(self.tmp_dir, filename),'w') as f:
+                    f.write('\n')
+            state.update(filename, digest_dict[filename])
+        state.save()
+
+        state = Build_State(os.path.join(self.tmp_dir, 'state.json'), code_digest='code')
+        digest_dict = get_output_digests(cls(dict(params, **changes)), output_list)
+        return get_stale_outputs(state, digest_dict, output_list, self.tmp_dir)
+
+    def get_output_list(self, cls, native_dxf):
+        if cls.__name__ == 'Arrayed_Enclosure':
+            from make_arrayed_enclosure import get_output_list
+        else:
+            from make_enclosure import get_output_list
+        return get_output_list(native_dxf)
+
+    def test_unchanged(self):
+        from capillary_enclosure import Capillary_Enclosure
+        from make_enclosure import params
+        self.assertEqual(self.get_stale(Capillary_Enclosure, params, {}), [])
+
+    def test_missing_file(self):
+        from capillary_enclosure import Capillary_Enclosure
+        from make_enclosure import params
+        stale = self.get_stale(Capillary_Enclosure, params, {}, remove=['clamp_projection.dxf'])
+        self.assertEqual(stale, ['clamp_projection.dxf'])
+
+    def test_diffuser_standoff_height(self):
+        # Only the assembly shows the standoff height
+        from capillary_enclosure import Capillary_Enclosure
+        from make_enclosure import params
+        changes = {'diffuser_standoff_height': params['diffuser_standoff_height'] + 1.0}
+        for native_dxf in (False, True):
+            stale = self.get_stale(Capillary_Enclosure, params, changes, native_dxf)
+            self.assertEqual(stale, ['enclosure_assembly.scad'])
+
+    def test_arrayed_diffuser_standoff_height(self):
+        from arrayed_enclosure import Arrayed_Enclosure
+        from make_arrayed_enclosure import params
+        changes = {'diffuser_standoff_height': params['diffuser_standoff_height'] + 1.0}
+        stale = self.get_stale(Arrayed_Enclosure, params, changes)
+        self.assertEqual(stale, ['arrayed_assembly.scad'])
+
+    def test_wall_thickness(self):
+        # Read by the box panels and everything mounted on them
+        from capillary_enclosure import Capillary_Enclosure
+        from make_enclosure import params
+        changes = {'wall_thickness': params['wall_thickness'] + 1.0}
+        stale = self.get_stale(Capillary_Enclosure, params, changes)
+        self.assertIn('enclosure_assembly.scad', stale)
+        self.assertIn('box_projection.scad', stale)
+
+    def test_code_digest(self):
+        filename = os.path.join(self.tmp_dir, 'state.json')
+        state = Build_State(filename, code_digest='old')
+        state.update('part.scad', 'digest')
+        state.save()
+        self.assertFalse(Build_State(filename, code_digest='old').is_stale('part.scad', 'digest'))
+        self.assertTrue(Build_State(filename, code_digest='new').is_stale('part.scad', 'digest'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Tests of the 2D plate outlines: areas, rotation and tabs.
+"""
+import math
+import unittest
+from plate_2d import Plate_2D, round_holes
+
+HOLE_LIST = [
+        {'type': 'round', 'location': (-10.0,0.0), 'size': 3.0},
+        {'type': 'square', 'location': (0.0,4.0), 'size': (4.0,2.0)},
+        {'type': 'rounded_square', 'location': (10.0,-2.0), 'size': (6.0,4.0,1.0)},
+        ]
+
+TABS = [
+        ('top', -5.0, 6.0, 3.0),
+        ('top', 8.0, 4.0, 3.0),
+        ('right', 0.0, 8.0, 2.0),
+        ('bottom', 3.0, 6.0, 3.0),
+        ('left', -4.0, 4.0, 2.0),
+        ]
+
+
+def get_polygon_area(point_list):
+    area = 0.0
+    for (x0,y0), (x1,y1) in zip(point_list, point_list[1:] + point_list[:1]):
+        area += x0*y1 - x1*y0
+    return 0.5*area
+
+
+def get_hole_area(hole):
+    if hole['type'] == 'round':
+        return 0.25*math.pi*hole['size']**2
+    elif hole['type'] == 'square':
+        return hole['size'][0]*hole['size'][1]
+    sx, sy, radius = hole['size']
+    return sx*sy - (4 - math.pi)*radius**2
+
+
+class Plate_2D_Test(unittest.TestCase):
+
+    def test_area(self):
+        plate = Plate_2D(40.0, 20.0, HOLE_LIST, radius=2.0)
+        hole_area = sum(get_hole_area(hole) for hole in HOLE_LIST)
+        self.assertAlmostEqual(plate.get_area(), 800.0 - (4 - math.pi)*4.0 - hole_area)
+
+    def test_outline_area(self):
+        plate = Plate_2D(40.0, 20.0, HOLE_LIST, location=(5.0,-3.0), tabs=TABS)
+        hole_area = sum(get_hole_area(hole) for hole in HOLE_LIST)
+        outline = plate.get_outline()
+        # Counter clockwise from the lower left corner
+        self.assertEqual(outline[0], (-15.0,-13.0))
+        self.assertAlmostEqual(get_polygon_area(outline), plate.get_area() + hole_area)
+        self.assertAlmostEqual(plate.get_area(), 800.0 + 18.0 + 12.0 + 16.0 + 18.0 + 8.0 - hole_area)
+
+    def test_rotate90(self):
+        plate = Plate_2D(40.0, 20.0, HOLE_LIST, radius=2.0, location=(5.0,-3.0), tabs=TABS)
+        rotated = plate.rotate90()
+        self.assertEqual((rotated.x, rotated.y), (20.0, 40.0))
+        self.assertEqual(rotated.location, plate.location)
+        self.assertAlmostEqual(rotated.get_area(), plate.get_area())
+
+        # Holes and tabs turn with the plate
+        self.assertEqual(rotated.holes[0]['location'], (-0.0,-10.0))
+        self.assertEqual(rotated.holes[1]['size'], (2.0,4.0))
+        self.assertEqual(rotated.holes[2]['size'], (4.0,6.0,1.0))
+        self.assertEqual(rotated.tabs[0], ('left', -5.0, 6.0, 3.0))
+        self.assertEqual(rotated.tabs[2], ('top', -0.0, 8.0, 2.0))
+
+        # The outline rotates about the plate location
+        pos_x, pos_y = plate.location
+        expected = set((round(pos_x - (y - pos_y), 9), round(pos_y + (x - pos_x), 9)) for x, y in plate.get_outline())
+        outline = rotated.get_outline()
+        self.assertEqual(set((round(x, 9), round(y, 9)) for x, y in outline), expected)
+        self.assertAlmostEqual(get_polygon_area(outline), get_polygon_area(plate.get_outline()))
+
+    def test_rotate_four_times(self):
+        plate = Plate_2D(40.0, 20.0, HOLE_LIST, tabs=TABS)
+        rotated = plate.rotate90().rotate90().rotate90().rotate90()
+        self.assertEqual(rotated.tabs, plate.tabs)
+        self.assertEqual([hole['location'] for hole in rotated.holes], [hole['location'] for hole in plate.holes])
+
+    def test_bounding_box(self):
+        plate = Plate_2D(40.0, 20.0, location=(5.0,-3.0), tabs=TABS)
+        self.assertEqual(plate.get_bounding_box(), (-17.0, -16.0, 27.0, 10.0))
+        self.assertEqual(plate.get_size(), (44.0, 26.0))
+        min_x, min_y, max_x, max_y = plate.get_bounding_box()
+        outline = plate.get_outline()
+        self.assertEqual((min(x for x, y in outline), min(y for x, y in outline)), (min_x, min_y))
+        self.assertEqual((max(x for x, y in outline), max(y for x, y in outline)), (max_x, max_y))
+
+    def test_translate(self):
+        plate = Plate_2D(40.0, 20.0, HOLE_LIST, tabs=TABS, name='top')
+        moved = plate.translate((5.0,-3.0))
+        self.assertEqual(moved.location, (5.0,-3.0))
+        self.assertEqual((moved.tabs, moved.name), (plate.tabs, 'top'))
+        self.assertAlmostEqual(moved.get_area(), plate.get_area())
+
+    def test_round_holes(self):
+        hole_list = round_holes([(1.0,2.0,3.0)])
+        self.assertEqual(hole_list, [{'type': 'round', 'location': (1.0,2.0), 'size': 3.0}])
+
+
+if __name__ == '__main__':
+    unittest.main()
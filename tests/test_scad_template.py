@@ -0,0 +1,150 @@
+"""
+Tests of the parameterized scad templates, on small enclosure classes whose
+parts are given as scad text.
+"""
+import unittest
+import numpy
+from param_deps import depends_on
+from scad_template import (split_numbers, join_numbers, format_number, compile_template, get_corner_params,
+        Part_Template, Template_Cache)
+
+
+class Plate_Enclosure(object):
+
+    def __init__(self, params):
+        self.params = params
+
+    @depends_on('size', 'thickness', 'count')
+    def get_plate(self):
+        x, y = self.params['size']
+        thickness = self.params['thickness']
+        text_list = ['cube([{0!r}, {1!r}, {2!r}], center=true);'.format(x, y, thickness)]
+        for i in range(self.params['count']):
+            text_list.append('translate([{0!r}, 0, 0]) cylinder(r=1.5, h={1!r});'.format(0.25*x*i, 2*thickness))
+        return '\n'.join(text_list)
+
+    @depends_on('shift', 'thickness')
+    def get_standoff(self):
+        # Mirrored for negative shifts, like the diffuser standoffs
+        shift = self.params['shift']
+        if shift < 0:
+            return 'translate([{0!r}, 0, {1!r}]) standoff_neg();'.format(-shift, self.params['thickness'])
+        return 'translate([{0!r}, 0, {1!r}]) standoff_pos();'.format(shift, self.params['thickness'])
+
+    @depends_on('shift')
+    def get_width(self):
+        # Not affine across shift = 0, with the same text structure
+        return 'cube([{0!r}, 1, 1]);'.format(abs(self.params['shift']))
+
+
+PARAMS = {
+        'size'      : (40.0, 20.0),
+        'thickness' : 3.0,
+        'count'     : 3,
+        'shift'     : 5.0,
+        }
+
+
+class Numbers_Test(unittest.TestCase):
+
+    def test_split_join(self):
+        text_list = [
+                'translate([1.5, -2, 3e-05]) cube([10, .5, 2.], center=true);\n',
+                '$fn = 50;\nsphere(r=0.1);',
+                'no numbers here',
+                'part_0();\ncolor([0.5, 0.5, 0.5]) multmatrix([[1.0, 0.0], [-0.0, 1.0]]) part_1();\n',
+                ]
+        for text in text_list:
+            skeleton, tokens = split_numbers(text)
+            self.assertEqual(len(skeleton), len(tokens) + 1)
+            self.assertEqual(join_numbers(skeleton, tokens), text)
+
+    def test_tokens(self):
+        skeleton, tokens = split_numbers('translate([1.5, -2, 3e-05]) part_0();')
+        self.assertEqual(tokens, ['1.5', '-2', '3e-05'])
+        self.assertEqual(skeleton, ['translate([', ', ', ', ', ']) part_0();'])
+        # Digits in names and $fn aren't numbers
+        skeleton, tokens = split_numbers('$fn = 50; part_10(); a2b = 7;')
+        self.assertEqual(tokens, ['50', '7'])
+
+    def test_format_number(self):
+        self.assertEqual(format_number(1.5), '1.5')
+        self.assertEqual(format_number(0.1 + 0.2), '0.3')
+        self.assertEqual(format_number(-0.0), '0.0')
+        self.assertEqual(format_number(-1.0e-12), '0.0')
+        self.assertEqual(format_number(2), '2.0')
+        self.assertEqual(float(format_number(-12.345678912)), -12.345678912)
+
+
+class Template_Test(unittest.TestCase):
+
+    def test_render(self):
+        template = compile_template(Plate_Enclosure, PARAMS, 'get_plate')
+        self.assertEqual(sorted(set(key for key, index in template.slot_list)), ['size', 'thickness'])
+        params = dict(PARAMS, size=(50.0, 25.0), thickness=2.0)
+        self.assertEqual(template.render(params), Plate_Enclosure(params).get_plate() + '\n')
+        self.assertTrue(template.matches(params))
+        self.assertFalse(template.matches(dict(PARAMS, count=4)))
+
+    def test_get_expression(self):
+        template = compile_template(Plate_Enclosure, PARAMS, 'get_plate')
+        expression_list = [template.get_expression(i) for i in template.varying]
+        self.assertEqual(expression_list[:3], ['(size[0])', '(size[1])', '(thickness)'])
+        # Second cylinder at 0.25*size[0], with height 2*thickness
+        self.assertIn('(0.25*size[0])', expression_list)
+        self.assertIn('(2.0*thickness)', expression_list)
+        module_text = template.get_module_text('plate')
+        self.assertTrue(module_text.startswith('module plate(size=[40.0, 20.0], thickness=3.0) {\n'))
+
+    def test_expression_sign(self):
+        coeffs = numpy.array([[-1.0, 0.0], [2.0, -0.5], [1.0, 1.0]])
+        template = Part_Template('part', ['', ' ', ' ', ''], ['-3.0', '10.0', '7.0'], [('a', None), ('b', None)],
+                [3.0, 4.0], coeffs, ['a', 'b'], {'a': 3.0, 'b': 4.0})
+        self.assertEqual(template.get_expression(0), '(-a)')
+        self.assertEqual(template.get_expression(1), '(6.0 + 2.0*a - 0.5*b)')
+        self.assertEqual(template.get_expression(2), '(a + b)')
+
+    def test_count_not_a_slot(self):
+        # Integers change the structure and are kept fixed
+        template = compile_template(Plate_Enclosure, PARAMS, 'get_plate')
+        self.assertNotIn('count', [key for key, index in template.slot_list])
+
+    def test_corner_params(self):
+        params_list = [dict(PARAMS, thickness=t, size=(x, 20.0)) for t in (1.0, 2.0, 3.0) for x in (30.0, 40.0)]
+        corner_list = get_corner_params(params_list, ['size', 'thickness'])
+        self.assertEqual([(params['thickness'], params['size'][0]) for params in corner_list],
+                [(1.0, 30.0), (1.0, 40.0), (3.0, 30.0), (3.0, 40.0)])
+
+
+class Template_Cache_Test(unittest.TestCase):
+
+    def get_params_list(self, shift_list):
+        return [dict(PARAMS, shift=shift) for shift in shift_list]
+
+    def test_verify_ok(self):
+        cache = Template_Cache(Plate_Enclosure, slot_keys=['shift', 'thickness'])
+        params_list = self.get_params_list([1.0, 3.0, 5.0])
+        for params in params_list:
+            cache.get_template(params, 'get_standoff')
+        self.assertEqual(cache.num_compiled, 1)
+        self.assertEqual(cache.verify_templates(params_list, 'get_standoff'), 0)
+        self.assertEqual(cache.render(params_list[-1], 'get_standoff'), 'translate([5.0, 0, 3.0]) standoff_pos();\n')
+
+    def test_verify_branch(self):
+        # The template compiled at a negative shift has the wrong sign and
+        # module for positive ones, and is dropped
+        cache = Template_Cache(Plate_Enclosure, slot_keys=['shift', 'thickness'])
+        params_list = self.get_params_list([-2.0, 1.0, 4.0])
+        for method_name in ('get_standoff', 'get_width'):
+            for params in params_list:
+                cache.get_template(params, method_name)
+            self.assertEqual(cache.verify_templates(params_list, method_name), 1)
+            for params in params_list:
+                self.assertIsNone(cache.find_template(params, method_name))
+                text = getattr(Plate_Enclosure(params), method_name)() + '\n'
+                self.assertEqual(cache.render(params, method_name), text)
+        self.assertEqual(cache.num_rejected, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+"""
+Tests of the contour ordering and cut time estimate on a small dxf with two
+plates, each with a square hole, written outer contours first.
+"""
+import math
+import os.path
+import shutil
+import tempfile
+import unittest
+from dxf_writer import DXF_Writer
+from toolpath import (read_contours, order_contours, order_dxf, get_containers, is_inner_first, get_cut_estimate,
+        get_bulge_points, get_entity_pieces, chain_pieces)
+
+PLATE_A = [(0.0,0.0), (10.0,0.0), (10.0,10.0), (0.0,10.0)]
+PLATE_B = [(20.0,0.0), (30.0,0.0), (30.0,10.0), (20.0,10.0)]
+HOLE_A = [(4.0,4.0), (6.0,4.0), (6.0,6.0), (4.0,6.0)]
+HOLE_B = [(24.0,4.0), (26.0,4.0), (26.0,6.0), (24.0,6.0)]
+
+
+class Toolpath_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp_dir, 'plates.dxf')
+        writer = DXF_Writer()
+        writer.add_polyline(PLATE_A)
+        # Plate B as separate lines, which are chained into a contour
+        for p0, p1 in zip(PLATE_B, PLATE_B[1:] + PLATE_B[:1]):
+            writer.add_line(p0, p1)
+        writer.add_polyline(HOLE_B)
+        writer.add_polyline(HOLE_A)
+        writer.write(self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def get_names(self, contour_list, order):
+        name_dict = {
+                (0.0,0.0,10.0,10.0)  : 'plate_a',
+                (20.0,0.0,30.0,10.0) : 'plate_b',
+                (4.0,4.0,6.0,6.0)    : 'hole_a',
+                (24.0,4.0,26.0,6.0)  : 'hole_b',
+                }
+        return [name_dict[contour_list[i].get_bounding_box()] for i in order]
+
+    def test_read_contours(self):
+        contour_list = read_contours(self.filename)
+        self.assertEqual(len(contour_list), 4)
+        self.assertTrue(all(contour.closed for contour in contour_list))
+        self.assertEqual(sorted(self.get_names(contour_list, range(4))), ['hole_a', 'hole_b', 'plate_a', 'plate_b'])
+
+    def test_containers(self):
+        contour_list = read_contours(self.filename)
+        container_list = get_containers(contour_list)
+        names = self.get_names(contour_list, range(4))
+        for i, name in enumerate(names):
+            container_names = sorted(names[j] for j in container_list[i])
+            expected = {'hole_a': ['plate_a'], 'hole_b': ['plate_b']}.get(name, [])
+            self.assertEqual(container_names, expected)
+
+        # As written, plate_a comes before its hole
+        self.assertFalse(is_inner_first(range(4), container_list))
+
+    def test_inner_before_outer(self):
+        contour_list = read_contours(self.filename)
+        order, container_list, start = order_contours(contour_list)
+        self.assertEqual(start, (0.0,0.0))
+        self.assertTrue(is_inner_first(order, container_list))
+        self.assertEqual(self.get_names(contour_list, order), ['hole_a', 'plate_a', 'hole_b', 'plate_b'])
+
+    def test_travel_estimate(self):
+        contour_list = read_contours(self.filename)
+        order, container_list, start = order_contours(contour_list)
+        estimate = get_cut_estimate(contour_list, order, start, feed_rate=20.0, rapid_rate=200.0, pierce_time=0.1)
+
+        # (0,0) -> hole_a at (4,4) -> plate_a at (0,0) -> hole_b at (24,4) -> plate_b at (20,0)
+        travel = 3*math.sqrt(32.0) + math.sqrt(24.0**2 + 4.0**2)
+        self.assertEqual(estimate['contours'], 4)
+        self.assertAlmostEqual(estimate['cut_length'], 96.0)
+        self.assertAlmostEqual(estimate['travel'], travel)
+        self.assertAlmostEqual(estimate['time'], 96.0/20.0 + travel/200.0 + 4*0.1)
+
+    def test_order_dxf(self):
+        output_filename = os.path.join(self.tmp_dir, 'plates_ordered.dxf')
+        before, after = order_dxf(self.filename, output_filename)
+        self.assertTrue(after['travel'] < before['travel'])
+        self.assertAlmostEqual(after['cut_length'], before['cut_length'])
+
+        # The ordered file lists its contours in cutting order
+        contour_list = read_contours(output_filename)
+        self.assertEqual(self.get_names(contour_list, range(4)), ['hole_a', 'plate_a', 'hole_b', 'plate_b'])
+        self.assertTrue(is_inner_first(range(4), get_containers(contour_list)))
+
+
+
+class Pieces_Test(unittest.TestCase):
+
+    def test_bulge_semicircle(self):
+        # Bulge 1 is a half circle, counter clockwise from p0 to p1, here
+        # about (1,0) through (1,-1)
+        for bulge, mid in ((1.0, (1.0,-1.0)), (-1.0, (1.0,1.0))):
+            point_list = [(0.0,0.0)] + get_bulge_points((0.0,0.0), (2.0,0.0), bulge, 0.01)
+            self.assertEqual(point_list[-1], (2.0,0.0))
+            self.assertEqual(len(point_list) % 2, 1)
+            x, y = point_list[len(point_list)//2]
+            self.assertAlmostEqual(x, mid[0])
+            self.assertAlmostEqual(y, mid[1])
+            for x, y in point_list:
+                self.assertAlmostEqual(math.hypot(x - 1.0, y), 1.0)
+
+    def test_lwpolyline_bulge(self):
+        # Slot of two half circles joined by straight lines, closed
+        pair_list = [
+                (70, '1'),
+                (10, '0.0'), (20, '0.0'), (42, '0.0'),
+                (10, '10.0'), (20, '0.0'), (42, '1.0'),
+                (10, '10.0'), (20, '4.0'), (42, '0.0'),
+                (10, '0.0'), (20, '4.0'), (42, '1.0'),
+                ]
+        closed_list, piece_list = get_entity_pieces([('LWPOLYLINE', pair_list)], chord_tol=0.001)
+        self.assertEqual((len(closed_list), piece_list), (1, []))
+        contour = closed_list[0]
+        self.assertAlmostEqual(contour.get_length(), 20.0 + 4*math.pi, places=2)
+        min_x, min_y, max_x, max_y = contour.get_bounding_box()
+        self.assertAlmostEqual(min_x, -2.0)
+        self.assertAlmostEqual(max_x, 12.0)
+
+    def test_chain_across_cells(self):
+        # End points printed with limited precision differ by less than the
+        # tolerance but may lie on either side of a cell boundary
+        tol = 1.0e-3
+        for offset in (0.0, 0.5*tol, 0.25*tol):
+            square = [(offset,offset), (10.0 + offset,offset), (10.0 + offset,10.0 + offset), (offset,10.0 + offset)]
+            # Each line starts a little above and right of its corner and
+            # ends a little below and left of the next one
+            shift = 0.01*tol
+            piece_list = []
+            for p0, p1 in zip(square, square[1:] + square[:1]):
+                piece_list.append([(p0[0] + shift, p0[1] + shift), (p1[0] - shift, p1[1] - shift)])
+            contour_list = chain_pieces(piece_list, tol)
+            self.assertEqual(len(contour_list), 1)
+            self.assertTrue(contour_list[0].closed)
+            self.assertEqual(len(contour_list[0].points), 4)
+
+    def test_chain_reversed_and_open(self):
+        piece_list = [
+                [(0.0,0.0), (1.0,0.0)],
+                [(2.0,1.0), (1.0,0.0)],
+                [(5.0,5.0), (6.0,5.0)],
+                [(3.0,1.0), (2.0,1.0)],
+                ]
+        contour_list = chain_pieces(piece_list)
+        self.assertEqual(len(contour_list), 2)
+        self.assertFalse(any(contour.closed for contour in contour_list))
+        self.assertEqual(contour_list[0].points, [(0.0,0.0), (1.0,0.0), (2.0,1.0), (3.0,1.0)])
+
+    def test_not_joined(self):
+        piece_list = [[(0.0,0.0), (1.0,0.0)], [(1.002,0.0), (2.0,0.0)]]
+        self.assertEqual(len(chain_pieces(piece_list, 1.0e-3)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Tests of the placement of assembly parts with transformation matrices.
+"""
+import unittest
+import numpy
+from scad_module import SCAD_Module, Module_Call, Multmatrix
+from transforms import Placement_List, translation_matrix, translation_matrices
+
+# Rotation by 90 degrees about z
+ROTATE_Z = numpy.array([
+    [0.0, -1.0, 0.0, 0.0],
+    [1.0,  0.0, 0.0, 0.0],
+    [0.0,  0.0, 1.0, 0.0],
+    [0.0,  0.0, 0.0, 1.0],
+    ])
+
+
+class Placement_List_Test(unittest.TestCase):
+
+    def get_placements(self, explode=(10,0,10)):
+        placements = Placement_List(explode)
+        placements.add('top', 'cube();', v=(1,2,3), explode=(0,0,1))
+        placements.add('sensor', 'sphere();', matrix=ROTATE_Z, v=(0,0,-5), explode=(0.5,0,-1), rgba=(0.5,0.5,0.5))
+        placements.add('bottom', 'cube();', explode=(0,0,-1))
+        return placements
+
+    def test_translation_matrices(self):
+        matrices = translation_matrices([(1,2,3), (4,5,6)])
+        self.assertEqual(matrices.shape, (2,4,4))
+        self.assertTrue(numpy.allclose(matrices[1], translation_matrix((4,5,6))))
+
+    def test_module_call(self):
+        # A placed module call stays on one line
+        call = Multmatrix(Module_Call('part_0'), translation_matrix((1,2,3)))
+        self.assertEqual(str(call),
+                'multmatrix([[1.0, 0.0, 0.0, 1.0], [0.0, 1.0, 0.0, 2.0], [0.0, 0.0, 1.0, 3.0], [0.0, 0.0, 0.0, 1.0]]) part_0();\n')
+        module = SCAD_Module('unit', [call])
+        self.assertEqual(str(module).splitlines()[1], '    ' + str(call).rstrip())
+
+    def test_matrices(self):
+        placements = self.get_placements()
+        matrices = placements.get_matrices()
+        self.assertEqual(matrices.shape, (3,4,4))
+
+        # Each part is placed by translate(explode)*translate(v)*matrix
+        expected_list = [
+                numpy.dot(translation_matrix((0,0,10)), translation_matrix((1,2,3))),
+                numpy.dot(translation_matrix((5,0,-10)), numpy.dot(translation_matrix((0,0,-5)), ROTATE_Z)),
+                translation_matrix((0,0,-10)),
+                ]
+        for matrix, expected in zip(matrices, expected_list):
+            self.assertTrue(numpy.allclose(matrix, expected))
+
+        # A point of the sensor at (1,0,0) is rotated to (0,1,0), then moved
+        point = numpy.dot(matrices[1], (1,0,0,1))
+        self.assertTrue(numpy.allclose(point, (5,1,-15,1)))
+
+    def test_no_explode(self):
+        matrices = self.get_placements(explode=(0,0,0)).get_matrices()
+        self.assertTrue(numpy.allclose(matrices[0], translation_matrix((1,2,3))))
+        self.assertTrue(numpy.allclose(matrices[2], numpy.identity(4)))
+        self.assertEqual(Placement_List().get_matrices().shape, (0,4,4))
+
+    def test_nodes(self):
+        placements = self.get_placements()
+        node_list = placements.get_nodes()
+        self.assertEqual(len(node_list), 3)
+        for node, matrix in zip(node_list, placements.get_matrices()):
+            self.assertTrue(isinstance(node, Multmatrix))
+            self.assertTrue(numpy.allclose(node.matrix, matrix))
+        self.assertEqual(node_list[1].rgba, (0.5,0.5,0.5))
+        self.assertTrue(str(node_list[1]).startswith('color([0.5, 0.5, 0.5]) multmatrix('))
+
+    def test_instanced_nodes(self):
+        placements = self.get_placements()
+        offsets = [(0,0,0), (30,0,0), (60,0,0)]
+        node_list = placements.get_instanced_nodes(translation_matrices(offsets), 'sensor_part')
+
+        # The cube is defined once although it is placed twice
+        module_list = [node for node in node_list if isinstance(node, SCAD_Module)]
+        self.assertEqual([module.name for module in module_list], ['sensor_part_0', 'sensor_part_1', 'sensor_part_unit'])
+        unit = module_list[-1]
+        self.assertEqual([call.obj.name for call in unit.obj_list], ['sensor_part_0', 'sensor_part_1', 'sensor_part_0'])
+        for call, matrix in zip(unit.obj_list, placements.get_matrices()):
+            self.assertTrue(numpy.allclose(call.matrix, matrix))
+
+        # One call of the unit module per instance, moved by its offset
+        call_list = [node for node in node_list if isinstance(node, Multmatrix)]
+        self.assertEqual(len(call_list), len(offsets))
+        for call, offset in zip(call_list, offsets):
+            self.assertEqual(call.obj.name, 'sensor_part_unit')
+            self.assertTrue(numpy.allclose(call.matrix, translation_matrix(offset)))
+
+        # Position of the top part in the last instance
+        matrix = numpy.dot(call_list[-1].matrix, unit.obj_list[0].matrix)
+        self.assertTrue(numpy.allclose(numpy.dot(matrix, (0,0,0,1)), (61,2,13,1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,528 @@
+"""
+Ordering of the contours of a laser cutting dxf file and an estimate of the
+cut time. Files written by openscad's projection, and by the native dxf
+writer, list their contours in whatever order the parts and holes were
+created, so the laser head travels back and forth across the sheet.
+
+The LINE, LWPOLYLINE, CIRCLE and ARC entities of the file are faceted and
+chained end to end into contours. A contour lying inside a closed contour,
+e.g. a hole in a panel, has to be cut before it, since the part may shift
+once its outline is cut free. Subject to that, the contours are ordered by a
+nearest neighbour tour from the lower left corner of the drawing which is
+then improved with 2-opt moves, choosing the entry point of each closed
+contour nearest to where the previous one ended. The ordered contours are
+written as chains of LINE entities starting at their entry points.
+
+The cut time is estimated from the cut length at the feed rate, the travel
+between contours at the rapid rate and a fixed pierce time per contour.
+
+    python toolpath.py arrayed_bottom_projection.dxf -o arrayed_bottom_ordered.dxf
+"""
+import math
+from dxf_writer import DXF_Writer, get_arc_points
+
+DEFAULT_CHORD_TOL = 0.01
+DEFAULT_FEED_RATE = 20.0
+DEFAULT_RAPID_RATE = 200.0
+DEFAULT_PIERCE_TIME = 0.1
+DEFAULT_TOLERANCE = 1.0e-6
+# End points closer than this are joined. openscad prints 6 significant
+# digits, i.e. 1e-4 mm at 100 mm.
+DEFAULT_JOIN_TOL = 1.0e-3
+MAX_2OPT_ROUNDS = 10
+
+
+class Contour(object):
+
+    def __init__(self, points, closed=False):
+        """
+        points is a list of (x,y) points. Closed contours don't repeat their
+        first point at the end.
+        """
+        self.points = list(points)
+        self.closed = closed
+        self.entry = 0
+        self.reversed = False
+
+    def __repr__(self):
+        return 'Contour(points=<{0}>, closed={1})'.format(len(self.points), self.closed)
+
+    def get_length(self):
+        point_list = self.points
+        if self.closed:
+            point_list = point_list + point_list[:1]
+        return sum(get_distance(p, q) for p, q in zip(point_list[:-1], point_list[1:]))
+
+    def get_bounding_box(self):
+        """
+        Returns (min_x, min_y, max_x, max_y).
+        """
+        x_list = [x for x, y in self.points]
+        y_list = [y for x, y in self.points]
+        return min(x_list), min(y_list), max(x_list), max(y_list)
+
+    def get_entry(self):
+        if self.closed:
+            return self.points[self.entry]
+        return self.points[-1] if self.reversed else self.points[0]
+
+    def get_exit(self):
+        if self.closed:
+            return self.points[self.entry]
+        return self.points[0] if self.reversed else self.points[-1]
+
+    def set_entry_near(self, point):
+        """
+        Enter a closed contour at its vertex nearest to point and an open one
+        at its end nearest to point.
+        """
+        if self.closed:
+            dist_list = [get_distance(point, p) for p in self.points]
+            self.entry = dist_list.index(min(dist_list))
+        else:
+            self.reversed = get_distance(point, self.points[-1]) < get_distance(point, self.points[0])
+
+    def flip(self):
+        """
+        Swap entry and exit of an open contour, closed ones are unchanged.
+        """
+        if not self.closed:
+            self.reversed = not self.reversed
+
+    def get_path(self):
+        """
+        Returns the points in cutting order, closed contours ending where they
+        started.
+        """
+        if self.closed:
+            return self.points[self.entry:] + self.points[:self.entry+1]
+        if self.reversed:
+            return self.points[::-1]
+        return list(self.points)
+
+    def contains(self, point):
+        """
+        True if point is inside the closed contour (ray casting).
+        """
+        if not self.closed:
+            return False
+        x, y = point
+        inside = False
+        for (x0,y0), (x1,y1) in zip(self.points, self.points[1:] + self.points[:1]):
+            if (y0 > y) != (y1 > y):
+                if x < x0 + (y - y0)*(x1 - x0)/(y1 - y0):
+                    inside = not inside
+        return inside
+
+
+def get_distance(p, q):
+    return math.hypot(p[0] - q[0], p[1] - q[1])
+
+
+def read_dxf_pairs(filename):
+    """
+    Returns list of (group code, value) pairs of a dxf file.
+    """
+    with open(filename,'r') as f:
+        line_list = [line.strip() for line in f]
+    return [(int(code), value) for code, value in zip(line_list[0::2], line_list[1::2])]
+
+
+def read_dxf_entities(filename):
+    """
+    Returns list of (entity type, list of (group code, value) pairs) for the
+    entities in the ENTITIES section of a dxf file.
+    """
+    entity_list = []
+    in_entities = False
+    pair_list = read_dxf_pairs(filename)
+    for i, (code, value) in enumerate(pair_list):
+        if code == 2 and i > 0 and pair_list[i-1] == (0, 'SECTION'):
+            in_entities = value == 'ENTITIES'
+            continue
+        if not in_entities:
+            continue
+        if code == 0:
+            if value in ('ENDSEC', 'EOF'):
+                in_entities = False
+                continue
+            entity_list.append((value, []))
+        elif entity_list:
+            entity_list[-1][1].append((code, value))
+    return entity_list
+
+
+def get_bulge_points(p0, p1, bulge, chord_tol):
+    """
+    Points of the arc segment from p0 to p1 with the given bulge, excluding p0.
+    """
+    if abs(bulge) < DEFAULT_TOLERANCE:
+        return [p1]
+    angle = 4.0*math.atan(bulge)
+    chord = get_distance(p0, p1)
+    radius = 0.5*chord/math.sin(0.5*abs(angle))
+    # Center lies on the perpendicular bisector of the chord
+    mx, my = 0.5*(p0[0] + p1[0]), 0.5*(p0[1] + p1[1])
+    ux, uy = (p1[0] - p0[0])/chord, (p1[1] - p0[1])/chord
+    dist = radius*math.cos(0.5*angle)
+    sign = 1.0 if angle > 0 else -1.0
+    center = mx - sign*uy*dist, my + sign*ux*dist
+    start_angle = math.degrees(math.atan2(p0[1] - center[1], p0[0] - center[0]))
+    if angle > 0:
+        point_list = get_arc_points(center, radius, start_angle, start_angle + math.degrees(angle), chord_tol)
+    else:
+        end_angle = math.degrees(math.atan2(p1[1] - center[1], p1[0] - center[0]))
+        point_list = get_arc_points(center, radius, end_angle, end_angle - math.degrees(angle), chord_tol)[::-1]
+    return point_list[1:-1] + [p1]
+
+
+def get_entity_pieces(entity_list, chord_tol=DEFAULT_CHORD_TOL):
+    """
+    Facet dxf entities. Returns (closed, pieces) where closed is a list of
+    closed Contours and pieces a list of open point lists still to be chained.
+    """
+    closed_list = []
+    piece_list = []
+    for entity_type, pair_list in entity_list:
+        values = {}
+        for code, value in pair_list:
+            values.setdefault(code, []).append(value)
+        get = lambda code, default=0.0: float(values.get(code, [default])[0])
+        if entity_type == 'LINE':
+            piece_list.append([(get(10), get(20)), (get(11), get(21))])
+        elif entity_type == 'CIRCLE':
+            point_list = get_arc_points((get(10), get(20)), get(40), 0.0, 360.0, chord_tol)[:-1]
+            closed_list.append(Contour(point_list, closed=True))
+        elif entity_type == 'ARC':
+            end_angle = get(51)
+            if end_angle <= get(50):
+                end_angle += 360.0
+            piece_list.append(get_arc_points((get(10), get(20)), get(40), get(50), end_angle, chord_tol))
+        elif entity_type == 'LWPOLYLINE':
+            # Bulges follow the vertex they belong to
+            vertex_list = []
+            for code, value in pair_list:
+                if code == 10:
+                    vertex_list.append([float(value), None, 0.0])
+                elif code == 20 and vertex_list:
+                    vertex_list[-1][1] = float(value)
+                elif code == 42 and vertex_list:
+                    vertex_list[-1][2] = float(value)
+            closed = int(get(70, 0)) & 1
+            if closed:
+                vertex_list.append(vertex_list[0])
+            point_list = [(vertex_list[0][0], vertex_list[0][1])]
+            for (x0,y0,bulge), (x1,y1,_) in zip(vertex_list[:-1], vertex_list[1:]):
+                point_list.extend(get_bulge_points((x0,y0), (x1,y1), bulge, chord_tol))
+            if closed:
+                closed_list.append(Contour(point_list[:-1], closed=True))
+            else:
+                piece_list.append(point_list)
+    return closed_list, piece_list
+
+
+def chain_pieces(piece_list, tol=DEFAULT_JOIN_TOL):
+    """
+    Join open point lists whose end points are within tol of each other into
+    contours. Returns list of Contours, closed where a chain ends at its start.
+    """
+    # End points are binned in cells of size tol. Points within tol of each
+    # other can fall in neighbouring cells, so those are searched as well.
+    get_cell = lambda p: (int(math.floor(p[0]/tol)), int(math.floor(p[1]/tol)))
+    is_near = lambda p, q: get_distance(p, q) <= tol
+    cell_dict = {}
+    for i, piece in enumerate(piece_list):
+        cell_dict.setdefault(get_cell(piece[0]), []).append(i)
+        cell_dict.setdefault(get_cell(piece[-1]), []).append(i)
+
+    used = [False]*len(piece_list)
+
+    def find_next(point):
+        cell_x, cell_y = get_cell(point)
+        index_set = set()
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                index_set.update(cell_dict.get((cell_x + dx, cell_y + dy), []))
+        for i in sorted(index_set):
+            if not used[i] and (is_near(piece_list[i][0], point) or is_near(piece_list[i][-1], point)):
+                return i
+        return None
+
+    def extend(point_list):
+        while True:
+            i = find_next(point_list[-1])
+            if i is None:
+                return point_list
+            used[i] = True
+            piece = piece_list[i]
+            if not is_near(piece[0], point_list[-1]):
+                piece = piece[::-1]
+            point_list.extend(piece[1:])
+            if is_near(point_list[-1], point_list[0]):
+                return point_list
+
+    contour_list = []
+    for i, piece in enumerate(piece_list):
+        if used[i]:
+            continue
+        used[i] = True
+        point_list = extend(list(piece))
+        if len(point_list) > 2 and is_near(point_list[-1], point_list[0]):
+            contour_list.append(Contour(point_list[:-1], closed=True))
+            continue
+        point_list = extend(point_list[::-1])[::-1]
+        contour_list.append(Contour(point_list, closed=False))
+    return contour_list
+
+
+def read_contours(filename, chord_tol=DEFAULT_CHORD_TOL, tol=DEFAULT_JOIN_TOL):
+    """
+    Read the contours of a dxf file.
+    """
+    closed_list, piece_list = get_entity_pieces(read_dxf_entities(filename), chord_tol)
+    return closed_list + chain_pieces(piece_list, tol)
+
+
+def get_containers(contour_list):
+    """
+    Returns list with, for each contour, the set of indices of the closed
+    contours it lies inside.
+    """
+    box_list = [contour.get_bounding_box() for contour in contour_list]
+    container_list = []
+    for i, contour in enumerate(contour_list):
+        x0, y0, x1, y1 = box_list[i]
+        container_set = set()
+        for j, other in enumerate(contour_list):
+            if j == i or not other.closed:
+                continue
+            ox0, oy0, ox1, oy1 = box_list[j]
+            if x0 < ox0 or y0 < oy0 or x1 > ox1 or y1 > oy1:
+                continue
+            if box_list[i] == box_list[j] and j < i:
+                continue
+            if other.contains(contour.points[0]):
+                container_set.add(j)
+        container_list.append(container_set)
+    return container_list
+
+
+def get_travel(contour_list, order, start=(0.0,0.0)):
+    """
+    Rapid travel distance for cutting the contours in the given order with
+    their current entry points.
+    """
+    travel = 0.0
+    pos = start
+    for i in order:
+        travel += get_distance(pos, contour_list[i].get_entry())
+        pos = contour_list[i].get_exit()
+    return travel
+
+
+def set_entries(contour_list, order, start=(0.0,0.0)):
+    pos = start
+    for i in order:
+        contour_list[i].set_entry_near(pos)
+        pos = contour_list[i].get_exit()
+
+
+def get_nearest_neighbour_order(contour_list, container_list, start=(0.0,0.0)):
+    """
+    Tour which always moves to the nearest contour whose inner contours have
+    all been cut.
+    """
+    num_inner = [0]*len(contour_list)
+    for container_set in container_list:
+        for j in container_set:
+            num_inner[j] += 1
+    remaining = set(range(len(contour_list)))
+    order = []
+    pos = start
+    while remaining:
+        best = None
+        for i in remaining:
+            if num_inner[i]:
+                continue
+            contour_list[i].set_entry_near(pos)
+            dist = get_distance(pos, contour_list[i].get_entry())
+            if best is None or dist < best[0]:
+                best = dist, i
+        i = best[1]
+        contour_list[i].set_entry_near(pos)
+        pos = contour_list[i].get_exit()
+        order.append(i)
+        remaining.remove(i)
+        for j in container_list[i]:
+            num_inner[j] -= 1
+    return order
+
+
+def improve_2opt(contour_list, container_list, order, start=(0.0,0.0), tol=DEFAULT_TOLERANCE):
+    """
+    Reverse sections of the tour while that shortens the travel. Sections
+    holding both a contour and one of its containers are not reversed, which
+    keeps inner contours before outer ones. Returns the improved order.
+    """
+    order = list(order)
+    n = len(order)
+    for round_num in range(MAX_2OPT_ROUNDS):
+        improved = False
+        for i in range(n-1):
+            for j in range(i+1, n):
+                if i == 0:
+                    p_before = start
+                else:
+                    p_before = contour_list[order[i-1]].get_exit()
+                entry_i = contour_list[order[i]].get_entry()
+                exit_j = contour_list[order[j]].get_exit()
+                old_dist = get_distance(p_before, entry_i)
+                new_dist = get_distance(p_before, exit_j)
+                if j < n-1:
+                    entry_after = contour_list[order[j+1]].get_entry()
+                    old_dist += get_distance(exit_j, entry_after)
+                    new_dist += get_distance(entry_i, entry_after)
+                if new_dist >= old_dist - tol:
+                    continue
+                section = set(order[i:j+1])
+                if any(container_list[k] & section for k in order[i:j+1]):
+                    continue
+                for k in order[i:j+1]:
+                    contour_list[k].flip()
+                order[i:j+1] = order[i:j+1][::-1]
+                improved = True
+        # New neighbours may prefer other entry points
+        set_entries(contour_list, order, start)
+        if not improved:
+            break
+    return order
+
+
+def order_contours(contour_list, start=None):
+    """
+    Order contours inner before outer with a short travel between them.
+    Returns (order, container_list, start) where order is the list of
+    contour indices in cutting order.
+    """
+    if start is None:
+        start = get_lower_left(contour_list)
+    container_list = get_containers(contour_list)
+    order = get_nearest_neighbour_order(contour_list, container_list, start)
+    order = improve_2opt(contour_list, container_list, order, start)
+    return order, container_list, start
+
+
+def get_lower_left(contour_list):
+    if not contour_list:
+        return 0.0, 0.0
+    box_list = [contour.get_bounding_box() for contour in contour_list]
+    return min(box[0] for box in box_list), min(box[1] for box in box_list)
+
+
+def get_cut_estimate(contour_list, order, start=(0.0,0.0), feed_rate=DEFAULT_FEED_RATE,
+        rapid_rate=DEFAULT_RAPID_RATE, pierce_time=DEFAULT_PIERCE_TIME):
+    """
+    Estimate cut time (s) of the contours in the given order. Rates are in
+    mm/s. Returns dictionary with the lengths and times.
+    """
+    cut_length = sum(contour_list[i].get_length() for i in order)
+    travel = get_travel(contour_list, order, start)
+    estimate = {
+            'contours'    : len(order),
+            'cut_length'  : cut_length,
+            'travel'      : travel,
+            'cut_time'    : cut_length/feed_rate,
+            'travel_time' : travel/rapid_rate,
+            'pierce_time' : pierce_time*len(order),
+            }
+    estimate['time'] = estimate['cut_time'] + estimate['travel_time'] + estimate['pierce_time']
+    return estimate
+
+
+def is_inner_first(order, container_list):
+    """
+    True if every contour comes before the contours containing it.
+    """
+    position = dict((i, n) for n, i in enumerate(order))
+    return all(position[i] < position[j] for i in order for j in container_list[i])
+
+
+def write_contours(filename, contour_list, order):
+    writer = DXF_Writer()
+    for i in order:
+        contour = contour_list[i]
+        path = contour.get_path()
+        if contour.closed:
+            writer.add_polyline(path[:-1], closed=True)
+        else:
+            writer.add_polyline(path, closed=False)
+    writer.write(filename)
+    return writer
+
+
+def order_dxf(filename, output_filename=None, chord_tol=DEFAULT_CHORD_TOL, **kwargs):
+    """
+    Order the contours of a dxf file and write them to output_filename if
+    given. Returns the cut estimates in the original order and after
+    ordering. Keyword arguments are passed to get_cut_estimate.
+    """
+    contour_list = read_contours(filename, chord_tol)
+    start = get_lower_left(contour_list)
+    original_order = range(len(contour_list))
+    set_entries(contour_list, original_order, start)
+    before = get_cut_estimate(contour_list, original_order, start, **kwargs)
+    order, container_list, start = order_contours(contour_list, start)
+    after = get_cut_estimate(contour_list, order, start, **kwargs)
+    if output_filename is not None:
+        write_contours(output_filename, contour_list, order)
+    return before, after
+
+
+def print_estimate(name, estimate):
+    print '{0:<10s} contours={1:<5d} cut={2:1.1f}mm travel={3:1.1f}mm time={4:1.1f}s'.format(
+            name,
+            estimate['contours'],
+            estimate['cut_length'],
+            estimate['travel'],
+            estimate['time'],
+            )
+
+# -----------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    import os.path
+    import argparse
+    parser = argparse.ArgumentParser(description='order the contours of a laser cutting dxf and estimate the cut time')
+    parser.add_argument('dxf', nargs='+', help='dxf files')
+    parser.add_argument('-o', '--output', default=None, help='output file, only for a single input (default: <name>_ordered.dxf)')
+    parser.add_argument('--feed-rate', type=float, default=DEFAULT_FEED_RATE, help='cutting speed (mm/s)')
+    parser.add_argument('--rapid-rate', type=float, default=DEFAULT_RAPID_RATE, help='travel speed between contours (mm/s)')
+    parser.add_argument('--pierce-time', type=float, default=DEFAULT_PIERCE_TIME, help='time to pierce each contour (s)')
+    parser.add_argument('--chord-tol', type=float, default=DEFAULT_CHORD_TOL, help='facet curves to this tolerance (mm)')
+    parser.add_argument('--estimate-only', action='store_true', help='do not write ordered dxf files')
+    args = parser.parse_args()
+
+    if args.output is not None and len(args.dxf) > 1:
+        parser.error('--output can only be used with a single input file')
+
+    for filename in args.dxf:
+        if args.estimate_only:
+            output_filename = None
+        elif args.output is not None:
+            output_filename = args.output
+        else:
+            base_name, ext = os.path.splitext(filename)
+            output_filename = '{0}_ordered.dxf'.format(base_name)
+        before, after = order_dxf(
+                filename,
+                output_filename,
+                chord_tol=args.chord_tol,
+                feed_rate=args.feed_rate,
+                rapid_rate=args.rapid_rate,
+                pierce_time=args.pierce_time,
+                )
+        print filename
+        print_estimate('original', before)
+        print_estimate('ordered', after)
+        if output_filename is not None:
+            print '{0} written'.format(output_filename)
@@ -0,0 +1,110 @@
+"""
+Placement of assembly parts with 4x4 transformation matrices. Each part is
+added to a Placement_List with its matrix, an optional explode direction and
+color. The explode offsets are applied to all parts at once as a batched
+matrix product, and every placed part is emitted as a single multmatrix node instead of nested
+translate/rotate/color nodes. Instanced parts are placed in a unit module,
+which is called once per instance, so the output grows by one line per
+instance.
+
+    placements = Placement_List(explode=(0,0,10))
+    placements.add('sensor', sensor, v=(0,0,-5), explode=(0,0,-1), rgba=(0.5,0.5,0.5))
+    parts_list = placements.get_nodes()
+"""
+import numpy
+from scad_module import SCAD_Module, Module_Call, Multmatrix
+
+
+def translation_matrix(v):
+    matrix = numpy.identity(4)
+    matrix[:3,3] = v
+    return matrix
+
+
+def translation_matrices(offsets):
+    """
+    Returns (n,4,4) array of translations by the rows of the (n,3) array of
+    offsets.
+    """
+    offsets = numpy.asarray(offsets, dtype=float).reshape(-1,3)
+    matrices = numpy.tile(numpy.identity(4), (len(offsets),1,1))
+    matrices[:,:3,3] = offsets
+    return matrices
+
+
+class Placement_List(object):
+
+    def __init__(self, explode=(0,0,0)):
+        self.explode = explode
+        self.name_list = []
+        self.part_list = []
+        self.matrix_list = []
+        self.explode_list = []
+        self.rgba_list = []
+
+    def __len__(self):
+        return len(self.part_list)
+
+    def add(self, name, part, matrix=None, v=None, explode=(0,0,0), rgba=None):
+        """
+        Add part placed by matrix, or translated by v. The part is moved by
+        the explode vector scaled per axis by explode, e.g. (0,0,-1) to move
+        it down by the z component of the explode vector.
+        """
+        if matrix is None:
+            matrix = numpy.identity(4)
+        if v is not None:
+            matrix = numpy.dot(translation_matrix(v), matrix)
+        self.name_list.append(name)
+        self.part_list.append(part)
+        self.matrix_list.append(matrix)
+        self.explode_list.append(explode)
+        self.rgba_list.append(rgba)
+
+    def extend(self, placements):
+        self.name_list.extend(placements.name_list)
+        self.part_list.extend(placements.part_list)
+        self.matrix_list.extend(placements.matrix_list)
+        self.explode_list.extend(placements.explode_list)
+        self.rgba_list.extend(placements.rgba_list)
+
+    def get_matrices(self):
+        """
+        Returns (n,4,4) array of the part matrices with the explode offsets
+        applied.
+        """
+        if not self.part_list:
+            return numpy.zeros((0,4,4))
+        offsets = numpy.asarray(self.explode_list, dtype=float)*numpy.asarray(self.explode, dtype=float)
+        return numpy.matmul(translation_matrices(offsets), numpy.array(self.matrix_list))
+
+    def get_nodes(self):
+        """
+        Get one multmatrix node per part.
+        """
+        matrices = self.get_matrices().tolist()
+        return [Multmatrix(part, matrix, rgba) for part, matrix, rgba in zip(self.part_list, matrices, self.rgba_list)]
+
+    def get_instanced_nodes(self, instance_matrices, prefix='part'):
+        """
+        Get module definitions of the parts, each defined once even if placed
+        several times, and of a unit module placing all of them, followed by
+        one multmatrix call of the unit module per instance.
+        """
+        module_names = {}
+        node_list = []
+        for part in self.part_list:
+            if id(part) not in module_names:
+                name = '{0}_{1}'.format(prefix, len(module_names))
+                module_names[id(part)] = name
+                node_list.append(SCAD_Module(name, part))
+        matrices = self.get_matrices().tolist()
+        call_list = []
+        for part, matrix, rgba in zip(self.part_list, matrices, self.rgba_list):
+            call_list.append(Multmatrix(Module_Call(module_names[id(part)]), matrix, rgba))
+        unit_name = '{0}_unit'.format(prefix)
+        node_list.append(SCAD_Module(unit_name, call_list))
+        instance_matrices = numpy.asarray(instance_matrices, dtype=float).reshape(-1,4,4).tolist()
+        for matrix in instance_matrices:
+            node_list.append(Multmatrix(Module_Call(unit_name), matrix))
+        return node_list